@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Ensemble benchmark
+Trains one keras-engine network, K of them one after another, and the packed
+K-member ensemble on the same synthetic data over several seeds, comparing
+training time and how much the next-day prediction moves from seed to seed
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import sys
+import time
+
+import numpy as np
+
+from pipeline_benchmark import CACHE_DIR, sp, synthetic_history
+
+def prepared_data(rows):
+    """Scaled features and next-day targets, as fetch_and_prepare_data builds them"""
+    history = synthetic_history(rows)
+    data = history[sp.PRICE_COLUMNS].copy()
+    data['Sentiment'] = 0.0
+    data['Tomorrow'] = data['Close'].shift(-1)
+    data = data.dropna()
+    scaled = sp.MinMaxScaler().fit_transform(data[sp.FEATURE_COLUMNS].values)
+    return scaled[:, :-1], scaled[:, -1]
+
+def train(X, y, members, separate, epochs, seed):
+    """Seconds to train and the prediction for the last row"""
+    sp.keras.utils.set_random_seed(seed)
+    started = time.perf_counter()
+    if separate:
+        models = [sp.create_and_train_model(X, y, epochs)[0] for _ in range(members)]
+        seconds = time.perf_counter() - started
+        prediction = np.mean([sp.predict_rows(model, X[-1:]).mean() for model in models])
+    else:
+        model, _ = sp.create_and_train_model(X, y, epochs, members=members)
+        seconds = time.perf_counter() - started
+        prediction = sp.predict_rows(model, X[-1:]).mean()
+    sp.keras.backend.clear_session()
+    return seconds, float(prediction)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a single network, K separate networks and the packed ensemble")
+    parser.add_argument('--rows', type=int, default=504, help="Synthetic trading days (default: 504)")
+    parser.add_argument('--members', type=int, default=sp.ENSEMBLE_MEMBERS,
+                        help=f"Ensemble size K (default: {sp.ENSEMBLE_MEMBERS})")
+    parser.add_argument('--epochs', type=int, default=20, help="Epochs per training (default: 20)")
+    parser.add_argument('--seeds', type=int, default=4, help="Seeds per variant (default: 4)")
+    args = parser.parse_args()
+
+    X, y = prepared_data(args.rows)
+    variants = (('single', 1, False), ('separate', args.members, True), ('packed', args.members, False))
+    report = {'config': {'rows': len(X), 'members': args.members, 'epochs': args.epochs, 'seeds': args.seeds}}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Pay for TensorFlow start-up before timing
+            train(X, y, 1, False, 1, 0)
+            for name, members, separate in variants:
+                runs = [train(X, y, members, separate, args.epochs, seed) for seed in range(args.seeds)]
+                seconds = [run[0] for run in runs]
+                predictions = [run[1] for run in runs]
+                report[name] = {
+                    'train_seconds_median': round(float(np.median(seconds)), 3),
+                    'prediction_seed_std': float(np.std(predictions)),
+                    'predictions': predictions
+                }
+    finally:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    report['packed_vs_single_time'] = round(report['packed']['train_seconds_median'] /
+                                            report['single']['train_seconds_median'], 2)
+    report['packed_vs_separate_time'] = round(report['packed']['train_seconds_median'] /
+                                              report['separate']['train_seconds_median'], 2)
+    print(json.dumps(report, indent=2))
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+FinBERT backend accuracy check
+Scores a fixed local corpus with the fp32 model and each optimized backend,
+reporting the score delta against fp32 and the per-article inference time
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import stock_predictor as sp
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'finbert_corpus.json')
+
+def label(score):
+    """Bucket a score the same way the dashboard does"""
+    if score > 0.1:
+        return 'positive'
+    if score < -0.1:
+        return 'negative'
+    return 'neutral'
+
+def score_backend(backend, texts, repeats):
+    """Load a backend and return its scores and best per-article time over several runs"""
+    load_started = time.perf_counter()
+    tokenizer, model = sp.load_finbert(backend)
+    load_seconds = time.perf_counter() - load_started
+    
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        scores = sp.score_texts_finbert(texts, sp.FINBERT_BATCH_SIZE, tokenizer, model)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return scores, load_seconds, best / len(texts)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FinBERT backends against fp32")
+    parser.add_argument('--backends', nargs='+', default=[b for b in sp.FINBERT_BACKENDS if b != 'fp32'],
+                        choices=sp.FINBERT_BACKENDS, help="Backends to check (default: all optimized ones)")
+    parser.add_argument('--max-delta', type=float, default=0.05,
+                        help="Largest allowed absolute score difference from fp32 (default: 0.05)")
+    parser.add_argument('--repeats', type=int, default=3, help="Timed runs per backend (default: 3)")
+    parser.add_argument('--threads', type=int, default=None, help="torch.set_num_threads for all backends")
+    args = parser.parse_args()
+    
+    if args.threads:
+        sp.torch.set_num_threads(args.threads)
+    
+    with open(CORPUS) as f:
+        texts = [sp.clean_sentiment_text(text) for text in json.load(f)]
+    
+    reference, load_seconds, per_article = score_backend('fp32', texts, args.repeats)
+    report = {'corpus_size': len(texts), 'max_delta_allowed': args.max_delta, 'backends': {
+        'fp32': {'load_seconds': load_seconds, 'seconds_per_article': per_article}
+    }}
+    
+    failed = False
+    for backend in args.backends:
+        scores, load_seconds, backend_per_article = score_backend(backend, texts, args.repeats)
+        deltas = [abs(a - b) for a, b in zip(scores, reference)]
+        agreement = sum(label(a) == label(b) for a, b in zip(scores, reference)) / len(texts)
+        passed = max(deltas) <= args.max_delta
+        failed = failed or not passed
+        report['backends'][backend] = {
+            'load_seconds': load_seconds,
+            'seconds_per_article': backend_per_article,
+            'speedup': per_article / backend_per_article if backend_per_article else None,
+            'max_delta': max(deltas),
+            'mean_delta': sum(deltas) / len(deltas),
+            'label_agreement': agreement,
+            'passed': passed
+        }
+    
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
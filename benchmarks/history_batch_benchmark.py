@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+History batching benchmark
+Sends a burst of concurrent price history requests for different tickers through
+the price store, once with batching disabled and once with it on, against a
+local provider that counts upstream calls and sleeps like a network request
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import sys
+import threading
+import time
+
+from pipeline_benchmark import CACHE_DIR, sp, synthetic_history
+
+class CountingProvider(sp.MarketDataProvider):
+    """Serves synthetic bars, counting calls and sleeping a fixed time per call"""
+    name = 'counting'
+
+    def __init__(self, history, latency):
+        self.frame = history
+        self.latency = latency
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def call(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+    def history(self, ticker, period=None, start=None):
+        self.call()
+        return self.frame.copy()
+
+    def bulk_history(self, tickers, period='2y', start=None):
+        self.call()
+        return {ticker: self.frame.copy() for ticker in tickers}
+
+def burst(provider, tickers, spread):
+    """Request every ticker from its own thread, starting within `spread` seconds; returns wall seconds"""
+    errors = []
+
+    def request(ticker, delay):
+        time.sleep(delay)
+        try:
+            if sp.price_store.get_history(ticker, '2y').empty:
+                errors.append(ticker)
+        except Exception as e:
+            errors.append(f'{ticker}: {e}')
+
+    threads = [threading.Thread(target=request, args=(ticker, spread * i / max(len(tickers) - 1, 1)))
+               for i, ticker in enumerate(tickers)]
+    provider.calls = 0
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Count upstream calls for a burst of history requests")
+    parser.add_argument('--tickers', type=int, default=20, help="Concurrent requests, one ticker each (default: 20)")
+    parser.add_argument('--spread', type=float, default=0.03,
+                        help="Seconds over which the requests arrive (default: 0.03)")
+    parser.add_argument('--latency', type=float, default=0.3, help="Seconds per upstream call (default: 0.3)")
+    parser.add_argument('--window', type=float, default=sp.HISTORY_BATCH_WINDOW,
+                        help=f"Batch window in seconds (default: {sp.HISTORY_BATCH_WINDOW})")
+    args = parser.parse_args()
+
+    provider = CountingProvider(synthetic_history(504), args.latency)
+    sp.market_data = provider
+    report = {'tickers': args.tickers, 'spread_seconds': args.spread, 'latency_seconds': args.latency}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for label, window in (('unbatched', 0), ('batched', args.window)):
+                sp.history_batcher.window = window
+                # Fresh tickers each round so every request has to download
+                seconds, errors = burst(provider, [f'{label.upper()}{i}' for i in range(args.tickers)], args.spread)
+                report[label] = {'window_seconds': window, 'upstream_calls': provider.calls,
+                                 'wall_seconds': round(seconds, 3), 'errors': errors}
+    finally:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    report['call_reduction'] = round(report['unbatched']['upstream_calls'] / max(report['batched']['upstream_calls'], 1), 1)
+    print(json.dumps(report, indent=2))
+    failed = report['unbatched']['errors'] or report['batched']['errors']
+    sys.exit(1 if failed or report['batched']['upstream_calls'] >= report['unbatched']['upstream_calls'] else 0)
+
+if __name__ == "__main__":
+    main()
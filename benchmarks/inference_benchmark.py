@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Inference benchmark
+Times Keras model.predict() against predict_rows() for single rows and batches,
+on the dense (keras engine) and windowed (sequence engine) models, checking that
+both give the same predictions and that the feature array is left untouched
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import sys
+import time
+
+import numpy as np
+
+from pipeline_benchmark import CACHE_DIR, sp
+
+def time_call(func, repeats):
+    """p50/p95 microseconds per call"""
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return {'p50_us': round(float(np.percentile(samples, 50)), 1),
+            'p95_us': round(float(np.percentile(samples, 95)), 1)}
+
+def compare_model(name, model, X, batches, repeats):
+    """Timings and the largest prediction difference for each batch size"""
+    results = {}
+    for batch in batches:
+        rows = X[-batch:]
+        before = X.copy()
+        expected = np.asarray(model.predict(np.ascontiguousarray(rows), verbose=0)).reshape(len(rows), -1)
+        actual = sp.predict_rows(model, rows)
+        keras_timing = time_call(lambda: model.predict(np.ascontiguousarray(rows), verbose=0), repeats)
+        fast_timing = time_call(lambda: sp.predict_rows(model, rows), repeats)
+        results[str(batch)] = {
+            'keras_predict': keras_timing,
+            'predict_rows': fast_timing,
+            'speedup': round(keras_timing['p50_us'] / max(fast_timing['p50_us'], 1e-3), 1),
+            'max_abs_diff': float(np.abs(expected - actual).max()),
+            'input_unchanged': bool(np.array_equal(before, X))
+        }
+    return {'model': name, 'batches': results}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare model.predict with the cached inference path")
+    parser.add_argument('--rows', type=int, default=500, help="Training rows (default: 500)")
+    parser.add_argument('--lookback', type=int, default=sp.SEQUENCE_LOOKBACK,
+                        help=f"Sequence model window (default: {sp.SEQUENCE_LOOKBACK})")
+    parser.add_argument('--batches', default='1,32,256', help="Batch sizes to time (default: 1,32,256)")
+    parser.add_argument('--repeats', type=int, default=200, help="Timed calls per batch size (default: 200)")
+    parser.add_argument('--tolerance', type=float, default=1e-4,
+                        help="Largest allowed prediction difference on scaled targets (default: 1e-4)")
+    args = parser.parse_args()
+    batches = [int(batch) for batch in args.batches.split(',')]
+
+    rng = np.random.default_rng(0)
+    features = rng.random((args.rows, len(sp.FEATURE_COLUMNS) - 1))
+    targets = rng.random(args.rows)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            dense, _ = sp.create_and_train_model(features, targets, epochs=2)
+            windows = sp.make_windows(features, args.lookback)
+            sequence, _ = sp.create_and_train_model(windows, targets[args.lookback - 1:], epochs=2)
+            report = {
+                'config': {'rows': args.rows, 'lookback': args.lookback, 'repeats': args.repeats,
+                           'python': sys.version.split()[0], 'platform': sys.platform},
+                'models': [compare_model('dense', dense, features, batches, args.repeats),
+                           compare_model('sequence', sequence, windows, batches, args.repeats)]
+            }
+    finally:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    failed = [result for model in report['models'] for result in model['batches'].values()
+              if result['max_abs_diff'] > args.tolerance or not result['input_unchanged']]
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Offline pipeline benchmark
+Times each prediction stage separately against synthetic OHLCV bars, a local
+news fixture and a stubbed (or locally cached) FinBERT, reporting p50/p95,
+peak RSS and the change against a saved baseline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+import zlib
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the price store, model registry and sentiment cache out of the user's cache directory
+CACHE_DIR = tempfile.mkdtemp(prefix='stock-predictor-bench-')
+os.environ['STOCK_PREDICTOR_CACHE'] = CACHE_DIR
+
+import numpy as np
+import pandas as pd
+
+import stock_predictor as sp
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+NEWS_FIXTURE = os.path.join(FIXTURES, 'news_fixture.json')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pipeline_baseline.json')
+STAGES = ('get_company_info', 'fetch_yahoo_finance_news', 'calculate_news_sentiment',
+          'fetch_and_prepare_data', 'create_and_train_model', 'make_prediction', 'create_visualization')
+TICKER = 'BENCH'
+
+def synthetic_history(rows, seed=0):
+    """Random-walk daily OHLCV bars ending today, shaped like yfinance history()"""
+    index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=rows).tz_localize('America/New_York')
+    index.name = 'Date'
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.003, rows)),
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 5_000_000, rows).astype(float),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0
+    }, index=index)
+
+def fake_yfinance(history, news):
+    """Stand-in for the yfinance module, serving local data"""
+    class Ticker:
+        def __init__(self, ticker, session=None):
+            self.ticker = ticker
+            self.info = {'longName': f'{ticker} Benchmark Corp', 'sector': 'Technology'}
+            self.news = news
+
+        def history(self, period=None, start=None, **kwargs):
+            if start is not None:
+                start = pd.Timestamp(start)
+                if start.tz is None:
+                    start = start.tz_localize(history.index.tz)
+                return history[history.index >= start].copy()
+            return history.copy()
+
+    return types.SimpleNamespace(Ticker=Ticker)
+
+class StubTokenizer:
+    """Whitespace tokenizer with hashed ids, returning the tensors FinBERT's tokenizer would"""
+    vocab_size = 4096
+
+    def __call__(self, texts, return_tensors='pt', truncation=True, padding=True, max_length=512):
+        ids = [[zlib.crc32(word.encode('utf-8')) % self.vocab_size for word in text.lower().split()][:max_length] or [0] for text in texts]
+        width = max(len(row) for row in ids)
+        input_ids = sp.torch.zeros((len(ids), width), dtype=sp.torch.long)
+        attention_mask = sp.torch.zeros((len(ids), width), dtype=sp.torch.long)
+        for i, row in enumerate(ids):
+            input_ids[i, :len(row)] = sp.torch.tensor(row)
+            attention_mask[i, :len(row)] = 1
+        return {'input_ids': input_ids, 'attention_mask': attention_mask}
+
+class StubFinBERT:
+    """Deterministic bag-of-words classifier with FinBERT's output layout"""
+
+    def __init__(self, vocab_size=StubTokenizer.vocab_size, seed=0):
+        generator = sp.torch.Generator().manual_seed(seed)
+        self.weights = sp.torch.randn(vocab_size, 3, generator=generator)
+
+    def __call__(self, input_ids, attention_mask, **kwargs):
+        mask = attention_mask.unsqueeze(-1).float()
+        logits = (self.weights[input_ids] * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        return types.SimpleNamespace(logits=logits)
+
+def setup_finbert(mode, backend):
+    """Install the stub model, or load a FinBERT already in the local Hugging Face cache"""
+    if mode == 'stub':
+        sp.finbert_tokenizer, sp.finbert_model = StubTokenizer(), StubFinBERT()
+        sp.finbert_backend = 'stub'
+    else:
+        os.environ['HF_HUB_OFFLINE'] = '1'
+        sp.finbert_tokenizer, sp.finbert_model = sp.load_finbert(backend)
+        sp.finbert_backend = backend
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_pipeline(args):
+    """Run every stage once in pipeline order; returns {stage: seconds}"""
+    timings = {}
+
+    def timed(stage, func, *func_args, **func_kwargs):
+        started = time.perf_counter()
+        result = func(*func_args, **func_kwargs)
+        timings[stage] = time.perf_counter() - started
+        return result
+
+    company_name, _ = timed('get_company_info', sp.get_company_info, args.ticker)
+    news = timed('fetch_yahoo_finance_news', sp.fetch_yahoo_finance_news, args.ticker, company_name)
+    if not args.warm_sentiment_cache:
+        sp.sentiment_cache.memory.clear()
+        if sp.sentiment_cache.db is not None:
+            sp.sentiment_cache.db.execute('DELETE FROM sentiment')
+    sentiment, _ = timed('calculate_news_sentiment', sp.calculate_news_sentiment, news)
+    data, X, y, scaler, last_date = timed('fetch_and_prepare_data', sp.fetch_and_prepare_data,
+                                          args.ticker, args.period, sentiment, lookback=args.lookback)
+    model, _ = timed('create_and_train_model', sp.create_and_train_model, X, y, args.epochs)
+    predicted_price, next_date = timed('make_prediction', sp.make_prediction,
+                                       model, X, scaler, last_date, data, sentiment, args.ticker)
+    series = sp.build_chart_series(data, predicted_price, next_date, args.ticker)
+    timed('create_visualization', sp.create_visualization, series, args.chart_format, args.dpi)
+
+    sp.keras.backend.clear_session()
+    return timings
+
+def summarize(samples):
+    """p50/p95/min/max in milliseconds"""
+    values = np.asarray(samples) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'min_ms': round(float(values.min()), 3),
+        'max_ms': round(float(values.max()), 3),
+        'runs': len(values)
+    }
+
+def compare(stages, baseline, tolerance, noise_ms):
+    """Flag stages whose p50 grew by more than tolerance (and noise_ms) over the baseline"""
+    comparison = {}
+    regressions = []
+    for stage, summary in stages.items():
+        previous = baseline.get('stages', {}).get(stage)
+        if not previous:
+            continue
+        ratio = summary['p50_ms'] / previous['p50_ms'] if previous['p50_ms'] else None
+        regressed = (summary['p50_ms'] - previous['p50_ms'] > noise_ms and
+                     ratio is not None and ratio > 1 + tolerance)
+        comparison[stage] = {
+            'baseline_p50_ms': previous['p50_ms'],
+            'p50_ms': summary['p50_ms'],
+            'ratio': round(ratio, 3) if ratio is not None else None,
+            'regressed': regressed
+        }
+        if regressed:
+            regressions.append(stage)
+    return comparison, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each prediction pipeline stage offline")
+    parser.add_argument('--rows', type=int, default=504, help="Synthetic trading days of OHLCV (default: 504, about 2 years)")
+    parser.add_argument('--period', default='2y', help="Period passed to fetch_and_prepare_data (default: 2y)")
+    parser.add_argument('--ticker', default=TICKER, help=f"Ticker to run (default: {TICKER})")
+    parser.add_argument('--replay', metavar='DIR',
+                        help="Replay market data recorded with --market-data record instead of synthetic bars")
+    parser.add_argument('--replay-latency-ms', type=float, default=0.0,
+                        help="Delay added to every replayed call (default: 0)")
+    parser.add_argument('--lookback', type=int, default=None,
+                        help="Benchmark the sequence engine with windows of this many days (default: single-day model)")
+    parser.add_argument('--epochs', type=int, default=50, help="Training epochs (default: 50, as /predict)")
+    parser.add_argument('--repeats', type=int, default=5, help="Timed pipeline runs (default: 5)")
+    parser.add_argument('--warmup', type=int, default=1, help="Untimed runs first, to pay for lazy imports (default: 1)")
+    parser.add_argument('--finbert', choices=('stub', 'cached'), default='stub',
+                        help="Stubbed model, or the real one from the local Hugging Face cache (default: stub)")
+    parser.add_argument('--finbert-backend', choices=sp.FINBERT_BACKENDS, default='fp32',
+                        help="Backend for --finbert cached (default: fp32)")
+    parser.add_argument('--warm-sentiment-cache', action='store_true',
+                        help="Keep sentiment cache hits between runs instead of scoring every time")
+    parser.add_argument('--chart-format', choices=tuple(sp.CHART_FORMATS), default='png')
+    parser.add_argument('--dpi', type=int, default=sp.CHART_DPI)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Write this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed p50 slowdown against the baseline (default: 0.25 = 25%%)")
+    parser.add_argument('--noise-ms', type=float, default=5.0,
+                        help="Ignore slowdowns smaller than this many milliseconds (default: 5)")
+    parser.add_argument('--output', help="Also write the report to this file")
+    args = parser.parse_args()
+
+    with open(NEWS_FIXTURE) as f:
+        news_fixture = json.load(f)
+    if args.replay:
+        sp.market_data = sp.ReplayProvider(args.replay, args.replay_latency_ms)
+    else:
+        sp.yf = fake_yfinance(synthetic_history(args.rows), news_fixture)
+    setup_finbert(args.finbert, args.finbert_backend)
+
+    samples = {stage: [] for stage in STAGES}
+    try:
+        # The stages print progress; keep stdout for the JSON report
+        with contextlib.redirect_stdout(io.StringIO()):
+            for run in range(args.warmup + args.repeats):
+                timings = run_pipeline(args)
+                if run >= args.warmup:
+                    for stage, seconds in timings.items():
+                        samples[stage].append(seconds)
+    finally:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    stages = {stage: summarize(samples[stage]) for stage in STAGES}
+    report = {
+        'config': {
+            'rows': args.rows,
+            'ticker': args.ticker,
+            'replay': args.replay,
+            'lookback': args.lookback,
+            'epochs': args.epochs,
+            'repeats': args.repeats,
+            'warmup': args.warmup,
+            'finbert': args.finbert if args.finbert == 'stub' else args.finbert_backend,
+            'news_articles': len(news_fixture),
+            'chart': f'{args.chart_format}@{args.dpi}',
+            'python': sys.version.split()[0],
+            'platform': sys.platform
+        },
+        'stages': stages,
+        'total_p50_ms': round(sum(summary['p50_ms'] for summary in stages.values()), 3),
+        'peak_rss_mb': round(peak_rss_mb(), 1) if resource is not None else None
+    }
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        comparison, regressions = compare(stages, baseline, args.tolerance, args.noise_ms)
+        report['baseline'] = {
+            'path': args.baseline,
+            'config': baseline.get('config'),
+            'peak_rss_mb': baseline.get('peak_rss_mb'),
+            'stages': comparison,
+            'regressions': regressions
+        }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            f.write(output + '\n')
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the Stock Price Prediction Dashboard
+Starts stock_predictor.py as a subprocess and measures time-to-first-byte
+on /status and the time until every component reports ready
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, 'stock_predictor.py')
+
+def free_port():
+    """Ask the OS for an unused local port"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def get_status(port):
+    """Fetch /status, returning the parsed JSON or None if the server isn't answering yet"""
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/status', timeout=1) as response:
+            return json.loads(response.read())
+    except Exception:
+        return None
+
+def run_once(timeout):
+    """Start the app once; return seconds to first /status byte and to all components ready"""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, APP, '--host', '127.0.0.1', '--port', str(port), '--no-browser'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    first_byte = ready = None
+    components = None
+    try:
+        while time.perf_counter() - started < timeout:
+            status = get_status(port)
+            if status is not None:
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                components = status.get('components')
+                states = [component['status'] for component in (components or {}).values()]
+                if states and all(state in ('ready', 'error') for state in states):
+                    ready = time.perf_counter() - started
+                    break
+            time.sleep(0.05)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return {'time_to_first_byte': first_byte, 'time_to_ready': ready, 'components': components}
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure dashboard startup time")
+    parser.add_argument('--runs', type=int, default=3, help="Number of cold starts (default: 3)")
+    parser.add_argument('--timeout', type=float, default=300, help="Seconds to wait per run (default: 300)")
+    args = parser.parse_args()
+    
+    runs = [run_once(args.timeout) for _ in range(args.runs)]
+    ttfb = [run['time_to_first_byte'] for run in runs if run['time_to_first_byte'] is not None]
+    ready = [run['time_to_ready'] for run in runs if run['time_to_ready'] is not None]
+    
+    print(json.dumps({
+        'runs': runs,
+        'time_to_first_byte_median': statistics.median(ttfb) if ttfb else None,
+        'time_to_ready_median': statistics.median(ready) if ready else None
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tuning benchmark
+Runs the hyperparameter search over a small grid for a synthetic watchlist, once
+in a single process and once in the process pool, then again to check that the
+saved trials are reused. Counts upstream price downloads and extrapolates how
+many tickers one night of tuning covers at the measured trial rate
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+from pipeline_benchmark import CACHE_DIR, sp, synthetic_history
+
+class WatchlistProvider(sp.MarketDataProvider):
+    """Serves a different synthetic random walk per ticker, counting history calls"""
+    name = 'watchlist'
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def frame(self, ticker):
+        return synthetic_history(self.rows, seed=sum(map(ord, ticker)))
+
+    def history(self, ticker, period=None, start=None):
+        with self.lock:
+            self.calls += 1
+        return self.frame(ticker)
+
+    def bulk_history(self, tickers, period='2y', start=None):
+        with self.lock:
+            self.calls += 1
+        return {ticker: self.frame(ticker) for ticker in tickers}
+
+def run(tickers, trials, processes):
+    """Wall seconds and the search records of one tuning run"""
+    started = time.perf_counter()
+    records = list(sp.tune_tickers(tickers, trials, processes, hours=0))
+    return time.perf_counter() - started, records
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the hyperparameter search serially and in the process pool")
+    parser.add_argument('--tickers', type=int, default=4, help="Synthetic watchlist size (default: 4)")
+    parser.add_argument('--trials', type=int, default=6, help="Configurations per ticker (default: 6)")
+    parser.add_argument('--processes', type=int, default=sp.TUNING_PROCESSES,
+                        help=f"Pool size for the parallel run (default: {sp.TUNING_PROCESSES})")
+    parser.add_argument('--folds', type=int, default=2, help="Walk-forward folds (default: 2)")
+    parser.add_argument('--production-trials', type=int, default=sp.TUNING_TRIALS,
+                        help=f"Trials per ticker assumed for the overnight estimate (default: {sp.TUNING_TRIALS})")
+    args = parser.parse_args()
+
+    # A small grid so the benchmark takes minutes; the folds and fold length are the real ones
+    sp.TUNING_GRID = {'period': ['1y', '2y'], 'epochs': [5, 10], 'units': [[16, 8], [64, 32]],
+                      'learning_rate': [1e-3, 3e-3]}
+    sp.DEFAULT_TUNING_CONFIG = {'period': '2y', 'epochs': 10, 'units': [64, 32], 'learning_rate': 1e-3}
+    sp.TUNING_FOLDS = args.folds
+    provider = WatchlistProvider(6 * 252)
+    sp.market_data = provider
+    tickers = [f'TUNE{i}' for i in range(args.tickers)]
+    report = {'config': {'tickers': args.tickers, 'trials': args.trials, 'folds': args.folds,
+                         'fold_days': sp.TUNING_FOLD_DAYS, 'processes': args.processes,
+                         'cpu_count': os.cpu_count()}}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for label, processes in (('serial', 1), ('pool', args.processes)):
+                shutil.rmtree(sp.tuning_store.root, ignore_errors=True)
+                provider.calls = 0
+                seconds, records = run(tickers, args.trials, processes)
+                report[label] = {'processes': processes, 'wall_seconds': round(seconds, 2),
+                                 'trials_per_minute': round(args.tickers * args.trials / seconds * 60, 1),
+                                 'upstream_calls': provider.calls,
+                                 'tuned': sum(record['status'] == 'success' for record in records)}
+            # Same bars again: every trial comes from the saved searches
+            provider.calls = 0
+            seconds, records = run(tickers, args.trials, args.processes)
+            report['resumed'] = {'wall_seconds': round(seconds, 2), 'upstream_calls': provider.calls,
+                                 'tuned': sum(record['status'] == 'success' for record in records)}
+            report['best'] = {ticker: sp.tuning_store.best(ticker) for ticker in tickers}
+            report['errors'] = [record for record in records if record['status'] != 'success']
+    finally:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    report['speedup'] = round(report['serial']['wall_seconds'] / report['pool']['wall_seconds'], 2)
+    # Trials here train far fewer epochs than the real grid, so this is an upper bound
+    per_night = report['pool']['trials_per_minute'] * 60 * sp.TUNING_HOURS / args.production_trials
+    report['tickers_per_night_upper_bound'] = int(per_night)
+    print(json.dumps(report, indent=2))
+    failed = (report['errors'] or report['resumed']['wall_seconds'] > report['pool']['wall_seconds'] / 2 or
+              any(report[label]['tuned'] != args.tickers for label in ('serial', 'pool', 'resumed')) or
+              report['pool']['upstream_calls'] > 1 or None in report['best'].values())
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
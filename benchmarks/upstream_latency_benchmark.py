@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Upstream latency benchmark
+Runs the prediction pipeline against a local fake Yahoo Finance with injected
+latency and a slow stubbed FinBERT, comparing the stage graph used by /predict
+with the same stages run one after another, and checking that a hung upstream
+call falls back after its timeout
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import statistics
+import sys
+import time
+
+from pipeline_benchmark import (CACHE_DIR, NEWS_FIXTURE, StubFinBERT, StubTokenizer, sp,
+                                synthetic_history)
+
+class FakeUpstream:
+    """Stand-in for the yfinance module whose calls sleep like network requests"""
+
+    def __init__(self, history, news, latency):
+        self.history_frame = history
+        self.news = news
+        self.latency = dict(latency)
+        self.calls = []
+
+    def delay(self, call):
+        self.calls.append(call)
+        time.sleep(self.latency[call])
+
+    def Ticker(self, ticker, session=None):
+        upstream = self
+
+        class Ticker:
+            @property
+            def info(self):
+                upstream.delay('info')
+                return {'longName': f'{ticker} Latency Corp', 'sector': 'Technology'}
+
+            @property
+            def news(self):
+                upstream.delay('news')
+                return upstream.news
+
+            def history(self, period=None, start=None, **kwargs):
+                upstream.delay('history')
+                return upstream.history_frame.copy()
+
+        return Ticker()
+
+class SlowFinBERT(StubFinBERT):
+    """Stub FinBERT that takes a fixed time per forward pass"""
+
+    def __init__(self, seconds):
+        super().__init__()
+        self.seconds = seconds
+
+    def __call__(self, *args, **kwargs):
+        time.sleep(self.seconds)
+        return super().__call__(*args, **kwargs)
+
+def reset_caches():
+    """Make every run fetch and score again"""
+    sp.sentiment_cache.memory.clear()
+    if sp.sentiment_cache.db is not None:
+        sp.sentiment_cache.db.execute('DELETE FROM sentiment')
+    with sp.news_snapshots_lock:
+        sp.news_snapshots.clear()
+
+def sequential_pipeline(ticker):
+    """The stages before training, one after another (how /predict used to run them)"""
+    company_name, _ = sp.get_company_info(ticker)
+    news = sp.fetch_yahoo_finance_news(ticker, company_name)
+    sentiment, _ = sp.calculate_news_sentiment(news)
+    return sp.fetch_and_prepare_data(ticker, '2y', sentiment)
+
+def graph_pipeline(ticker):
+    """The same stages through the stage graph used by /predict"""
+    results = sp.run_stage_graph({
+        'prices': sp.PipelineStage(lambda: sp.price_store.get_history(ticker, '2y'), io=True),
+        'snapshot': sp.PipelineStage(lambda: sp.get_news_snapshot(ticker, refresh=True)),
+        'data': sp.PipelineStage(lambda prices, snapshot: sp.fetch_and_prepare_data(
+            ticker, '2y', snapshot['overall_sentiment']), after=('prices', 'snapshot'))
+    })
+    return results['data']
+
+def timed_runs(func, prefix, repeats):
+    """Seconds per run; each run uses a new ticker so the price store has to download"""
+    samples = []
+    for run in range(repeats):
+        reset_caches()
+        started = time.perf_counter()
+        func(f'{prefix}{run}')
+        samples.append(time.perf_counter() - started)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sequential and concurrent upstream fetching")
+    parser.add_argument('--info-latency', type=float, default=0.3, help="Seconds per company info call (default: 0.3)")
+    parser.add_argument('--news-latency', type=float, default=0.3, help="Seconds per news call (default: 0.3)")
+    parser.add_argument('--history-latency', type=float, default=0.5, help="Seconds per price history call (default: 0.5)")
+    parser.add_argument('--finbert-latency', type=float, default=0.2, help="Seconds per FinBERT batch (default: 0.2)")
+    parser.add_argument('--repeats', type=int, default=3, help="Timed runs per variant (default: 3)")
+    parser.add_argument('--timeout', type=float, default=1.0,
+                        help="UPSTREAM_TIMEOUT for the hung-news check (default: 1.0)")
+    parser.add_argument('--min-speedup', type=float, default=1.3,
+                        help="Fail unless the graph is at least this much faster (default: 1.3)")
+    args = parser.parse_args()
+
+    with open(NEWS_FIXTURE) as f:
+        news = json.load(f)
+    upstream = FakeUpstream(synthetic_history(504), news, {
+        'info': args.info_latency, 'news': args.news_latency, 'history': args.history_latency
+    })
+    sp.yf = upstream
+    sp.finbert_tokenizer, sp.finbert_model = StubTokenizer(), SlowFinBERT(args.finbert_latency)
+    sp.finbert_backend = 'stub'
+    sp.set_component_status('finbert', 'ready')
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Pay for lazy imports before timing
+            sequential_pipeline('WARM')
+            sequential = timed_runs(sequential_pipeline, 'SEQ', args.repeats)
+            concurrent = timed_runs(graph_pipeline, 'DAG', args.repeats)
+
+            # A news call that hangs past the timeout must not hold up the pipeline
+            upstream.latency['news'] = args.timeout * 5
+            sp.UPSTREAM_TIMEOUT = args.timeout
+            reset_caches()
+            started = time.perf_counter()
+            snapshot = sp.get_news_snapshot('HUNG', refresh=True)
+            hung_seconds = time.perf_counter() - started
+            # Let the abandoned call finish before stdout is restored
+            sp.upstream_executor.shutdown(wait=True)
+    finally:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    latency = upstream.latency
+    sequential_median = statistics.median(sequential)
+    concurrent_median = statistics.median(concurrent)
+    speedup = sequential_median / concurrent_median
+    hung_ok = hung_seconds < args.timeout * 2 and snapshot['news'] == []
+    report = {
+        'latency_seconds': {'info': args.info_latency, 'news': args.news_latency,
+                            'history': args.history_latency, 'finbert_batch': args.finbert_latency},
+        'expected_sequential_seconds': args.info_latency + args.news_latency + args.history_latency + args.finbert_latency,
+        'expected_critical_path_seconds': max(args.info_latency, args.news_latency + args.finbert_latency,
+                                              args.history_latency),
+        'sequential_seconds': sequential,
+        'concurrent_seconds': concurrent,
+        'sequential_median': sequential_median,
+        'concurrent_median': concurrent_median,
+        'speedup': speedup,
+        'hung_news': {'timeout': args.timeout, 'news_latency': latency['news'],
+                      'seconds': hung_seconds, 'fell_back': snapshot['news'] == [], 'passed': hung_ok}
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if speedup >= args.min_speedup and hung_ok else 1)
+
+if __name__ == "__main__":
+    main()
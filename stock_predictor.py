@@ -10,30 +10,46 @@ import sys
 import webbrowser
 import threading
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
-import base64
 import io
+import argparse
+import hashlib
+import importlib
+import importlib.util
+import itertools
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import pickle
+import queue
+import random
+import sqlite3
+import uuid
+import weakref
+from collections import OrderedDict, deque
+from contextlib import ContextDecorator
 import warnings
 warnings.filterwarnings('ignore')
 
+# Heavy packages are imported lazily on first use (see LazyModule below); only
+# check that they are installed so a missing one still triggers auto-install
+HEAVY_MODULES = ('tensorflow', 'sklearn', 'matplotlib', 'transformers', 'torch')
+
 # Try to import required packages
 try:
     import numpy as np
     import pandas as pd
     import yfinance as yf
-    import tensorflow as tf
-    from tensorflow import keras
-    from sklearn.preprocessing import MinMaxScaler
-    import matplotlib.pyplot as plt
-    from flask import Flask, jsonify, request, render_template_string
+    from flask import Flask, Response, jsonify, redirect, request, render_template_string, stream_with_context
     from flask_cors import CORS
     import requests
     from bs4 import BeautifulSoup
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification
-    import torch
     import re
-    from urllib.parse import quote
+    from urllib.parse import quote, urlencode
+    for module_name in HEAVY_MODULES:
+        if importlib.util.find_spec(module_name) is None:
+            raise ImportError(f"No module named '{module_name}'")
     DEPENDENCIES_AVAILABLE = True
 except ImportError as e:
     print(f"Missing dependencies: {e}")
@@ -47,68 +63,1050 @@ except ImportError as e:
     import numpy as np
     import pandas as pd
     import yfinance as yf
-    import tensorflow as tf
-    from tensorflow import keras
-    from sklearn.preprocessing import MinMaxScaler
-    import matplotlib.pyplot as plt
-    from flask import Flask, jsonify, request, render_template_string
+    from flask import Flask, Response, jsonify, redirect, request, render_template_string, stream_with_context
     from flask_cors import CORS
     import requests
     from bs4 import BeautifulSoup
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification
-    import torch
     import re
-    from urllib.parse import quote
+    from urllib.parse import quote, urlencode
     DEPENDENCIES_AVAILABLE = True
 
+# Component readiness (reported by /status)
+COMPONENT_WAIT_SECONDS = 20        # How long a request waits for a loading component before failing
+JOB_COMPONENT_WAIT_SECONDS = 300   # How long a queued prediction waits for a loading component
+component_status = {
+    name: {'status': 'not_loaded', 'seconds': None, 'error': None}
+    for name in ('finbert', 'tensorflow', 'matplotlib')
+}
+component_events = {name: threading.Event() for name in component_status}
+
+class ComponentNotReady(Exception):
+    """Raised when a request needs a component that is still loading"""
+
+def set_component_status(name, status, seconds=None, error=None):
+    """Record a component's load state and wake anything waiting on it"""
+    component_status[name] = {'status': status, 'seconds': seconds, 'error': error}
+    if status == 'loading':
+        component_events[name].clear()
+    else:
+        component_events[name].set()
+
+def wait_for_component(name, timeout=COMPONENT_WAIT_SECONDS):
+    """Wait while a component is loading; returns True if it is ready, False if unavailable"""
+    if component_status[name]['status'] == 'loading':
+        if not component_events[name].wait(timeout):
+            raise ComponentNotReady(f"{name} is still loading, please retry shortly")
+    return component_status[name]['status'] == 'ready'
+
+class LazyModule:
+    """Stand-in for a heavy module that is imported on first attribute access"""
+    
+    def __init__(self, loader, component=None):
+        self._loader = loader
+        self._component = component
+        self._module = None
+        self._lock = threading.Lock()
+    
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    started = time.time()
+                    if self._component and component_status[self._component]['status'] == 'not_loaded':
+                        set_component_status(self._component, 'loading')
+                    try:
+                        module = self._loader()
+                    except Exception as e:
+                        if self._component:
+                            set_component_status(self._component, 'error', error=str(e))
+                        raise
+                    if self._component and component_status[self._component]['status'] == 'loading':
+                        set_component_status(self._component, 'ready', seconds=time.time() - started)
+                    self._module = module
+        return self._module
+    
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+    
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+def _import_pyplot():
+    import matplotlib
+    matplotlib.use('Agg')  # Render off-screen; charts are drawn in worker threads
+    import matplotlib.pyplot as pyplot
+    return pyplot
+
+tf = LazyModule(lambda: importlib.import_module('tensorflow'), component='tensorflow')
+keras = LazyModule(lambda: tf.keras)
+torch = LazyModule(lambda: importlib.import_module('torch'))
+plt = LazyModule(_import_pyplot, component='matplotlib')
+MinMaxScaler = LazyModule(lambda: importlib.import_module('sklearn.preprocessing').MinMaxScaler)
+
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)
 
-# Global variables
-latest_results = {
-    'status': 'ready',
-    'data': None,
-    'timestamp': None,
-    'error': None
+# Metrics settings (exported by /metrics)
+METRICS_PREFIX = 'stock_predictor'
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)  # Seconds
+SERVER_TIMING_HEADER = True   # Add a Server-Timing breakdown to every response
+
+class Metrics:
+    """Thread-safe counters, gauges and latency histograms rendered in Prometheus text format"""
+    
+    def __init__(self, prefix=METRICS_PREFIX, buckets=METRICS_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.collectors = []
+        self.help = {}
+        self.lock = threading.Lock()
+    
+    def describe(self, name, kind, text):
+        self.help[name] = (kind, text)
+    
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+    
+    def add(self, name, amount, **labels):
+        """Move a gauge up or down"""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = self.gauges.get(key, 0) + amount
+    
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram['buckets'][i] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+    
+    def collector(self, func):
+        """Register a function returning [(name, kind, labels, value)] read at scrape time"""
+        self.collectors.append(func)
+        return func
+    
+    def _format(self, name, labels, value):
+        escape = lambda val: str(val).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        label_text = ','.join(f'{key}="{escape(val)}"' for key, val in labels)
+        return f'{self.prefix}_{name}{{{label_text}}} {value}' if label_text else f'{self.prefix}_{name} {value}'
+    
+    def render(self):
+        """Prometheus text exposition of every metric"""
+        samples = {}
+        with self.lock:
+            for (name, labels), value in self.counters.items():
+                samples.setdefault((name, 'counter'), []).append(self._format(name, labels, value))
+            for (name, labels), value in self.gauges.items():
+                samples.setdefault((name, 'gauge'), []).append(self._format(name, labels, value))
+            for (name, labels), histogram in self.histograms.items():
+                lines = samples.setdefault((name, 'histogram'), [])
+                for bound, count in zip(self.buckets, histogram['buckets']):
+                    lines.append(self._format(f'{name}_bucket', labels + (('le', bound),), count))
+                lines.append(self._format(f'{name}_bucket', labels + (('le', '+Inf'),), histogram['count']))
+                lines.append(self._format(f'{name}_sum', labels, round(histogram['sum'], 6)))
+                lines.append(self._format(f'{name}_count', labels, histogram['count']))
+        for func in self.collectors:
+            try:
+                for name, kind, labels, value in func():
+                    samples.setdefault((name, kind), []).append(self._format(name, tuple(sorted(labels.items())), value))
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        
+        output = []
+        for (name, kind), lines in sorted(samples.items()):
+            text = self.help.get(name, (kind, name.replace('_', ' ')))[1]
+            output.append(f'# HELP {self.prefix}_{name} {text}')
+            output.append(f'# TYPE {self.prefix}_{name} {kind}')
+            output.extend(lines)
+        return '\n'.join(output) + '\n'
+
+metrics = Metrics()
+metrics.describe('stage_seconds', 'histogram', 'Time spent in each pipeline stage')
+metrics.describe('http_request_seconds', 'histogram', 'Request latency by endpoint')
+metrics.describe('http_requests_total', 'counter', 'Requests by endpoint, method and status')
+metrics.describe('stage_errors_total', 'counter', 'Pipeline stages that raised an exception')
+metrics.describe('upstream_errors_total', 'counter', 'Failed calls to Yahoo Finance')
+metrics.describe('cache_requests_total', 'counter', 'Cache lookups by cache and result')
+metrics.describe('upstream_timeouts_total', 'counter', 'Pipeline stages that exceeded their timeout')
+metrics.describe('history_requests_total', 'counter', 'Price history requests made by the pipeline')
+metrics.describe('history_downloads_total', 'counter', 'Upstream price history downloads after batching')
+metrics.describe('trainings_in_flight', 'gauge', 'Models being trained right now')
+metrics.describe('resident_memory_bytes', 'gauge', 'Resident set size of the server process')
+metrics.describe('jobs_queued', 'gauge', 'Prediction jobs waiting for a worker')
+metrics.describe('jobs_running', 'gauge', 'Prediction jobs being run')
+metrics.describe('result_store_entries', 'gauge', 'Predictions held in the result store')
+metrics.describe('result_store_bytes', 'gauge', 'Approximate size of the result store')
+metrics.describe('component_ready', 'gauge', 'Whether a lazily loaded component is ready (1) or not (0)')
+
+# Per-thread record of span durations, turned into a Server-Timing header or job timings
+span_timings = threading.local()
+
+def start_span_timings():
+    """Begin collecting span durations on this thread; returns the dict that fills up"""
+    span_timings.current = OrderedDict()
+    return span_timings.current
+
+def stop_span_timings():
+    timings = getattr(span_timings, 'current', None)
+    span_timings.current = None
+    return timings or OrderedDict()
+
+class span(ContextDecorator):
+    """Time a block or function as a pipeline stage.
+    
+    Durations go to the stage_seconds histogram and to the current thread's span
+    timings; exceptions are counted in stage_errors_total and re-raised.
+    """
+    
+    def __init__(self, name):
+        self.name = name
+        self.started = None
+    
+    def _recreate_cm(self):
+        # A fresh timer per decorated call, so recursive and concurrent calls don't share state
+        return span(self.name)
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.started
+        metrics.observe('stage_seconds', seconds, stage=self.name)
+        if exc_type is not None:
+            metrics.inc('stage_errors_total', stage=self.name)
+        timings = getattr(span_timings, 'current', None)
+        if timings is not None:
+            timings[self.name] = timings.get(self.name, 0.0) + seconds
+        return False
+
+def server_timing_header(timings, total=None):
+    """Format span timings as a Server-Timing header value (milliseconds)"""
+    parts = [f'{name.replace(" ", "_")};dur={seconds * 1000:.1f}' for name, seconds in timings.items()]
+    if total is not None:
+        parts.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(parts)
+
+def resident_memory_bytes():
+    """Current RSS from /proc where available, otherwise the peak from getrusage"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return None
+
+@metrics.collector
+def process_metrics():
+    rss = resident_memory_bytes()
+    return [('resident_memory_bytes', 'gauge', {}, rss)] if rss is not None else []
+
+@app.before_request
+def begin_request_timing():
+    request.environ['stock_predictor.started'] = time.perf_counter()
+    start_span_timings()
+
+@app.after_request
+def record_request_timing(response):
+    started = request.environ.get('stock_predictor.started')
+    timings = stop_span_timings()
+    if started is None:
+        return response
+    seconds = time.perf_counter() - started
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.observe('http_request_seconds', seconds, endpoint=endpoint, method=request.method)
+    metrics.inc('http_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+    if SERVER_TIMING_HEADER and 'Server-Timing' not in response.headers:
+        response.headers['Server-Timing'] = server_timing_header(timings, seconds)
+    return response
+
+# Prediction result store settings
+RESULT_STORE_ENTRIES = 256                  # Predictions kept for /status and /graph
+RESULT_STORE_MAX_BYTES = 64 * 1024 * 1024   # Memory cap for results and rendered graphs
+
+# Shared news-and-sentiment snapshots (reused by /news and /predict)
+NEWS_SNAPSHOT_TTL = 300  # Seconds before a ticker's news is fetched and scored again
+news_snapshots = {}
+news_snapshot_locks = {}
+news_snapshots_lock = threading.Lock()
+
+# Prediction job queue settings
+JOB_WORKERS = 2        # Predictions that run at the same time
+JOB_QUEUE_DEPTH = 16   # Waiting predictions before new ones are rejected
+JOB_HISTORY = 200      # Finished jobs kept for status polling
+SSE_HEARTBEAT_SECONDS = 2   # Keep-alive comment interval on event streams; also how fast a disconnect is noticed
+SSE_DISCONNECT_GRACE_SECONDS = 30  # How long a /predict/stream job survives with no stream attached
+JOB_TERMINAL_EVENTS = ('result', 'error', 'cancelled')
+
+# Watchlist batch prediction settings
+BATCH_PROCESSES = max(1, (os.cpu_count() or 2) // 2)  # Training processes for /predict/batch
+BATCH_TF_THREADS = 1       # TensorFlow intra/inter-op threads per training process
+BATCH_NEWS_THREADS = 8     # Concurrent news/sentiment fetches for a batch
+BATCH_MAX_TICKERS = 500
+
+# Hyperparameter tuning settings (python stock_predictor.py --tune TICKERS)
+TUNING_GRID = {
+    'period': ['1y', '2y', '5y'],
+    'epochs': [25, 50, 100],
+    'units': [[32, 16], [64, 32], [128, 64]],
+    'learning_rate': [3e-4, 1e-3, 3e-3]
 }
+DEFAULT_TUNING_CONFIG = {'period': '2y', 'epochs': 50, 'units': [64, 32], 'learning_rate': 1e-3}  # Untuned /predict
+TUNING_TRIALS = 24           # Configurations scored per ticker, sampled from the grid (0: the whole grid)
+TUNING_FOLDS = 4             # Walk-forward validation folds
+TUNING_FOLD_DAYS = 21        # Trading days each fold is validated on
+TUNING_HISTORY_PERIOD = '6y' # One download per ticker covering the longest period plus the folds
+TUNING_PROCESSES = os.cpu_count() or 1
+TUNING_HOURS = 8.0           # Stop starting new trials after this long; the next run resumes
+TUNING_MAX_AGE_DAYS = 30     # Older tuned configurations are ignored by /predict
+TUNING_SEED = 42
+
+# Chart delivery settings
+CHART_DPI = 100               # Default render resolution
+CHART_MAX_DPI = 300
+CHART_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+CHART_HISTORY_DAYS = 100      # Closing prices shown before the prediction
+
+# Upstream (Yahoo Finance) request settings
+UPSTREAM_WORKERS = 8          # Shared executor threads for concurrent upstream calls
+UPSTREAM_TIMEOUT = 20         # Seconds a pipeline waits for one upstream call
+UPSTREAM_POOL_SIZE = 16       # Pooled HTTP connections kept open to Yahoo
+upstream_executor = ThreadPoolExecutor(max_workers=UPSTREAM_WORKERS, thread_name_prefix='upstream')
+http_session = None
+http_session_lock = threading.Lock()
+
+# Market data provider: 'yfinance' (live), 'replay' (recorded responses from MARKET_DATA_DIR)
+# or 'record' (live, saving every response into MARKET_DATA_DIR for later replay)
+MARKET_DATA_PROVIDERS = ('yfinance', 'replay', 'record')
+MARKET_DATA = os.environ.get('MARKET_DATA', 'yfinance')
+MARKET_DATA_DIR = os.environ.get('MARKET_DATA_DIR', 'market_data')
+MARKET_DATA_LATENCY_MS = float(os.environ.get('MARKET_DATA_LATENCY_MS', 0))  # Injected delay per replayed call
+
+# History request batching
+HISTORY_BATCH_WINDOW = 0.05   # Seconds a request made while others are in flight waits to share a download; 0 disables
+HISTORY_BATCH_MAX = 50        # Tickers per shared download
+
+# Local cache directory (sentiment scores, price history, trained models)
+CACHE_DIR = os.environ.get('STOCK_PREDICTOR_CACHE',
+                           os.path.join(os.path.expanduser('~'), '.stock_predictor'))
+
+# Sentiment cache settings
+SENTIMENT_CACHE_MEMORY_ENTRIES = 2048   # In-memory LRU tier
+SENTIMENT_CACHE_MAX_ENTRIES = 100000    # On-disk tier size limit
+SENTIMENT_CACHE_MAX_AGE_DAYS = 30       # On-disk tier age limit
+
+# News archive settings (time-varying sentiment feature)
+NEWS_ARCHIVE_MAX_AGE_DAYS = 800   # Archived articles kept; covers the 2y training window
+SENTIMENT_ASOF_DAYS = 3           # A day's news sentiment carries forward to bars this many days later
+
+# Local price history store settings
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+PRICE_STORE_REFRESH_SECONDS = 900     # Serve stored bars without asking upstream for this long
+PRICE_STORE_FULL_REFRESH_DAYS = 7     # Re-download the full window to pick up split/dividend adjustments
+
+# Prediction engines: 'keras' (neural network on the latest day), 'fast' (closed-form NumPy
+# ridge regression), 'sequence' (1-D convolutional network over a window of past days) or
+# 'ensemble' (several keras-engine networks packed into one model and trained together)
+MODEL_ENGINES = ('keras', 'fast', 'sequence', 'ensemble')
+MODEL_ENGINE = os.environ.get('MODEL_ENGINE', 'keras')  # Default when a request doesn't pick one
+FAST_RIDGE_ALPHA = 1e-4    # L2 penalty for the fast engine
+SEQUENCE_LOOKBACK = 30     # Trading days each sequence-engine window covers
+MAX_SEQUENCE_LOOKBACK = 250
+ENSEMBLE_MEMBERS = 5       # Independently initialized networks in the ensemble engine
+
+# Training budget settings (bounded /predict latency)
+PREDICTION_BUDGET_SECONDS = 60      # Default wall-clock budget for one prediction run
+MAX_PREDICTION_BUDGET_SECONDS = 600
+TRAINING_RESERVE_SECONDS = 2        # Kept back from the budget for prediction and storing the result
+EARLY_STOPPING_PATIENCE = 5         # Epochs without a validation loss improvement before training stops
+MIN_TRAINING_EPOCHS = 5             # A plan that can't fit this many epochs in the budget is skipped
+REDUCED_BATCH_SIZE = 128            # Cheaper plan: 4x fewer steps per epoch than the standard 32
+training_speed = {}                 # (variant, batch size) -> measured seconds per row per epoch
+training_speed_lock = threading.Lock()
+
+# Model registry settings (warm-start retraining)
+FEATURE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Sentiment', 'Tomorrow']
+FINETUNE_EPOCHS = 3                # Epochs used to fine-tune a saved model on newly arrived bars
+MODEL_MAX_NEW_ROWS = 20            # More new bars than this triggers a full retrain
+MODEL_DRIFT_THRESHOLD = 0.1        # Allowed move outside the saved scaler range, as a fraction of that range
+MODEL_MAX_AGE_DAYS = 30            # Full retrain at least this often
+MODEL_MEMORY_ENTRIES = 8           # Loaded models kept in memory
+
+# Multi-horizon forecasting settings
+PREDICTION_HORIZONS = (1, 5, 20)   # Trading days ahead, all forecast by one multi-output model
+MAX_PREDICTION_HORIZON = 60
+trading_day = None                 # NYSE-calendar day offset, built on first use
+US_INDEX_TICKERS = {'^GSPC', '^DJI', '^IXIC', '^NDX', '^RUT', '^VIX'}  # Indices that follow the NYSE calendar
 
 # Initialize FinBERT for sentiment analysis
+FINBERT_MODEL_ID = "ProsusAI/finbert"
+FINBERT_BATCH_SIZE = 16  # Max articles per FinBERT forward pass
+# Inference backend: 'fp32' (PyTorch as downloaded), 'int8' (dynamically quantized linear layers),
+# 'torchscript' or 'int8-torchscript' (traced module cached on disk)
+FINBERT_BACKENDS = ('fp32', 'int8', 'torchscript', 'int8-torchscript')
+FINBERT_BACKEND = os.environ.get('FINBERT_BACKEND', 'fp32')
+FINBERT_THREADS = int(os.environ.get('FINBERT_THREADS', 0)) or None  # torch.set_num_threads; None keeps the default
+finbert_backend = None
 finbert_tokenizer = None
 finbert_model = None
 
-def initialize_finbert():
+class TracedFinBERT:
+    """TorchScript FinBERT module called the same way as the transformers model"""
+    
+    def __init__(self, module):
+        self.module = module
+    
+    def __call__(self, input_ids, attention_mask, token_type_ids):
+        return TracedFinBERTOutput(self.module(input_ids, attention_mask, token_type_ids)[0])
+
+class TracedFinBERTOutput:
+    def __init__(self, logits):
+        self.logits = logits
+
+def load_finbert(backend='fp32'):
+    """Load the FinBERT tokenizer and a model for the given inference backend"""
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    import transformers
+    
+    if backend not in FINBERT_BACKENDS:
+        raise ValueError(f"Unknown FinBERT backend {backend}, expected one of {', '.join(FINBERT_BACKENDS)}")
+    
+    tokenizer = AutoTokenizer.from_pretrained(FINBERT_MODEL_ID)
+    
+    if backend.endswith('torchscript'):
+        # Traced modules are cached per model, backend and library versions
+        export_name = f"{quote(FINBERT_MODEL_ID, safe='')}-{backend}-torch{torch.__version__}-transformers{transformers.__version__}.pt"
+        export_path = os.path.join(CACHE_DIR, 'finbert', export_name)
+        if os.path.exists(export_path):
+            print(f"Loading cached TorchScript FinBERT from {export_path}")
+            return tokenizer, TracedFinBERT(torch.jit.load(export_path))
+    
+    model = AutoModelForSequenceClassification.from_pretrained(FINBERT_MODEL_ID)
+    model.eval()
+    
+    if backend.startswith('int8'):
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    
+    if backend.endswith('torchscript'):
+        example = tokenizer(["Shares rose after earnings beat estimates"], return_tensors="pt", padding=True)
+        model.config.return_dict = False  # Tracing needs tuple outputs
+        with torch.no_grad():
+            traced = torch.jit.trace(model, (example['input_ids'], example['attention_mask'], example['token_type_ids']),
+                                     check_trace=False)
+        traced = torch.jit.freeze(traced) if not backend.startswith('int8') else traced
+        os.makedirs(os.path.dirname(export_path), exist_ok=True)
+        torch.jit.save(traced, export_path + '.tmp')
+        os.replace(export_path + '.tmp', export_path)
+        print(f"Saved TorchScript FinBERT to {export_path}")
+        return tokenizer, TracedFinBERT(traced)
+    
+    return tokenizer, model
+
+def initialize_finbert(backend=None):
     """Initialize FinBERT model for financial sentiment analysis"""
-    global finbert_tokenizer, finbert_model
+    global finbert_tokenizer, finbert_model, finbert_backend
+    backend = backend or FINBERT_BACKEND
+    started = time.time()
+    set_component_status('finbert', 'loading')
     try:
-        print("Loading FinBERT model for sentiment analysis...")
-        finbert_tokenizer = AutoTokenizer.from_pretrained("ProsusAI/finbert")
-        finbert_model = AutoModelForSequenceClassification.from_pretrained("ProsusAI/finbert")
+        print(f"Loading FinBERT model for sentiment analysis ({backend} backend)...")
+        if FINBERT_THREADS:
+            torch.set_num_threads(FINBERT_THREADS)
+        tokenizer, model = load_finbert(backend)
+        finbert_tokenizer, finbert_model, finbert_backend = tokenizer, model, backend
+        
+        # Dummy pass so the first real request doesn't pay for lazy initialization
+        score_texts_finbert(["Stock market warm-up"])
+        
+        set_component_status('finbert', 'ready', seconds=time.time() - started)
         print("FinBERT model loaded successfully!")
         return True
     except Exception as e:
+        set_component_status('finbert', 'error', seconds=time.time() - started, error=str(e))
         print(f"Failed to load FinBERT: {e}")
         return False
 
+def warm_up_tensorflow():
+    """Import TensorFlow and run one tiny fit/predict so graph setup is done before the first request"""
+    started = time.time()
+    set_component_status('tensorflow', 'loading')
+    try:
+        model = keras.Sequential([keras.layers.Dense(1, input_shape=(len(FEATURE_COLUMNS) - 1,))])
+        model.compile(optimizer='adam', loss='mean_squared_error')
+        dummy = np.zeros((4, len(FEATURE_COLUMNS) - 1), dtype=np.float32)
+        model.fit(dummy, np.zeros(4), epochs=1, verbose=0)
+        predict_rows(model, dummy)
+        set_component_status('tensorflow', 'ready', seconds=time.time() - started)
+        print(f"TensorFlow ready ({time.time() - started:.1f}s)")
+    except Exception as e:
+        set_component_status('tensorflow', 'error', seconds=time.time() - started, error=str(e))
+        print(f"TensorFlow warm-up failed: {e}")
+
+def warm_up_components():
+    """Load FinBERT, TensorFlow and matplotlib in the background after the server starts"""
+    finbert_ready = initialize_finbert()
+    if finbert_ready:
+        print("✅ FinBERT sentiment analysis ready")
+    else:
+        print("⚠️ FinBERT not available, using neutral sentiment")
+    
+    warm_up_tensorflow()
+    
+    try:
+        plt.figure
+    except Exception as e:
+        print(f"matplotlib failed to load: {e}")
+
+class SentimentCache:
+    """Two-tier FinBERT score cache: in-memory LRU in front of an on-disk SQLite table.
+    
+    Entries are keyed by a hash of the cleaned text plus the model id, so the same
+    headline is scored once no matter how many tickers it appears under. The SQLite
+    file is only created and opened on first use, so importing the module touches no disk.
+    """
+    
+    def __init__(self, path, memory_entries=SENTIMENT_CACHE_MEMORY_ENTRIES,
+                 max_entries=SENTIMENT_CACHE_MAX_ENTRIES, max_age_days=SENTIMENT_CACHE_MAX_AGE_DAYS):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self.writes_since_eviction = 0
+        self.db = None
+        self.opened = False
+    
+    def _open(self):
+        """Open (creating if needed) the disk tier on first use; call with the lock held"""
+        if self.opened:
+            return
+        self.opened = True
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.db = sqlite3.connect(self.path, check_same_thread=False)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS sentiment ('
+                'key TEXT PRIMARY KEY, score REAL NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)'
+            )
+            self.db.execute('CREATE INDEX IF NOT EXISTS sentiment_last_used ON sentiment (last_used)')
+            self.db.commit()
+            self._evict()
+        except sqlite3.Error as e:
+            print(f"Sentiment cache disk tier unavailable, using memory only: {e}")
+            self.db = None
+    
+    @staticmethod
+    def make_key(cleaned_text, model_id):
+        """Content address for a cleaned text scored by a given model"""
+        return hashlib.sha256(f"{model_id}\n{cleaned_text}".encode('utf-8')).hexdigest()
+    
+    def get_many(self, keys):
+        """Return {key: score} for every cached key, promoting disk hits to memory.
+        
+        Hits and misses are both counted once per distinct key.
+        """
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        with self.lock:
+            missing = []
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+                    self.counters['memory_hits'] += 1
+                else:
+                    missing.append(key)
+            
+            if missing:
+                self._open()
+            if missing and self.db is not None:
+                now = time.time()
+                try:
+                    placeholders = ','.join('?' * len(missing))
+                    rows = self.db.execute(
+                        f'SELECT key, score FROM sentiment WHERE key IN ({placeholders}) AND created >= ?',
+                        (*missing, now - self.max_age)
+                    ).fetchall()
+                    self.db.executemany('UPDATE sentiment SET last_used = ? WHERE key = ?',
+                                        [(now, key) for key, _ in rows])
+                    self.db.commit()
+                except sqlite3.Error as e:
+                    print(f"Sentiment cache read error: {e}")
+                    rows = []
+                for key, score in rows:
+                    found[key] = score
+                    self._remember(key, score)
+                self.counters['disk_hits'] += len(rows)
+            
+            self.counters['misses'] += len(keys) - len(found)
+        return found
+    
+    def put_many(self, scores):
+        """Store {key: score} in both tiers"""
+        if not scores:
+            return
+        with self.lock:
+            for key, score in scores.items():
+                self._remember(key, score)
+            
+            self._open()
+            if self.db is not None:
+                now = time.time()
+                try:
+                    self.db.executemany(
+                        'INSERT OR REPLACE INTO sentiment (key, score, created, last_used) VALUES (?, ?, ?, ?)',
+                        [(key, float(score), now, now) for key, score in scores.items()]
+                    )
+                    self.db.commit()
+                except sqlite3.Error as e:
+                    print(f"Sentiment cache write error: {e}")
+                self.writes_since_eviction += len(scores)
+        
+        if self.writes_since_eviction >= 1000:
+            self.evict()
+    
+    def _remember(self, key, score):
+        """Insert into the memory tier, dropping the least recently used entry when full"""
+        self.memory[key] = score
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+    
+    def evict(self):
+        """Drop disk entries older than the age limit, then the least recently used beyond the size limit"""
+        with self.lock:
+            self._evict()
+    
+    def _evict(self):
+        if self.db is None:
+            return
+        try:
+            removed = self.db.execute('DELETE FROM sentiment WHERE created < ?',
+                                      (time.time() - self.max_age,)).rowcount
+            removed += self.db.execute(
+                'DELETE FROM sentiment WHERE key IN ('
+                'SELECT key FROM sentiment ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            ).rowcount
+            self.db.commit()
+            self.counters['evictions'] += max(removed, 0)
+        except sqlite3.Error as e:
+            print(f"Sentiment cache eviction error: {e}")
+        self.writes_since_eviction = 0
+    
+    def stats(self):
+        """Hit/miss counters and tier sizes for /status"""
+        with self.lock:
+            stats = dict(self.counters)
+            stats['memory_entries'] = len(self.memory)
+            if self.db is not None:
+                try:
+                    stats['disk_entries'] = self.db.execute('SELECT COUNT(*) FROM sentiment').fetchone()[0]
+                except sqlite3.Error:
+                    stats['disk_entries'] = None
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+sentiment_cache = SentimentCache(os.path.join(CACHE_DIR, 'sentiment_cache.sqlite3'))
+
+@metrics.collector
+def sentiment_cache_metrics():
+    with sentiment_cache.lock:
+        counters = dict(sentiment_cache.counters)
+    return [('cache_requests_total', 'counter', {'cache': 'sentiment', 'result': result}, counters[key])
+            for result, key in (('memory_hit', 'memory_hits'), ('disk_hit', 'disk_hits'), ('miss', 'misses'))]
+
+class UpstreamTimeout(TimeoutError):
+    """Raised when a pipeline stage without a fallback exceeds its timeout"""
+
+class PipelineStage:
+    """One node of a stage graph: func is called with the results of its dependencies.
+    
+    I/O stages run on the shared upstream executor with a timeout (UPSTREAM_TIMEOUT
+    unless given, 0 for none) and an optional fallback result; the others run on the
+    thread that runs the graph.
+    """
+    NO_FALLBACK = object()
+    
+    def __init__(self, func, after=(), io=False, timeout=None, fallback=NO_FALLBACK):
+        self.func = func
+        self.after = tuple(after)
+        self.io = io
+        self.timeout = UPSTREAM_TIMEOUT if timeout is None else timeout
+        self.fallback = fallback
+
+def run_stage_graph(stages):
+    """Run {name: PipelineStage}, starting every stage as soon as its dependencies finish.
+    
+    I/O stages are submitted first so they overlap with CPU stages on this thread.
+    Returns {name: result}; a failing stage's exception propagates.
+    """
+    results = {}
+    pending = dict(stages)
+    running = {}
+    # Span timings of submitted stages go to this thread's record (e.g. the job's)
+    timings = getattr(span_timings, 'current', None)
+    
+    def call(func, args):
+        span_timings.current = timings
+        try:
+            return func(*args)
+        finally:
+            span_timings.current = None
+    
+    def ready():
+        return [name for name, stage in pending.items() if all(dep in results for dep in stage.after)]
+    
+    while pending or running:
+        for name in ready():
+            stage = pending[name]
+            if stage.io:
+                del pending[name]
+                future = upstream_executor.submit(call, stage.func, [results[dep] for dep in stage.after])
+                running[future] = (name, stage, time.monotonic() + stage.timeout if stage.timeout else None)
+        
+        inline = ready()
+        if inline:
+            stage = pending.pop(inline[0])
+            results[inline[0]] = stage.func(*[results[dep] for dep in stage.after])
+            continue
+        if not running:
+            raise ValueError(f"Stage graph cannot finish: {', '.join(pending)} wait on missing stages")
+        
+        deadlines = [deadline for _, _, deadline in running.values() if deadline is not None]
+        timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+        done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            name, stage, _ = running.pop(future)
+            results[name] = future.result()
+        
+        now = time.monotonic()
+        for future, (name, stage, deadline) in list(running.items()):
+            if deadline is not None and now >= deadline and not future.done():
+                # The call keeps running in the background; the pipeline moves on without it
+                del running[future]
+                metrics.inc('upstream_timeouts_total', stage=name)
+                if stage.fallback is PipelineStage.NO_FALLBACK:
+                    raise UpstreamTimeout(f"Timed out after {stage.timeout}s waiting for {name}")
+                print(f"{name} timed out after {stage.timeout}s, continuing without it")
+                results[name] = stage.fallback
+    return results
+
+def get_http_session():
+    """Shared pooled HTTP session for Yahoo Finance requests"""
+    global http_session
+    
+    with http_session_lock:
+        if http_session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=UPSTREAM_POOL_SIZE,
+                                                    pool_maxsize=UPSTREAM_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            http_session = session
+        return http_session
+
+def yf_ticker(ticker):
+    """yfinance Ticker whose requests reuse pooled connections"""
+    # Releases with set_config already share one browser-impersonating session per process,
+    # and replacing it with a plain requests session gets rate limited
+    if hasattr(yf, 'set_config'):
+        return yf.Ticker(ticker)
+    return yf.Ticker(ticker, session=get_http_session())
+
+class MarketDataProvider:
+    """Source of daily price history, company info and news for a ticker"""
+    name = None
+    
+    def history(self, ticker, period=None, start=None):
+        """Daily OHLCV bars for a period ('2y') or from a start date"""
+        raise NotImplementedError
+    
+    def bulk_history(self, tickers, period='2y', start=None):
+        """{ticker: bars} for several tickers (tickers without data are left out)"""
+        frames = {}
+        for ticker in tickers:
+            frame = self.history(ticker, period=period, start=start)
+            if not frame.empty:
+                frames[ticker] = frame
+        return frames
+    
+    def info(self, ticker):
+        """Company info dict in Yahoo Finance's format (longName, sector, ...)"""
+        raise NotImplementedError
+    
+    def news(self, ticker):
+        """Raw news articles in Yahoo Finance's format"""
+        raise NotImplementedError
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance"""
+    name = 'yfinance'
+    
+    def history(self, ticker, period=None, start=None):
+        stock = yf_ticker(ticker)
+        if start is not None:
+            return stock.history(start=start, timeout=UPSTREAM_TIMEOUT)
+        return stock.history(period=period, timeout=UPSTREAM_TIMEOUT)
+    
+    def bulk_history(self, tickers, period='2y', start=None):
+        if start is not None:
+            period = None
+        data = yf.download(tickers, period=period, start=start, group_by='ticker', auto_adjust=True,
+                           threads=True, progress=False, timeout=UPSTREAM_TIMEOUT)
+        frames = {}
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                frame = data[ticker]
+            else:
+                frame = data
+            frame = frame.dropna(how='all')
+            if not frame.empty:
+                frames[ticker] = frame
+        return frames
+    
+    def info(self, ticker):
+        return yf_ticker(ticker).info
+    
+    def news(self, ticker):
+        return yf_ticker(ticker).news
+
+class ReplayProvider(MarketDataProvider):
+    """Recorded responses read from a directory, with optional injected latency.
+    
+    Each ticker has its own subdirectory holding history.parquet, history.csv or
+    history.json (bars indexed by local date), info.json, news.json and
+    recording.json (the exchange timezone and when it was recorded). Periods are
+    measured back from the last recorded bar, so a recording replays the same
+    window whenever it is used.
+    """
+    name = 'replay'
+    HISTORY_FORMATS = ('parquet', 'csv', 'json')
+    
+    def __init__(self, root, latency_ms=0.0):
+        self.root = root
+        self.latency = latency_ms / 1000
+        self.frames = {}
+        self.lock = threading.Lock()
+    
+    def path(self, ticker, name):
+        return os.path.join(self.root, quote(ticker, safe=''), name)
+    
+    def delay(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+    
+    def read_json(self, ticker, name):
+        try:
+            with open(self.path(ticker, name)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No recorded {name} for {ticker} in {self.root}") from None
+    
+    def load_history(self, ticker):
+        """Recorded bars for a ticker, parsed once and kept in memory"""
+        with self.lock:
+            if ticker in self.frames:
+                return self.frames[ticker]
+        
+        for fmt in self.HISTORY_FORMATS:
+            path = self.path(ticker, f'history.{fmt}')
+            if not os.path.exists(path):
+                continue
+            if fmt == 'parquet':
+                frame = pd.read_parquet(path)
+            elif fmt == 'csv':
+                frame = pd.read_csv(path, index_col=0)
+            else:
+                frame = pd.read_json(path, orient='split', convert_dates=False)
+            break
+        else:
+            return pd.DataFrame(columns=PRICE_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+        
+        index = pd.DatetimeIndex(pd.to_datetime(frame.index), name='Date')
+        if index.tz is None:
+            try:
+                tz = self.read_json(ticker, 'recording.json').get('timezone')
+            except FileNotFoundError:
+                tz = None
+            if tz:
+                index = index.tz_localize(tz, ambiguous='NaT', nonexistent='shift_forward')
+        frame.index = index
+        frame = frame.sort_index()
+        
+        with self.lock:
+            self.frames[ticker] = frame
+        return frame
+    
+    def slice_history(self, ticker, period=None, start=None):
+        frame = self.load_history(ticker)
+        if frame.empty:
+            return frame.copy()
+        if start is None and period is not None:
+            last = frame.index[-1]
+            start = period_start(period, now=last.tz_localize(None) if last.tz is not None else last)
+        if start is not None:
+            start = pd.Timestamp(start)
+            if frame.index.tz is not None and start.tz is None:
+                start = start.tz_localize(frame.index.tz)
+            frame = frame[frame.index >= start]
+        return frame.copy()
+    
+    def history(self, ticker, period=None, start=None):
+        self.delay()
+        return self.slice_history(ticker, period, start)
+    
+    def bulk_history(self, tickers, period='2y', start=None):
+        # One recorded request, so one delay
+        self.delay()
+        frames = {ticker: self.slice_history(ticker, period, start) for ticker in tickers}
+        return {ticker: frame for ticker, frame in frames.items() if not frame.empty}
+    
+    def info(self, ticker):
+        self.delay()
+        return self.read_json(ticker, 'info.json')
+    
+    def news(self, ticker):
+        self.delay()
+        return self.read_json(ticker, 'news.json')
+
+class RecordingProvider(MarketDataProvider):
+    """Passes calls to another provider and saves every response in ReplayProvider's layout"""
+    name = 'record'
+    
+    def __init__(self, upstream, root):
+        self.upstream = upstream
+        self.root = root
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+    
+    def _lock(self, ticker):
+        with self.locks_lock:
+            return self.locks.setdefault(ticker, threading.Lock())
+    
+    def path(self, ticker, name):
+        directory = os.path.join(self.root, quote(ticker, safe=''))
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, name)
+    
+    def write_json(self, ticker, name, data):
+        path = self.path(ticker, name)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(data, f, indent=2, default=str)
+        os.replace(path + '.tmp', path)
+    
+    def record_history(self, ticker, frame):
+        """Merge bars into the ticker's recorded history.csv (newer downloads win)"""
+        if frame.empty:
+            return
+        with self._lock(ticker):
+            tz = str(frame.index.tz) if frame.index.tz is not None else None
+            local = frame.copy()
+            if tz:
+                local.index = local.index.tz_localize(None)
+            local.index = pd.DatetimeIndex(local.index, name='Date')
+            
+            path = self.path(ticker, 'history.csv')
+            if os.path.exists(path):
+                stored = pd.read_csv(path, index_col=0)
+                stored.index = pd.DatetimeIndex(pd.to_datetime(stored.index), name='Date')
+                local = pd.concat([stored[~stored.index.isin(local.index)], local]).sort_index()
+            local.to_csv(path + '.tmp')
+            os.replace(path + '.tmp', path)
+            self.write_json(ticker, 'recording.json', {
+                'timezone': tz,
+                'recorded_at': datetime.now(timezone.utc).isoformat(),
+                'provider': self.upstream.name
+            })
+    
+    def history(self, ticker, period=None, start=None):
+        frame = self.upstream.history(ticker, period=period, start=start)
+        self.record_history(ticker, frame)
+        return frame
+    
+    def bulk_history(self, tickers, period='2y', start=None):
+        frames = self.upstream.bulk_history(tickers, period, start)
+        for ticker, frame in frames.items():
+            self.record_history(ticker, frame)
+        return frames
+    
+    def info(self, ticker):
+        info = self.upstream.info(ticker)
+        self.write_json(ticker, 'info.json', info)
+        return info
+    
+    def news(self, ticker):
+        news = self.upstream.news(ticker)
+        self.write_json(ticker, 'news.json', news)
+        return news
+
+def create_market_data_provider(kind=None, root=None, latency_ms=None):
+    """Build the market data provider selected by MARKET_DATA (or the arguments)"""
+    kind = kind or MARKET_DATA
+    root = root or MARKET_DATA_DIR
+    latency_ms = MARKET_DATA_LATENCY_MS if latency_ms is None else latency_ms
+    if kind == 'yfinance':
+        return YFinanceProvider()
+    if kind == 'replay':
+        if not os.path.isdir(root):
+            raise ValueError(f"Market data directory {root} does not exist")
+        return ReplayProvider(root, latency_ms)
+    if kind == 'record':
+        return RecordingProvider(YFinanceProvider(), root)
+    raise ValueError(f"Unknown market data provider {kind}, expected one of {', '.join(MARKET_DATA_PROVIDERS)}")
+
+market_data = None
+
+def get_market_data():
+    """The process-wide market data provider, created on first use"""
+    global market_data
+    
+    if market_data is None:
+        market_data = create_market_data_provider()
+    return market_data
+
+@span('company_info')
 def get_company_info(ticker):
     """Get company name and sector from ticker"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = get_market_data().info(ticker)
         company_name = info.get('longName', ticker)
         sector = info.get('sector', 'Technology')
         return company_name, sector
     except:
+        metrics.inc('upstream_errors_total', source='company_info')
         return ticker, 'Technology'
 
-def fetch_yahoo_finance_news(ticker, company_name, days=180):
-    """Fetch recent news from Yahoo Finance"""
+@span('news_fetch')
+def fetch_yahoo_finance_news(ticker, company_name=None, days=180):
+    """Fetch recent news from Yahoo Finance; news is looked up by ticker, the name is only logged"""
     try:
-        print(f"Fetching news for {ticker} ({company_name})...")
+        print(f"Fetching news for {ticker} ({company_name})..." if company_name else f"Fetching news for {ticker}...")
         
-        # Get news from yfinance
-        stock = yf.Ticker(ticker)
-        news_data = stock.news
+        # Get news from the market data provider (Yahoo Finance unless replaying)
+        news_data = get_market_data().news(ticker)
         
         print(f"Found {len(news_data)} total news articles")
         
@@ -139,10 +1137,12 @@ def fetch_yahoo_finance_news(ticker, company_name, days=180):
             
             # Format publication date
             pub_date_str = content.get('pubDate') or content.get('displayTime')
+            published_at = time.time()
             if pub_date_str:
                 try:
                     # Parse ISO format and convert to readable format
                     pub_date = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00'))
+                    published_at = pub_date.timestamp()
                     pub_date = pub_date.strftime('%Y-%m-%d %H:%M')
                 except:
                     pub_date = datetime.now().strftime('%Y-%m-%d %H:%M')
@@ -157,6 +1157,7 @@ def fetch_yahoo_finance_news(ticker, company_name, days=180):
                 'summary': summary,
                 'url': url,
                 'published': pub_date,
+                'timestamp': published_at,
                 'source': source
             })
             print(f"  ✓ Added: {title[:50]}...")
@@ -165,53 +1166,297 @@ def fetch_yahoo_finance_news(ticker, company_name, days=180):
         return recent_news
     except Exception as e:
         print(f"Error fetching news: {e}")
+        metrics.inc('upstream_errors_total', source='news')
         return []
 
-def analyze_sentiment_finbert(text):
-    """Analyze sentiment using FinBERT"""
+def clean_sentiment_text(text):
+    """Clean and truncate text before it is passed to FinBERT"""
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return text[:512]  # FinBERT max length
+
+def finbert_model_key():
+    """Identifier of the loaded FinBERT model, part of every sentiment cache key"""
+    # TorchScript gives the same scores as eager PyTorch, quantization does not
+    if finbert_backend and finbert_backend.startswith('int8'):
+        return f"{FINBERT_MODEL_ID}:int8"
+    return FINBERT_MODEL_ID
+
+@span('finbert_inference')
+def score_texts_finbert(cleaned, batch_size=FINBERT_BATCH_SIZE, tokenizer=None, model=None):
+    """Run FinBERT on cleaned texts with one tokenizer call and batched forward passes"""
+    tokenizer = tokenizer or finbert_tokenizer
+    model = model or finbert_model
+    
+    # Single tokenizer call, padded to the longest text in the list
+    inputs = tokenizer(cleaned, return_tensors="pt", truncation=True, padding=True, max_length=512)
+    
+    # Group similar lengths together so each batch is trimmed to its own longest text
+    lengths = inputs['attention_mask'].sum(dim=1)
+    order = torch.argsort(lengths, descending=True)
+    logits = None
+    
+    with torch.no_grad():
+        for start in range(0, len(cleaned), max(1, batch_size)):
+            idx = order[start:start + batch_size]
+            width = int(lengths[idx].max())
+            batch = {name: tensor[idx, :width] for name, tensor in inputs.items()}
+            batch_logits = model(**batch).logits.float()
+            if logits is None:
+                logits = torch.empty(len(cleaned), batch_logits.shape[-1])
+            logits[idx] = batch_logits
+    
+    predictions = torch.nn.functional.softmax(logits, dim=-1)
+    
+    # FinBERT classes: negative, neutral, positive
+    # Convert to sentiment score (-1 to 1)
+    sentiment_scores = predictions[:, 2] - predictions[:, 0]
+    
+    return sentiment_scores.tolist()
+
+def analyze_sentiment_batch(texts, batch_size=FINBERT_BATCH_SIZE):
+    """Analyze sentiment for many texts, scoring only those not already in the sentiment cache"""
     global finbert_tokenizer, finbert_model
     
+    if not texts:
+        return []
+    
     if finbert_tokenizer is None or finbert_model is None:
-        return 0.0  # Neutral if model not available
+        return [0.0] * len(texts)  # Neutral if model not available
     
     try:
-        # Clean and truncate text
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = text[:512]  # FinBERT max length
-        
-        inputs = finbert_tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
+        model_key = finbert_model_key()
+        cleaned = [clean_sentiment_text(text) for text in texts]
+        keys = [SentimentCache.make_key(text, model_key) for text in cleaned]
+        scores = sentiment_cache.get_many(keys)
         
-        with torch.no_grad():
-            outputs = finbert_model(**inputs)
-            predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            
-        # FinBERT classes: negative, neutral, positive
-        negative, neutral, positive = predictions[0].tolist()
+        # Score each distinct uncached text once
+        pending = {}
+        for key, text in zip(keys, cleaned):
+            if key not in scores:
+                pending.setdefault(key, text)
         
-        # Convert to sentiment score (-1 to 1)
-        sentiment_score = positive - negative
+        if pending:
+            fresh = dict(zip(pending, score_texts_finbert(list(pending.values()), batch_size)))
+            sentiment_cache.put_many(fresh)
+            scores.update(fresh)
         
-        return sentiment_score
+        return [scores[key] for key in keys]
     except Exception as e:
         print(f"Sentiment analysis error: {e}")
-        return 0.0
+        return [0.0] * len(texts)
+
+def analyze_sentiment_finbert(text):
+    """Analyze sentiment using FinBERT"""
+    return analyze_sentiment_batch([text])[0]
 
+@span('sentiment')
 def calculate_news_sentiment(news_list):
     """Calculate overall sentiment from news articles"""
     if not news_list:
         return 0.0, []
     
-    sentiments = []
-    for article in news_list:
-        # Combine title and summary for sentiment analysis
-        text = f"{article['title']} {article['summary']}"
-        sentiment = analyze_sentiment_finbert(text)
-        sentiments.append(sentiment)
+    # Combine title and summary for sentiment analysis
+    texts = [f"{article['title']} {article['summary']}" for article in news_list]
+    sentiments = analyze_sentiment_batch(texts)
+    for article, sentiment in zip(news_list, sentiments):
         article['sentiment'] = sentiment
     
     overall_sentiment = np.mean(sentiments) if sentiments else 0.0
     return overall_sentiment, news_list
 
+class NewsArchive:
+    """Per-ticker archive of scored news articles, indexed by publish time, in SQLite.
+    
+    Each article is stored once; a per-day sum and count of sentiment is updated only
+    for the days that new articles fall on, and becomes the model's sentiment feature.
+    """
+    
+    def __init__(self, path, max_age_days=NEWS_ARCHIVE_MAX_AGE_DAYS):
+        self.path = path
+        self.max_age = max_age_days * 86400
+        self.lock = threading.Lock()
+        self.db = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS articles ('
+                'ticker TEXT NOT NULL, key TEXT NOT NULL, published REAL NOT NULL, day TEXT NOT NULL, '
+                'title TEXT, url TEXT, source TEXT, sentiment REAL NOT NULL, archived REAL NOT NULL, '
+                'PRIMARY KEY (ticker, key))'
+            )
+            self.db.execute('CREATE INDEX IF NOT EXISTS articles_published ON articles (ticker, published)')
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS daily_sentiment ('
+                'ticker TEXT NOT NULL, day TEXT NOT NULL, total REAL NOT NULL, count INTEGER NOT NULL, '
+                'PRIMARY KEY (ticker, day))'
+            )
+            self.db.commit()
+            self.evict()
+        except sqlite3.Error as e:
+            print(f"News archive unavailable: {e}")
+            self.db = None
+    
+    @staticmethod
+    def make_key(article):
+        return hashlib.sha256(f"{article.get('url', '')}\n{article['title']}".encode('utf-8')).hexdigest()
+    
+    def add(self, ticker, articles):
+        """Archive scored articles; only days with newly seen articles have their aggregate updated"""
+        if self.db is None or not articles:
+            return 0
+        now = time.time()
+        added = 0
+        with self.lock:
+            try:
+                for article in articles:
+                    published = float(article.get('timestamp') or now)
+                    day = datetime.fromtimestamp(published, timezone.utc).strftime('%Y-%m-%d')
+                    cursor = self.db.execute(
+                        'INSERT OR IGNORE INTO articles '
+                        '(ticker, key, published, day, title, url, source, sentiment, archived) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (ticker, self.make_key(article), published, day, article['title'], article.get('url'),
+                         article.get('source'), float(article.get('sentiment', 0.0)), now)
+                    )
+                    if cursor.rowcount == 1:
+                        self.db.execute(
+                            'INSERT INTO daily_sentiment (ticker, day, total, count) VALUES (?, ?, ?, 1) '
+                            'ON CONFLICT (ticker, day) DO UPDATE SET '
+                            'total = total + excluded.total, count = count + 1',
+                            (ticker, day, float(article.get('sentiment', 0.0)))
+                        )
+                        added += 1
+                self.db.commit()
+            except sqlite3.Error as e:
+                print(f"News archive write error: {e}")
+                self.db.rollback()
+        return added
+    
+    def daily_sentiment(self, ticker):
+        """Mean article sentiment per publish day (UTC), as a date-indexed Series"""
+        if self.db is None:
+            return pd.Series(dtype=np.float64)
+        with self.lock:
+            try:
+                rows = self.db.execute(
+                    'SELECT day, total / count FROM daily_sentiment WHERE ticker = ? ORDER BY day', (ticker,)
+                ).fetchall()
+            except sqlite3.Error as e:
+                print(f"News archive read error: {e}")
+                rows = []
+        if not rows:
+            return pd.Series(dtype=np.float64)
+        days, values = zip(*rows)
+        return pd.Series(values, index=pd.to_datetime(list(days)).astype('datetime64[ns]'), dtype=np.float64)
+    
+    def sentiment_feature(self, ticker, index):
+        """Sentiment for each price bar: the latest day's mean on or before the bar, NaN if none is recent"""
+        daily = self.daily_sentiment(ticker)
+        if daily.empty:
+            return np.full(len(index), np.nan)
+        bar_days = index.tz_localize(None) if index.tz is not None else index
+        bars = pd.DataFrame({'day': bar_days.normalize().astype('datetime64[ns]')})
+        news = pd.DataFrame({'day': daily.index, 'sentiment': daily.values})
+        joined = pd.merge_asof(bars, news, on='day', direction='backward',
+                               tolerance=pd.Timedelta(days=SENTIMENT_ASOF_DAYS))
+        return joined['sentiment'].to_numpy(dtype=np.float64, copy=True)
+    
+    def evict(self):
+        """Drop articles and daily aggregates older than the age limit"""
+        if self.db is None:
+            return
+        cutoff = datetime.fromtimestamp(time.time() - self.max_age, timezone.utc).strftime('%Y-%m-%d')
+        with self.lock:
+            try:
+                self.db.execute('DELETE FROM articles WHERE day < ?', (cutoff,))
+                self.db.execute('DELETE FROM daily_sentiment WHERE day < ?', (cutoff,))
+                self.db.commit()
+            except sqlite3.Error as e:
+                print(f"News archive eviction error: {e}")
+    
+    def stats(self):
+        """Archive sizes for /status"""
+        if self.db is None:
+            return {'articles': None, 'days': None}
+        with self.lock:
+            try:
+                return {
+                    'articles': self.db.execute('SELECT COUNT(*) FROM articles').fetchone()[0],
+                    'days': self.db.execute('SELECT COUNT(*) FROM daily_sentiment').fetchone()[0]
+                }
+            except sqlite3.Error:
+                return {'articles': None, 'days': None}
+
+news_archive = NewsArchive(os.path.join(CACHE_DIR, 'news_archive.sqlite3'))
+
+@span('news_snapshot')
+def get_news_snapshot(ticker, refresh=False, wait_timeout=COMPONENT_WAIT_SECONDS):
+    """Get company info, news and sentiment for a ticker, reusing a recent snapshot unless refresh is set"""
+    requested_at = time.time()
+    
+    with news_snapshots_lock:
+        snapshot = news_snapshots.get(ticker)
+        build_lock = news_snapshot_locks.setdefault(ticker, threading.Lock())
+    
+    if snapshot and not refresh and requested_at - snapshot['created'] < NEWS_SNAPSHOT_TTL:
+        metrics.inc('cache_requests_total', cache='news_snapshot', result='hit')
+        return snapshot
+    
+    # One build per ticker at a time; concurrent callers wait and reuse its result
+    with build_lock:
+        snapshot = news_snapshots.get(ticker)
+        if snapshot:
+            if refresh and snapshot['created'] >= requested_at:
+                return snapshot
+            if not refresh and time.time() - snapshot['created'] < NEWS_SNAPSHOT_TTL:
+                metrics.inc('cache_requests_total', cache='news_snapshot', result='hit')
+                return snapshot
+        
+        metrics.inc('cache_requests_total', cache='news_snapshot', result='miss')
+        
+        def score_news(news_list):
+            wait_for_component('finbert', wait_timeout)
+            return calculate_news_sentiment(news_list)
+        
+        # Company info and news are fetched concurrently (news is looked up by ticker, so it
+        # doesn't wait for the company name); scoring starts as soon as the news arrives
+        results = run_stage_graph({
+            'company_info': PipelineStage(lambda: get_company_info(ticker), io=True,
+                                          fallback=(ticker, 'Technology')),
+            'news': PipelineStage(lambda: fetch_yahoo_finance_news(ticker), io=True, fallback=[]),
+            'sentiment': PipelineStage(score_news, after=('news',))
+        })
+        company_name, sector = results['company_info']
+        overall_sentiment, news_with_sentiment = results['sentiment']
+        if finbert_model is not None:
+            # Unscored (neutral placeholder) articles are left out so they don't flatten the history
+            news_archive.add(ticker, news_with_sentiment)
+        
+        snapshot = {
+            'ticker': ticker,
+            'company_name': company_name,
+            'sector': sector,
+            'news': news_with_sentiment,
+            'overall_sentiment': float(overall_sentiment),
+            'created': time.time()
+        }
+        
+        with news_snapshots_lock:
+            # Drop expired snapshots, and the build locks of tickers without one, so neither dict
+            # grows with every ticker ever requested. A lock being built under is held and kept;
+            # one dropped just before a waiter takes it only costs a duplicate build
+            now = time.time()
+            for key in [key for key, old in news_snapshots.items() if now - old['created'] >= NEWS_SNAPSHOT_TTL]:
+                del news_snapshots[key]
+            news_snapshots[ticker] = snapshot
+            for key in [key for key, lock in news_snapshot_locks.items()
+                        if key not in news_snapshots and not lock.locked()]:
+                del news_snapshot_locks[key]
+    
+    return snapshot
+
 # HTML Template (Embedded Frontend)
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -610,7 +1855,7 @@ HTML_TEMPLATE = """
                         <div class="form-group">
                             <label for="ticker"><i class="fas fa-search"></i> Stock Ticker Symbol</label>
                             <input type="text" id="ticker" placeholder="e.g., AAPL, TSLA, GOOGL, ^NSEI" value="AAPL" />
-                            <small style="color: #666; margin-top: 0.5rem;">Model will use 2 years of data with sentiment analysis (50 epochs)</small>
+                            <small style="color: #666; margin-top: 0.5rem;">Model will use 2 years of data with sentiment analysis (up to 50 epochs, stopping early once it converges)</small>
                         </div>
                     </div>
                     
@@ -663,6 +1908,10 @@ HTML_TEMPLATE = """
                         <div class="metric-label">Change Percentage</div>
                         <div class="metric-value" id="changePercent">-</div>
                     </div>
+                    <div class="result-card" id="horizonCard" style="display: none; grid-column: 1 / -1;">
+                        <div class="metric-label">Forecast Horizons (trading days)</div>
+                        <div id="horizonForecasts" style="font-size: 1.1rem;">-</div>
+                    </div>
                 </div>
 
                 <!-- Graph Container -->
@@ -720,45 +1969,23 @@ HTML_TEMPLATE = """
             try {
                 showMessage('Step 1: Fetching recent news and analyzing sentiment...', 'success');
                 
-                // First get news
-                const newsResponse = await fetch('/news', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({
-                        ticker: ticker
-                    })
-                });
-                
-                if (newsResponse.ok) {
-                    const newsData = await newsResponse.json();
-                    displayNews(newsData);
-                    showMessage('Step 2: Training AI model with sentiment analysis (this may take a few minutes)...', 'success');
-                }
-                
-                // Then run prediction
-                const response = await fetch('/predict', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({
-                        ticker: ticker
-                    })
-                });
-                
-                const data = await response.json();
+                // One stream carries every stage, the scored news as soon as it is ready, and the result
+                const params = new URLSearchParams({ ticker: ticker, horizons: 'true' });
+                const result = await streamPrediction(`/predict/stream?${params}`);
                 
-                if (response.ok) {
+                if (result.status === 'completed') {
                     showMessage('AI prediction completed successfully with sentiment analysis!', 'success');
-                    displayResults(data.data);
-                    loadGraph();
                     updateStatus('connected', 'Prediction completed');
+                    const training = result.data.training_mode === 'full'
+                        ? ` • Trained ${result.data.epochs_used}/${result.data.max_epochs} epochs in ${result.data.training_seconds.toFixed(1)}s`
+                        : '';
+                    const tuned = result.data.tuned_config
+                        ? ` • Tuned: ${result.data.training_period}, ${result.data.tuned_config.units.join('-')} units`
+                        : '';
                     document.getElementById('lastUpdated').innerHTML = 
-                        `<i class="fas fa-clock"></i> Last updated: ${new Date().toLocaleString()}`;
+                        `<i class="fas fa-clock"></i> Last updated: ${new Date().toLocaleString()}${training}${tuned}`;
                 } else {
-                    showMessage(`Error: ${data.error}`, 'error');
+                    showMessage(`Error: ${result.error || 'Prediction ' + result.status}`, 'error');
                     updateStatus('error', 'Prediction failed');
                 }
             } catch (error) {
@@ -770,6 +1997,74 @@ HTML_TEMPLATE = """
             }
         }
 
+        function streamPrediction(url) {
+            return new Promise(resolve => {
+                const data = event => JSON.parse(event.data);
+                let source = null;
+                let jobId = null;
+                let lastId = 0;
+                let retries = 0;
+                const finish = result => {
+                    source.close();
+                    resolve(result);
+                };
+                
+                const listen = url => {
+                    source = new EventSource(url);
+                    // Every event with an id moves the resume point forward
+                    const on = (name, handler) => source.addEventListener(name, event => {
+                        retries = 0;
+                        if (event.lastEventId) lastId = Number(event.lastEventId);
+                        handler(event);
+                    });
+                    
+                    on('job', event => { jobId = data(event).job_id; });
+                    on('stage', event => {
+                        updateStatus('loading', `Prediction running: ${data(event).stage}...`);
+                    });
+                    on('news', event => {
+                        displayNews(data(event));
+                        showMessage('Step 2: Training AI model with sentiment analysis (this may take a few minutes)...', 'success');
+                    });
+                    on('data', event => {
+                        const prepared = data(event);
+                        updateStatus('loading', `Prepared ${prepared.data_points} trading days up to ${prepared.last_date}...`);
+                    });
+                    on('epoch', event => {
+                        const epoch = data(event);
+                        const loss = epoch.loss === null ? '' : `, loss ${epoch.loss.toFixed(5)}`;
+                        updateStatus('loading', `Training epoch ${epoch.epoch}/${epoch.epochs}${loss}`);
+                    });
+                    on('chart', event => loadGraph(data(event).graph_url));
+                    on('result', event => {
+                        const result = data(event);
+                        displayResults(result);
+                        finish({ status: 'completed', data: result });
+                    });
+                    on('cancelled', () => finish({ status: 'cancelled' }));
+                    source.addEventListener('error', event => {
+                        // Server-sent error events carry data; connection failures don't
+                        if (event.data) {
+                            finish({ status: 'failed', error: data(event).error });
+                            return;
+                        }
+                        // Reconnecting to /predict/stream would queue a second job, so follow this
+                        // one where it left off; the server keeps it running for a grace period
+                        source.close();
+                        if (jobId === null || retries >= 5) {
+                            resolve({ status: 'failed', error: 'Lost connection to the prediction stream' });
+                            return;
+                        }
+                        retries += 1;
+                        updateStatus('loading', 'Connection lost, reconnecting...');
+                        setTimeout(() => listen(`/jobs/${jobId}/events?after=${lastId}`), 1000 * retries);
+                    });
+                };
+                
+                listen(url);
+            });
+        }
+
         function displayResults(data) {
             document.getElementById('resultsGrid').style.display = 'grid';
             
@@ -794,7 +2089,8 @@ HTML_TEMPLATE = """
             document.getElementById('lastDate').textContent = data.last_date;
             document.getElementById('lastPrice').textContent = `$${data.last_price.toFixed(2)}`;
             document.getElementById('predictedDate').textContent = data.predicted_date;
-            document.getElementById('predictedPrice').textContent = `$${data.predicted_price.toFixed(2)}`;
+            document.getElementById('predictedPrice').textContent = `$${data.predicted_price.toFixed(2)}` +
+                (data.prediction_spread != null ? ` ± ${data.prediction_spread.toFixed(2)}` : '');
             
             const changeElement = document.getElementById('expectedChange');
             const changePercentElement = document.getElementById('changePercent');
@@ -806,6 +2102,18 @@ HTML_TEMPLATE = """
             const changeClass = data.change >= 0 ? 'change-positive' : 'change-negative';
             changeElement.className = `metric-value ${changeClass}`;
             changePercentElement.className = `metric-value ${changeClass}`;
+            
+            const horizonCard = document.getElementById('horizonCard');
+            if (data.horizons && data.horizons.length) {
+                document.getElementById('horizonForecasts').innerHTML = data.horizons.map(h =>
+                    `<span class="${h.change >= 0 ? 'change-positive' : 'change-negative'}" style="margin-right: 1.5rem;">` +
+                    `+${h.days}d (${h.date}): $${h.price.toFixed(2)} ` +
+                    `(${h.change_percent > 0 ? '+' : ''}${h.change_percent.toFixed(2)}%)</span>`
+                ).join('');
+                horizonCard.style.display = 'block';
+            } else {
+                horizonCard.style.display = 'none';
+            }
         }
 
         function displayNews(newsData) {
@@ -849,17 +2157,13 @@ HTML_TEMPLATE = """
             container.innerHTML = newsHtml;
         }
 
-        async function loadGraph() {
-            try {
-                const response = await fetch('/graph');
-                if (response.ok) {
-                    const data = await response.json();
-                    document.getElementById('graphImage').src = data.image;
-                    document.getElementById('graphContainer').style.display = 'block';
-                }
-            } catch (error) {
-                console.error('Failed to load graph:', error);
-            }
+        function loadGraph(graphUrl) {
+            const image = document.getElementById('graphImage');
+            image.onload = () => {
+                document.getElementById('graphContainer').style.display = 'block';
+            };
+            image.onerror = () => console.error('Failed to load graph:', graphUrl);
+            image.src = graphUrl;
         }
 
         function updateStatus(status, message) {
@@ -897,293 +2201,2392 @@ HTML_TEMPLATE = """
 </html>
 """
 
-def fetch_and_prepare_data(ticker, period='2y', sentiment_score=0.0):
-    """Fetch stock data and prepare for training with sentiment analysis"""
-    print(f"Fetching {ticker} data for {period} period...")
+def period_start(period, now=None):
+    """Convert a Yahoo Finance period string ('2y', '6mo', '5d', 'ytd', 'max') to a start date"""
+    now = pd.Timestamp(now or datetime.now()).normalize()
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return now.replace(month=1, day=1)
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    offsets = {
+        'd': pd.DateOffset(days=count),
+        'wk': pd.DateOffset(weeks=count),
+        'mo': pd.DateOffset(months=count),
+        'y': pd.DateOffset(years=count)
+    }
+    return now - offsets[unit]
+
+def local_dates(stamps):
+    """Drop the timezone from a DatetimeIndex or Timestamp, keeping the exchange-local wall-clock time"""
+    return stamps.tz_localize(None) if stamps.tz is not None else stamps
+
+def local_bars(frame):
+    """Bars indexed by exchange-local dates without a timezone, whichever upstream call returned them"""
+    return frame.set_axis(local_dates(frame.index)) if isinstance(frame.index, pd.DatetimeIndex) else frame
+
+class HistoryBatcher:
+    """Coalesces period history requests made while others are in flight into one multi-ticker download.
     
-    stock = yf.Ticker(ticker)
-    data = stock.history(period=period)
+    A request that finds nothing in flight is downloaded right away. Otherwise the first
+    request for a period waits up to `window` seconds (or until `max_size` tickers have
+    joined), then downloads every ticker collected so far in one call and hands each
+    waiter its own frame; requests for a ticker already in the batch share its result.
+    Incremental requests (with a start date) always go out on their own.
+    """
     
-    if data.empty:
-        raise ValueError(f"No data found for ticker {ticker}")
+    def __init__(self, window=HISTORY_BATCH_WINDOW, max_size=HISTORY_BATCH_MAX):
+        self.window = window
+        self.max_size = max_size
+        self.pending = {}
+        self.active = 0  # Batches waiting or downloading
+        self.lock = threading.Lock()
     
-    # Remove dividends and stock splits if they exist
-    if 'Dividends' in data.columns:
-        del data['Dividends']
-    if 'Stock Splits' in data.columns:
-        del data['Stock Splits']
+    def history(self, ticker, period=None, start=None):
+        metrics.inc('history_requests_total')
+        if self.window <= 0 or start is not None:
+            metrics.inc('history_downloads_total')
+            return local_bars(get_market_data().history(ticker, period=period, start=start))
+        
+        with self.lock:
+            batch = self.pending.get(period)
+            leader = batch is None
+            if leader:
+                batch = {'futures': OrderedDict(), 'full': threading.Event()}
+                # With nothing in flight there's no one to wait for; later requests start a batch
+                wait = self.active > 0
+                if wait:
+                    self.pending[period] = batch
+                self.active += 1
+            future = batch['futures'].get(ticker)
+            if future is None:
+                future = batch['futures'][ticker] = Future()
+            if len(batch['futures']) >= self.max_size and self.pending.get(period) is batch:
+                # Later requests start a new batch
+                del self.pending[period]
+                batch['full'].set()
+        
+        if leader:
+            try:
+                if wait:
+                    batch['full'].wait(self.window)
+                    with self.lock:
+                        if self.pending.get(period) is batch:
+                            del self.pending[period]
+                self._download(batch['futures'], period)
+            finally:
+                with self.lock:
+                    self.active -= 1
+        return future.result()
     
-    # Add sentiment score as a feature (broadcast to all rows)
-    data['Sentiment'] = sentiment_score
+    def _download(self, futures, period):
+        """One upstream call for every ticker in the batch; never raises"""
+        tickers = list(futures)
+        metrics.inc('history_downloads_total')
+        try:
+            if len(tickers) == 1:
+                frames = {tickers[0]: get_market_data().history(tickers[0], period=period)}
+            else:
+                print(f"Downloading history for {len(tickers)} tickers in one request...")
+                frames = get_market_data().bulk_history(tickers, period)
+        except Exception as e:
+            for future in futures.values():
+                future.set_exception(e)
+            return
+        for ticker, future in futures.items():
+            frame = frames.get(ticker)
+            # Single-ticker and bulk downloads disagree on timezones, so every waiter gets the same form
+            future.set_result(local_bars(frame.copy()) if frame is not None else pd.DataFrame(columns=PRICE_COLUMNS))
+
+history_batcher = HistoryBatcher()
+
+@span('price_download')
+def download_history(ticker, period=None, start=None):
+    """Download daily OHLCV bars, sharing one upstream request with other tickers asked for at the same time"""
+    return history_batcher.history(ticker, period=period, start=start)
+
+@span('price_bulk_download')
+def bulk_download_history(tickers, period='2y'):
+    """Download daily OHLCV bars for several tickers in one request; returns {ticker: frame}"""
+    metrics.inc('history_requests_total', len(tickers))
+    metrics.inc('history_downloads_total')
+    return {ticker: local_bars(frame) for ticker, frame in get_market_data().bulk_history(tickers, period).items()}
+
+class PriceStore:
+    """Local per-ticker OHLCV store.
     
-    data['Tomorrow'] = data['Close'].shift(-1)
-    data.dropna(inplace=True)
+    Bars live in an append-only float64 file (one row of Open/High/Low/Close/Volume
+    per day) next to an int64 file of bar dates. Both are memory-mapped on read, and
+    only bars newer than the last stored date are downloaded on refresh. float64 keeps
+    share volumes exact (float32 rounds anything above 2^24, a normal large-cap day).
     
-    last_date = data.index[-1]
-    scaler = MinMaxScaler()
+    Bar dates are always exchange-local dates without a timezone: Ticker.history()
+    returns timezone-aware bars and yf.download() naive ones, and both write here.
+    """
     
-    # Include sentiment in the features
-    feature_columns = ['Open', 'High', 'Low', 'Close', 'Volume', 'Sentiment', 'Tomorrow']
-    data_scaled = scaler.fit_transform(data[feature_columns].values)
-    X = data_scaled[:, :-1]  # All features except 'Tomorrow'
-    y = data_scaled[:, -1]   # 'Tomorrow' prices
+    def __init__(self, root):
+        self.root = root
+        self.locks = {}
+        self.locks_lock = threading.Lock()
     
-    return data, X, y, scaler, last_date
+    def _paths(self, ticker):
+        name = quote(ticker, safe='')
+        base = os.path.join(self.root, name)
+        return base + '.bars.f64', base + '.dates.i8', base + '.meta.json'
+    
+    def _lock(self, ticker):
+        with self.locks_lock:
+            return self.locks.setdefault(ticker, threading.Lock())
+    
+    def _read_meta(self, ticker):
+        meta_path = self._paths(ticker)[2]
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _write_meta(self, ticker, meta):
+        meta_path = self._paths(ticker)[2]
+        tmp_path = meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+    
+    def _load(self, ticker):
+        """Memory-map the stored dates and bars (returns empty arrays if nothing is stored)"""
+        bars_path, dates_path, _ = self._paths(ticker)
+        try:
+            rows = min(os.path.getsize(dates_path) // 8,
+                       os.path.getsize(bars_path) // (8 * len(PRICE_COLUMNS)))
+        except OSError:
+            rows = 0
+        if rows == 0:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(PRICE_COLUMNS)), dtype=np.float64)
+        dates = np.memmap(dates_path, dtype=np.int64, mode='r', shape=(rows,))
+        bars = np.memmap(bars_path, dtype=np.float64, mode='r', shape=(rows, len(PRICE_COLUMNS)))
+        return dates, bars
+    
+    @staticmethod
+    def _encode(frame):
+        """Split a history frame into int64 bar dates (tz-naive ns) and float64 OHLCV rows"""
+        dates = local_dates(frame.index).normalize().as_unit('ns').asi8.astype(np.int64)
+        bars = np.ascontiguousarray(frame[PRICE_COLUMNS].to_numpy(dtype=np.float64))
+        return dates, bars
+    
+    def _replace(self, ticker, frame):
+        """Rewrite the stored history for a ticker"""
+        bars_path, dates_path, _ = self._paths(ticker)
+        dates, bars = self._encode(frame)
+        for path, array in ((bars_path, bars), (dates_path, dates)):
+            with open(path + '.tmp', 'wb') as f:
+                array.tofile(f)
+            os.replace(path + '.tmp', path)
+        # Stores written before bars were float64; without a bars file they are downloaded again
+        legacy_path = bars_path[:-len('.f64')] + '.f32'
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+    
+    def _append(self, ticker, frame, stored_dates):
+        """Append bars newer than the last stored date, replacing the (possibly partial) last bar"""
+        bars_path, dates_path, _ = self._paths(ticker)
+        dates, bars = self._encode(frame)
+        rows = len(stored_dates)
+        last_date = stored_dates[-1]
+        keep = dates >= last_date
+        dates, bars = dates[keep], bars[keep]
+        if len(dates) == 0:
+            return 0
+        if dates[0] == last_date:
+            rows -= 1
+        for path, width in ((bars_path, 8 * len(PRICE_COLUMNS)), (dates_path, 8)):
+            os.truncate(path, rows * width)
+        with open(bars_path, 'ab') as f:
+            bars.tofile(f)
+        with open(dates_path, 'ab') as f:
+            dates.tofile(f)
+        return len(dates)
+    
+    @staticmethod
+    def _covered(meta, dates, start_ns, now):
+        """True if the stored bars cover the window and are recent enough to be updated incrementally"""
+        return (
+            meta is not None and len(dates) > 0 and
+            (meta['coverage_start'] is None or (start_ns is not None and meta['coverage_start'] <= start_ns)) and
+            now - meta['full_at'] < PRICE_STORE_FULL_REFRESH_DAYS * 86400
+        )
+    
+    def is_current(self, ticker, period='2y'):
+        """True if get_history would be served without any download"""
+        start = period_start(period)
+        with self._lock(ticker):
+            meta = self._read_meta(ticker)
+            dates, _ = self._load(ticker)
+            now = time.time()
+            return (self._covered(meta, dates, start.value if start is not None else None, now) and
+                    now - meta['checked_at'] < PRICE_STORE_REFRESH_SECONDS)
+    
+    def store_history(self, ticker, frame, period='2y'):
+        """Replace the stored bars with a freshly downloaded full window"""
+        start = period_start(period)
+        with self._lock(ticker):
+            self._store_full(ticker, frame, start.value if start is not None else None, time.time())
+    
+    def _store_full(self, ticker, frame, start_ns, now):
+        os.makedirs(self.root, exist_ok=True)
+        self._replace(ticker, frame)
+        meta = {
+            'coverage_start': start_ns,
+            'full_at': now,
+            'checked_at': now
+        }
+        self._write_meta(ticker, meta)
+        return meta
+    
+    def get_history(self, ticker, period='2y'):
+        """Return the requested window of daily bars, downloading only what the store is missing"""
+        start = period_start(period)
+        start_ns = start.value if start is not None else None
+        
+        with self._lock(ticker):
+            os.makedirs(self.root, exist_ok=True)
+            meta = self._read_meta(ticker)
+            dates, _ = self._load(ticker)
+            now = time.time()
+            covered = self._covered(meta, dates, start_ns, now)
+            fresh = covered and now - meta['checked_at'] < PRICE_STORE_REFRESH_SECONDS
+            metrics.inc('cache_requests_total', cache='price_store', result='hit' if fresh else 'miss')
+            
+            try:
+                if not covered:
+                    print(f"Downloading full {period} history for {ticker}...")
+                    frame = download_history(ticker, period=period)
+                    if not frame.empty:
+                        meta = self._store_full(ticker, frame, start_ns, now)
+                elif now - meta['checked_at'] >= PRICE_STORE_REFRESH_SECONDS:
+                    last_date = pd.Timestamp(int(dates[-1]))
+                    frame = download_history(ticker, start=last_date.strftime('%Y-%m-%d'))
+                    if not frame.empty:
+                        appended = self._append(ticker, frame, dates)
+                        print(f"Updated {ticker} price store with {appended} bar(s) since {last_date.date()}")
+                    meta['checked_at'] = now
+                    self._write_meta(ticker, meta)
+            except Exception as e:
+                metrics.inc('upstream_errors_total', source='prices')
+                if meta is None or len(dates) == 0:
+                    raise
+                print(f"Price download failed for {ticker}, serving stored history: {e}")
+                # Back off so a failing upstream isn't retried on every request
+                meta['checked_at'] = now
+                self._write_meta(ticker, meta)
+            
+            dates, bars = self._load(ticker)
+        
+        first = int(np.searchsorted(dates, start_ns)) if start_ns is not None else 0
+        index = pd.DatetimeIndex(np.asarray(dates[first:]).view('datetime64[ns]'), name='Date')
+        return pd.DataFrame(np.asarray(bars[first:], dtype=np.float64), index=index, columns=PRICE_COLUMNS)
+
+price_store = PriceStore(os.path.join(CACHE_DIR, 'prices'))
 
-def create_and_train_model(X, y, epochs=35):
-    """Create and train the neural network model"""
+def is_us_listing(ticker):
+    """Whether a ticker trades on a US exchange: no exchange suffix, or a US index"""
+    if ticker.startswith('^'):
+        return ticker.upper() in US_INDEX_TICKERS
+    return '.' not in ticker
+
+def get_trading_day(ticker=None):
+    """Business-day offset for a ticker's exchange.
+    
+    US listings (and no ticker) skip NYSE/Nasdaq holidays; other exchanges'
+    holidays aren't known here, so they fall back to plain weekdays.
+    """
+    global trading_day
+    
+    if ticker is not None and not is_us_listing(ticker):
+        return pd.offsets.BDay()
+    if trading_day is None:
+        from pandas.tseries.holiday import (AbstractHolidayCalendar, Holiday, GoodFriday, USLaborDay,
+                                            USMartinLutherKingJr, USMemorialDay, USPresidentsDay,
+                                            USThanksgivingDay, nearest_workday, sunday_to_monday)
+        
+        class TradingCalendar(AbstractHolidayCalendar):
+            rules = [
+                Holiday('New Years Day', month=1, day=1, observance=sunday_to_monday),
+                USMartinLutherKingJr,
+                USPresidentsDay,
+                GoodFriday,
+                USMemorialDay,
+                Holiday('Juneteenth', month=6, day=19, start_date='2022-01-01', observance=nearest_workday),
+                Holiday('Independence Day', month=7, day=4, observance=nearest_workday),
+                USLaborDay,
+                USThanksgivingDay,
+                Holiday('Christmas', month=12, day=25, observance=nearest_workday)
+            ]
+        
+        trading_day = pd.offsets.CustomBusinessDay(calendar=TradingCalendar())
+    return trading_day
+
+def trading_dates(last_date, horizons, ticker=None):
+    """Dates that are each horizon's number of trading days after last_date on ticker's exchange"""
+    offset = get_trading_day(ticker)
+    dates = pd.date_range(start=last_date + offset, periods=max(horizons), freq=offset)
+    return [dates[horizon - 1] for horizon in horizons]
+
+def parse_horizons(value):
+    """Validate a request's horizons: true for the defaults, or a list of trading-day counts"""
+    if value is True:
+        return list(PREDICTION_HORIZONS)
+    if not value:
+        return None
+    if not isinstance(value, list) or not all(isinstance(h, int) and not isinstance(h, bool) for h in value):
+        raise ValueError('"horizons" must be true or a list of whole trading days')
+    horizons = sorted(set(value))
+    if horizons[0] < 1 or horizons[-1] > MAX_PREDICTION_HORIZON:
+        raise ValueError(f'Horizons must be between 1 and {MAX_PREDICTION_HORIZON} trading days')
+    return horizons
+
+def parse_lookback(value):
+    """Validate a request's sequence-engine lookback (trading days per window)"""
+    if value is None:
+        return None
+    if not isinstance(value, int) or isinstance(value, bool) or not 2 <= value <= MAX_SEQUENCE_LOOKBACK:
+        raise ValueError(f'"lookback" must be a whole number of trading days between 2 and {MAX_SEQUENCE_LOOKBACK}')
+    return value
+
+def parse_budget(value):
+    """Validate a request's latency budget in seconds (default PREDICTION_BUDGET_SECONDS)"""
+    if value is None:
+        return PREDICTION_BUDGET_SECONDS
+    if (not isinstance(value, (int, float)) or isinstance(value, bool) or
+            not 0 < value <= MAX_PREDICTION_BUDGET_SECONDS):
+        raise ValueError(f'"budget" must be a number of seconds between 0 and {MAX_PREDICTION_BUDGET_SECONDS}')
+    return float(value)
+
+def horizon_columns(horizons):
+    """Feature columns followed by one future-close target column per horizon"""
+    return FEATURE_COLUMNS[:-1] + [f'Close+{horizon}' for horizon in horizons]
+
+def make_windows(features, lookback):
+    """Overlapping lookback windows as a read-only (rows - lookback + 1, lookback, features) view.
+    
+    The windows share memory with one contiguous float32 copy of the features, so memory
+    does not grow with the lookback.
+    """
+    features = np.ascontiguousarray(features, dtype=np.float32)
+    return np.lib.stride_tricks.sliding_window_view(features, lookback, axis=0).transpose(0, 2, 1)
+
+def trainable_rows(y):
+    """Rows whose targets are all known (the newest rows have no future closes yet)"""
+    return ~np.isnan(np.asarray(y).reshape(len(y), -1)).any(axis=1)
+
+@span('prepare_data')
+def fetch_and_prepare_data(ticker, period='2y', sentiment_score=0.0, horizons=None, lookback=None):
+    """Fetch stock data and prepare for training with sentiment analysis.
+    
+    With horizons, y has one column per horizon and X keeps the newest rows (whose
+    targets are still NaN) so forecasts start from the latest bar. With lookback, X is
+    a zero-copy view of overlapping windows, each labelled with its last row's target.
+    """
+    print(f"Fetching {ticker} data for {period} period...")
+    
+    data = price_store.get_history(ticker, period)
+    
+    if data.empty:
+        raise ValueError(f"No data found for ticker {ticker}")
+    
+    # Remove dividends and stock splits if they exist
+    if 'Dividends' in data.columns:
+        del data['Dividends']
+    if 'Stock Splits' in data.columns:
+        del data['Stock Splits']
+    
+    # Daily news sentiment from the archive, neutral on days without recent news; the
+    # current score stands in for the newest bar the model predicts from if the archive
+    # has nothing for it. Without horizons that is the second-to-last bar, since the
+    # last has no next-day target and is dropped below
+    sentiment = news_archive.sentiment_feature(ticker, data.index)
+    latest = len(sentiment) - 1 if horizons else len(sentiment) - 2
+    if latest >= 0 and np.isnan(sentiment[latest]):
+        sentiment[latest] = sentiment_score
+    data['Sentiment'] = np.nan_to_num(sentiment, nan=0.0)
+    
+    if horizons:
+        columns = horizon_columns(horizons)
+        for horizon in horizons:
+            data[f'Close+{horizon}'] = data['Close'].shift(-horizon)
+        scaler = MinMaxScaler()
+        # MinMaxScaler ignores NaN when fitting and keeps it when transforming
+        data_scaled = scaler.fit_transform(data[columns].values)
+        n_features = len(columns) - len(horizons)
+        X, y = data_scaled[:, :n_features], data_scaled[:, n_features:]
+        last_date = data.index[-1]
+    else:
+        data['Tomorrow'] = data['Close'].shift(-1)
+        data.dropna(inplace=True)
+        
+        last_date = data.index[-1]
+        scaler = MinMaxScaler()
+        
+        # Include sentiment in the features
+        data_scaled = scaler.fit_transform(data[FEATURE_COLUMNS].values)
+        X = data_scaled[:, :-1]  # All features except 'Tomorrow'
+        y = data_scaled[:, -1]   # 'Tomorrow' prices
+    
+    if lookback:
+        if len(X) < lookback:
+            raise ValueError(f"Not enough data for a {lookback}-day lookback ({len(X)} rows)")
+        X = make_windows(X, lookback)
+        y = np.asarray(y[lookback - 1:], dtype=np.float32)
+    
+    return data, X, y, scaler, last_date
+
+class TrainingSchedule:
+    """Early stopping on the validation split plus an optional wall-clock deadline for one fit.
+    
+    Records how long each epoch took and why training stopped ('early_stopping',
+    'deadline' or 'max_epochs').
+    """
+    
+    def __init__(self, deadline=None, patience=EARLY_STOPPING_PATIENCE):
+        self.deadline = deadline
+        self.patience = patience
+        self.epoch_seconds = []
+        self.early_stopping = None
+        self.hit_deadline = False
+    
+    @property
+    def stopped(self):
+        if self.hit_deadline:
+            return 'deadline'
+        if self.early_stopping is not None and self.early_stopping.stopped_epoch > 0:
+            return 'early_stopping'
+        return 'max_epochs'
+    
+    def callbacks(self, validation=True, early_stopping=True):
+        """Keras callbacks enforcing the schedule (validation: whether val_loss will be reported)"""
+        schedule = self
+        
+        # Defined on demand so TensorFlow is only imported when a Keras model is trained
+        class DeadlineCallback(keras.callbacks.Callback):
+            def stop(self):
+                schedule.hit_deadline = True
+                self.model.stop_training = True
+            
+            def on_epoch_begin(self, epoch, logs=None):
+                self.epoch_started = time.monotonic()
+            
+            def on_epoch_end(self, epoch, logs=None):
+                now = time.monotonic()
+                schedule.epoch_seconds.append(now - self.epoch_started)
+                if schedule.deadline is None:
+                    return
+                # The first epoch includes graph tracing, so later ones predict the next epoch better
+                recent = schedule.epoch_seconds[1:] or schedule.epoch_seconds
+                if now + max(recent[-3:]) > schedule.deadline:
+                    self.stop()
+            
+            def on_train_batch_end(self, batch, logs=None):
+                if schedule.deadline is not None and time.monotonic() > schedule.deadline:
+                    self.stop()
+        
+        if not early_stopping:
+            return [DeadlineCallback()]
+        self.early_stopping = keras.callbacks.EarlyStopping(
+            monitor='val_loss' if validation else 'loss', patience=self.patience,
+            min_delta=1e-6, restore_best_weights=True)
+        return [self.early_stopping, DeadlineCallback()]
+
+def record_training_speed(variant, batch_size, rows, epoch_seconds):
+    """Remember the steady-state seconds per row per epoch of a finished training"""
+    steady = epoch_seconds[1:] or epoch_seconds
+    if not steady or not rows:
+        return
+    speed = float(np.median(steady)) / rows
+    key = (variant, batch_size)
+    with training_speed_lock:
+        previous = training_speed.get(key)
+        training_speed[key] = speed if previous is None else 0.7 * previous + 0.3 * speed
+
+def plan_training(variant, rows, epochs, seconds):
+    """Pick the training plan that fits in `seconds` (None: no limit).
+    
+    Returns {'plan', 'batch_size', 'epochs'}; 'standard' trains as before, 'reduced' uses
+    bigger batches, and 'ridge' means not even the reduced plan fits MIN_TRAINING_EPOCHS.
+    Estimates come from earlier trainings in this process; with none yet the standard
+    plan is tried and the deadline callback keeps it in budget.
+    """
+    standard = {'plan': 'standard', 'batch_size': 32, 'epochs': epochs}
+    if seconds is None:
+        return standard
+    if seconds <= 0:
+        return {'plan': 'ridge', 'batch_size': None, 'epochs': 0}
+    with training_speed_lock:
+        standard_speed = training_speed.get((variant, 32))
+        reduced_speed = training_speed.get((variant, REDUCED_BATCH_SIZE))
+    if standard_speed is None or standard_speed * rows * MIN_TRAINING_EPOCHS <= seconds:
+        return standard
+    # Until the reduced plan has been timed, assume per-step overhead dominates
+    reduced_speed = reduced_speed or standard_speed * 32 / REDUCED_BATCH_SIZE
+    if reduced_speed * rows * MIN_TRAINING_EPOCHS <= seconds:
+        return {'plan': 'reduced', 'batch_size': REDUCED_BATCH_SIZE, 'epochs': epochs}
+    return {'plan': 'ridge', 'batch_size': None, 'epochs': 0}
+
+@span('train_keras')
+def create_and_train_model(X, y, epochs=35, callbacks=None, batch_size=32, schedule=None, members=1,
+                           units=(64, 32), learning_rate=None):
+    """Create and train the neural network model (a TrainingSchedule adds early stopping and a deadline).
+    
+    units and learning_rate only apply to the keras engine's network; tuned values come from tune_tickers.
+    """
+    if X.ndim == 3:
+        return create_and_train_sequence_model(X, y, epochs, callbacks, batch_size, schedule)
+    if members > 1:
+        return create_and_train_ensemble_model(X, y, members, epochs, callbacks, batch_size, schedule)
+    
     print(f"Creating and training model with {epochs} epochs...")
     
     model = keras.Sequential([
-        keras.layers.Dense(64, activation='relu', input_shape=(X.shape[1],)),
+        keras.layers.Dense(units[0], activation='relu', input_shape=(X.shape[1],)),
+        keras.layers.Dropout(0.2),
+        keras.layers.Dense(units[1], activation='relu'),
+        keras.layers.Dropout(0.2),
+        keras.layers.Dense(y.shape[1] if y.ndim > 1 else 1)  # One output per forecast horizon
+    ])
+    
+    if schedule is not None:
+        callbacks = list(callbacks or []) + schedule.callbacks(validation=int(len(X) * 0.2) > 0)
+    optimizer = keras.optimizers.Adam(learning_rate=learning_rate) if learning_rate else 'adam'
+    model.compile(optimizer=optimizer, loss='mean_squared_error', metrics=['mae'])
+    history = model.fit(X, y, epochs=epochs, batch_size=batch_size, verbose=0, validation_split=0.2,
+                        callbacks=callbacks)
+    
+    print("Model training completed!")
+    return model, history
+
+def ensemble_targets(y, members):
+    """Repeat the targets once per ensemble member, matching the packed model's (rows, members * outputs) output"""
+    y = np.asarray(y, dtype=np.float32).reshape(len(y), -1)
+    return np.tile(y, (1, members))
+
+def create_and_train_ensemble_model(X, y, members=ENSEMBLE_MEMBERS, epochs=35, callbacks=None, batch_size=32,
+                                    schedule=None):
+    """Create and train `members` copies of the keras-engine network packed into one model.
+    
+    Each layer holds a stacked (members, inputs, units) kernel applied with an einsum, so
+    the members share every forward and backward pass but never each other's weights. The
+    output is (rows, members * outputs), member by member; the loss is their mean error.
+    """
+    outputs = y.shape[1] if y.ndim > 1 else 1
+    print(f"Creating and training {members}-member ensemble with {epochs} epochs...")
+    
+    def packed(equation, units, activation=None, **kwargs):
+        # Glorot per member: the stacked kernel's fans are `members` times a single member's
+        return keras.layers.EinsumDense(
+            equation, output_shape=(members, units), bias_axes='kj', activation=activation,
+            kernel_initializer=keras.initializers.VarianceScaling(scale=members, mode='fan_avg',
+                                                                  distribution='uniform'), **kwargs)
+    
+    model = keras.Sequential([
+        packed('bi,kij->bkj', 64, 'relu', input_shape=(X.shape[1],)),
         keras.layers.Dropout(0.2),
+        packed('bki,kij->bkj', 32, 'relu'),
+        keras.layers.Dropout(0.2),
+        packed('bki,kij->bkj', outputs),
+        keras.layers.Reshape((members * outputs,))
+    ])
+    
+    if schedule is not None:
+        callbacks = list(callbacks or []) + schedule.callbacks(validation=int(len(X) * 0.2) > 0)
+    model.compile(optimizer='adam', loss='mean_squared_error', metrics=['mae'])
+    history = model.fit(X, ensemble_targets(y, members), epochs=epochs, batch_size=batch_size, verbose=0,
+                        validation_split=0.2, callbacks=callbacks)
+    
+    print("Ensemble training completed!")
+    return model, history
+
+def window_batches(X, y, batch_size=32, shuffle=True):
+    """Keras Sequence that copies one batch at a time out of a window view"""
+    # Defined on demand so TensorFlow is only imported when a Keras model is trained
+    class WindowBatches(keras.utils.Sequence):
+        def __init__(self):
+            super().__init__()
+            self.order = np.arange(len(X))
+            self.on_epoch_end()
+        
+        def __len__(self):
+            return max(1, -(-len(X) // batch_size))
+        
+        def __getitem__(self, index):
+            rows = self.order[index * batch_size:(index + 1) * batch_size]
+            return X[rows], y[rows]
+        
+        def on_epoch_end(self):
+            if shuffle:
+                np.random.shuffle(self.order)
+    
+    return WindowBatches()
+
+def create_and_train_sequence_model(X, y, epochs=35, callbacks=None, batch_size=32, schedule=None):
+    """Create and train the windowed (sequence engine) network on a window view"""
+    lookback, n_features = X.shape[1], X.shape[2]
+    print(f"Creating and training {lookback}-day sequence model with {epochs} epochs...")
+    
+    model = keras.Sequential([
+        keras.layers.Conv1D(32, 3, padding='causal', activation='relu', input_shape=(lookback, n_features)),
+        keras.layers.Conv1D(32, 3, padding='causal', dilation_rate=2, activation='relu'),
+        keras.layers.GlobalAveragePooling1D(),
         keras.layers.Dense(32, activation='relu'),
         keras.layers.Dropout(0.2),
-        keras.layers.Dense(1)
+        keras.layers.Dense(y.shape[1] if y.ndim > 1 else 1)  # One output per forecast horizon
     ])
     
+    # Same 80/20 split as validation_split, fed batch by batch instead of as one array
+    split = max(1, int(len(X) * 0.8))
+    if schedule is not None:
+        callbacks = list(callbacks or []) + schedule.callbacks(validation=split < len(X))
     model.compile(optimizer='adam', loss='mean_squared_error', metrics=['mae'])
-    history = model.fit(X, y, epochs=epochs, batch_size=32, verbose=0, validation_split=0.2)
+    history = model.fit(window_batches(X[:split], y[:split], batch_size),
+                        validation_data=(window_batches(X[split:], y[split:], batch_size, shuffle=False)
+                                         if split < len(X) else None),
+                        epochs=epochs, verbose=0, callbacks=callbacks)
     
     print("Model training completed!")
     return model, history
 
-def make_prediction(model, X, scaler, last_date, data, sentiment_score=0.0):
-    """Make prediction for the next day with sentiment analysis"""
-    last_features = X[-1].reshape(1, -1)
+class RidgeModel:
+    """Linear ridge regression solved in closed form with NumPy (the 'fast' engine)"""
+    
+    def __init__(self, alpha=FAST_RIDGE_ALPHA):
+        self.alpha = alpha
+        self.coef_ = None
+        self.intercept_ = 0.0
+    
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        # Center so the intercept is not penalized
+        x_mean, y_mean = X.mean(axis=0), y.mean(axis=0)
+        Xc = X - x_mean
+        gram = Xc.T @ Xc + self.alpha * np.eye(X.shape[1])
+        self.coef_ = np.linalg.solve(gram, Xc.T @ (y - y_mean))
+        self.intercept_ = y_mean - x_mean @ self.coef_
+        return self
+    
+    def predict(self, X, verbose=0):
+        """Predict with the same (rows, outputs) shape as a Keras model"""
+        X = np.asarray(X, dtype=np.float64)
+        return (X @ self.coef_ + self.intercept_).reshape(len(X), -1)
+
+@span('train_fast')
+def create_and_train_fast_model(X, y):
+    """Fit the fast engine model on the prepared features"""
+    started = time.time()
+    model = RidgeModel().fit(X, y)
+    return model, {
+        'mode': 'full',
+        'reason': 'fast engine',
+        'new_rows': len(X),
+        'epochs': 0,
+        'seconds': time.time() - started
+    }
+
+class ModelRegistry:
+    """Per-ticker store of trained models, their fitted scalers and training metadata.
+    
+    Each entry is a directory holding model.keras, scaler.pkl and meta.json. The most
+    recently used entries are also kept loaded in memory.
+    """
+    
+    def __init__(self, root, memory_entries=MODEL_MEMORY_ENTRIES):
+        self.root = root
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.locks = {}
+        self.lock = threading.Lock()
+    
+    def _dir(self, ticker, variant):
+        return os.path.join(self.root, quote(ticker, safe=''), variant)
+    
+    def lock_for(self, ticker, variant):
+        """Lock serializing training for one registry entry"""
+        with self.lock:
+            return self.locks.setdefault((ticker, variant), threading.Lock())
+    
+    def load(self, ticker, variant):
+        """Return (model, scaler, meta) for a saved entry, or None"""
+        key = (ticker, variant)
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+        
+        entry_dir = self._dir(ticker, variant)
+        try:
+            with open(os.path.join(entry_dir, 'meta.json')) as f:
+                meta = json.load(f)
+            with open(os.path.join(entry_dir, 'scaler.pkl'), 'rb') as f:
+                scaler = pickle.load(f)
+            model = keras.models.load_model(os.path.join(entry_dir, 'model.keras'))
+        except Exception as e:
+            if os.path.isdir(entry_dir):
+                print(f"Could not load saved model for {ticker} ({variant}): {e}")
+            return None
+        
+        self._remember(key, (model, scaler, meta))
+        return model, scaler, meta
+    
+    def save(self, ticker, variant, model, scaler, meta):
+        """Write an entry; meta.json is replaced last so readers never see a half-written entry"""
+        entry_dir = self._dir(ticker, variant)
+        os.makedirs(entry_dir, exist_ok=True)
+        try:
+            model.save(os.path.join(entry_dir, 'model.tmp.keras'))
+            os.replace(os.path.join(entry_dir, 'model.tmp.keras'), os.path.join(entry_dir, 'model.keras'))
+            with open(os.path.join(entry_dir, 'scaler.pkl.tmp'), 'wb') as f:
+                pickle.dump(scaler, f)
+            os.replace(os.path.join(entry_dir, 'scaler.pkl.tmp'), os.path.join(entry_dir, 'scaler.pkl'))
+            with open(os.path.join(entry_dir, 'meta.json.tmp'), 'w') as f:
+                json.dump(meta, f, indent=2)
+            os.replace(os.path.join(entry_dir, 'meta.json.tmp'), os.path.join(entry_dir, 'meta.json'))
+        except Exception as e:
+            print(f"Could not save model for {ticker} ({variant}): {e}")
+        
+        self._remember((ticker, variant), (model, scaler, meta))
+    
+    def _remember(self, key, entry):
+        with self.lock:
+            self.memory[key] = entry
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+model_registry = ModelRegistry(os.path.join(CACHE_DIR, 'models'))
+
+def scaler_drift(scaler, values, columns):
+    """Largest distance of the data outside the scaler's fitted range, as a fraction of that range"""
+    data_min = scaler.data_min_[columns]
+    data_range = np.where(scaler.data_range_[columns] > 0, scaler.data_range_[columns], 1.0)
+    above = (np.nanmax(values[:, columns], axis=0) - scaler.data_max_[columns]) / data_range
+    below = (data_min - np.nanmin(values[:, columns], axis=0)) / data_range
+    return float(max(above.max(), below.max(), 0.0))
+
+def training_cancelled(callbacks):
+    """True if a cancellation callback stopped training"""
+    return any(getattr(callback, 'cancelled', False) for callback in callbacks or [])
+
+def train_or_update_model(ticker, data, X, y, scaler, epochs=50, variant='mlp', callbacks=None,
+                          columns=FEATURE_COLUMNS, deadline=None, members=1, architecture=None, period=None):
+    """Reuse the registered model for a ticker, fine-tuning it on new bars, or fully retrain.
+    
+    Returns the model, the scaler its inputs are scaled with, the matching X and a dict
+    describing the training that was done. Rows without targets are only used for prediction.
+    A full retrain stops early once validation loss stops improving, and is kept within
+    `deadline` (time.monotonic()) by a cheaper plan or, failing that, ridge regression.
+    An architecture ({'units', 'learning_rate'}, from tuning) replaces the default network.
+    The history period the data covers is part of the saved configuration, so a new tuned
+    period retrains rather than fine-tuning a model scaled on a different range.
+    """
+    config = {'feature_columns': columns, 'epochs': epochs, 'sentiment': 'daily'}
+    if period:
+        config['period'] = period
+    if architecture:
+        config['architecture'] = architecture
+    lookback = X.shape[1] if X.ndim == 3 else None
+    if lookback:
+        config['lookback'] = lookback
+    if members > 1:
+        config['members'] = members
+    # Targets are only missing for the newest rows, so trainable rows are a prefix of X
+    trainable = trainable_rows(y)
+    trained_rows = int(trainable.sum())
+    row_dates = data.index[lookback - 1:] if lookback else data.index
+    last_date = row_dates[trainable][-1]
+    started = time.time()
+    
+    with model_registry.lock_for(ticker, variant):
+        entry = model_registry.load(ticker, variant)
+        reason = 'no saved model'
+        
+        if entry is not None:
+            model, saved_scaler, meta = entry
+            values = data[columns].values
+            # Sentiment is a daily news score bounded to [-1, 1] rather than a price level, so a
+            # day outside the saved range isn't a regime change; prices, volume and target are checked
+            price_columns = [i for i, name in enumerate(columns) if name != 'Sentiment']
+            # Models saved before the price store dropped timezones have timezone-aware dates, so
+            # both sides are compared as exchange-local dates without one
+            saved_last_date = local_dates(pd.Timestamp(meta['last_date']))
+            new_rows = (local_dates(row_dates) > saved_last_date) & trainable
+            drift = scaler_drift(saved_scaler, values, price_columns)
+            age_days = (time.time() - meta['trained_at']) / 86400
+            
+            if meta.get('config') != config:
+                reason = 'configuration changed'
+            elif age_days > MODEL_MAX_AGE_DAYS:
+                reason = f'model is {age_days:.0f} days old'
+            elif new_rows.sum() > MODEL_MAX_NEW_ROWS:
+                reason = f'{int(new_rows.sum())} new bars'
+            elif drift > MODEL_DRIFT_THRESHOLD:
+                reason = f'data drift {drift:.2f}'
+            else:
+                scaled = saved_scaler.transform(values)
+                X_saved, y_saved = scaled[:, :X.shape[-1]], scaled[:, X.shape[-1]:]
+                if y.ndim == 1:
+                    y_saved = y_saved[:, 0]
+                if lookback:
+                    X_saved, y_saved = make_windows(X_saved, lookback), y_saved[lookback - 1:]
+                count = int(new_rows.sum())
+                if count:
+                    print(f"Fine-tuning saved {ticker} model on {count} new bar(s) for {FINETUNE_EPOCHS} epochs...")
+                    schedule = TrainingSchedule(deadline)
+                    y_new = ensemble_targets(y_saved[new_rows], members) if members > 1 else y_saved[new_rows]
+                    model.fit(X_saved[new_rows], y_new, epochs=FINETUNE_EPOCHS, batch_size=32, verbose=0,
+                              callbacks=list(callbacks or []) + schedule.callbacks(early_stopping=False))
+                    if training_cancelled(callbacks):
+                        raise JobCancelled("Training was cancelled")
+                    meta.update({
+                        'last_date': last_date.isoformat(),
+                        'rows': len(data),
+                        'updated_at': time.time(),
+                        'incremental_updates': meta.get('incremental_updates', 0) + 1
+                    })
+                    model_registry.save(ticker, variant, model, saved_scaler, meta)
+                else:
+                    print(f"Reusing saved {ticker} model (no new bars)")
+                metrics.inc('cache_requests_total', cache='model_registry', result='hit')
+                return model, saved_scaler, X_saved, {
+                    'mode': 'incremental' if count else 'cached',
+                    'reason': 'warm start',
+                    'new_rows': count,
+                    'epochs': len(schedule.epoch_seconds) if count else 0,
+                    'max_epochs': FINETUNE_EPOCHS if count else 0,
+                    'plan': 'standard',
+                    'stopped': schedule.stopped if count else None,
+                    'seconds': time.time() - started
+                }
+        
+        print(f"Full retrain for {ticker} ({reason})")
+        metrics.inc('cache_requests_total', cache='model_registry', result='miss')
+        remaining = deadline - time.monotonic() if deadline is not None else None
+        plan = plan_training(variant, trained_rows, epochs, remaining)
+        if plan['plan'] == 'ridge':
+            # Nothing is saved, so the next request with more time trains the real model
+            print(f"Only {remaining:.1f}s left to train {ticker}, falling back to ridge regression")
+            flat = X[:, -1, :] if X.ndim == 3 else X
+            model, training = create_and_train_fast_model(flat[:trained_rows], y[:trained_rows])
+            training.update({'reason': f'{reason}, training budget exhausted', 'max_epochs': epochs,
+                             'plan': 'ridge', 'stopped': 'deadline'})
+            return model, scaler, flat, training
+        if plan['plan'] == 'reduced':
+            print(f"Standard training won't fit {remaining:.1f}s, using batches of {plan['batch_size']}")
+        
+        schedule = TrainingSchedule(deadline)
+        model, history = create_and_train_model(X[:trained_rows], y[:trained_rows], plan['epochs'],
+                                                callbacks=callbacks, batch_size=plan['batch_size'],
+                                                schedule=schedule, members=members,
+                                                **(architecture or {}))
+        if training_cancelled(callbacks):
+            raise JobCancelled("Training was cancelled")
+        record_training_speed(variant, plan['batch_size'], trained_rows, schedule.epoch_seconds)
+        epochs_run = len(history.epoch)
+        print(f"Trained {epochs_run}/{epochs} epochs ({schedule.stopped.replace('_', ' ')})")
+        model_registry.save(ticker, variant, model, scaler, {
+            'ticker': ticker,
+            'variant': variant,
+            'config': config,
+            'last_date': last_date.isoformat(),
+            'rows': len(data),
+            'trained_at': time.time(),
+            'updated_at': time.time(),
+            'incremental_updates': 0,
+            'epochs_trained': epochs_run,
+            'plan': plan['plan'],
+            'stopped': schedule.stopped,
+            'val_loss': float(min(history.history['val_loss'])) if history.history.get('val_loss') else None
+        })
+        return model, scaler, X, {
+            'mode': 'full',
+            'reason': reason,
+            'new_rows': trained_rows,
+            'epochs': epochs_run,
+            'max_epochs': epochs,
+            'plan': plan['plan'],
+            'stopped': schedule.stopped,
+            'seconds': time.time() - started
+        }
+
+@span('training')
+def train_model_for_engine(engine, ticker, data, X, y, scaler, epochs=50, callbacks=None, horizons=None,
+                           deadline=None, architecture=None, period=None):
+    """Train with the selected engine within an optional deadline; returns (model, scaler, X, training info)"""
+    metrics.add('trainings_in_flight', 1, engine=engine)
+    try:
+        if engine == 'fast':
+            trained_rows = int(trainable_rows(y).sum())
+            model, training = create_and_train_fast_model(X[:trained_rows], y[:trained_rows])
+            return model, scaler, X, training
+        variant = engine if engine in ('sequence', 'ensemble') else 'mlp'
+        members = ENSEMBLE_MEMBERS if engine == 'ensemble' else 1
+        if horizons:
+            return train_or_update_model(ticker, data, X, y, scaler, epochs, variant=f'{variant}-horizons',
+                                         callbacks=callbacks, columns=horizon_columns(horizons),
+                                         deadline=deadline, members=members, architecture=architecture,
+                                         period=period)
+        return train_or_update_model(ticker, data, X, y, scaler, epochs, variant=variant, callbacks=callbacks,
+                                     deadline=deadline, members=members, architecture=architecture, period=period)
+    finally:
+        metrics.add('trainings_in_flight', -1, engine=engine)
+
+class DenseInference:
+    """NumPy forward pass over weights exported from a Sequential stack of Dense (and Dropout) layers.
+    
+    The ensemble engine's packed EinsumDense layers and its final Reshape are supported too.
+    """
+    ACTIVATIONS = {
+        'linear': None,
+        'relu': lambda values: np.maximum(values, 0, out=values)
+    }
+    
+    def __init__(self, layers):
+        self.layers = layers
+    
+    @classmethod
+    def from_model(cls, model):
+        """Export the model's weights, or return None if it has layers NumPy can't evaluate"""
+        layers = []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            if kind == 'Dropout':
+                continue  # Identity at inference
+            if kind == 'Reshape':
+                layers.append(('reshape', tuple(layer.target_shape), None, None))
+                continue
+            activation = getattr(getattr(layer, 'activation', None), '__name__', None)
+            if kind not in ('Dense', 'EinsumDense') or activation not in cls.ACTIVATIONS:
+                return None
+            weights = layer.get_weights()
+            kernel = np.ascontiguousarray(weights[0], dtype=np.float32)
+            bias = weights[1].astype(np.float32) if len(weights) > 1 else None
+            layers.append((layer.equation if kind == 'EinsumDense' else None, kernel, bias,
+                           cls.ACTIVATIONS[activation]))
+        return cls(layers) if layers else None
     
-    # Update sentiment in the features for prediction
-    last_features[0, -1] = sentiment_score  # Sentiment is the last feature before target
+    def __call__(self, X):
+        values = X
+        for equation, kernel, bias, activation in self.layers:
+            if equation == 'reshape':
+                values = values.reshape((len(values),) + kernel)
+                continue
+            # Each product returns a new array, so X itself is never written to
+            values = values @ kernel if equation is None else np.einsum(equation, values, kernel)
+            if bias is not None:
+                values += bias
+            if activation is not None:
+                activation(values)
+        return values
+
+def traced_inference(model, input_shape):
+    """tf.function over the model's forward pass, traced once for any batch size"""
+    forward = tf.function(lambda inputs: model(inputs, training=False),
+                          input_signature=[tf.TensorSpec((None,) + tuple(input_shape), tf.float32)])
+    return lambda X: np.asarray(forward(tf.convert_to_tensor(X)))
+
+# Inference function per loaded model, rebuilt when training has moved its weights
+inference_functions = weakref.WeakKeyDictionary()
+inference_functions_lock = threading.Lock()
+
+def inference_function(model, input_shape):
+    """Cached single-call inference for a Keras model: NumPy for Dense stacks, a traced graph otherwise"""
+    optimizer = getattr(model, 'optimizer', None)
+    iterations = getattr(optimizer, 'iterations', None)
+    version = int(iterations.numpy()) if iterations is not None else 0
+    with inference_functions_lock:
+        cached = inference_functions.get(model)
+    if cached is not None and cached[0] == version:
+        return cached[1]
     
-    predicted_price = model.predict(last_features, verbose=0)
+    forward = DenseInference.from_model(model) or traced_inference(model, input_shape)
+    with inference_functions_lock:
+        inference_functions[model] = (version, forward)
+    return forward
+
+def predict_rows(model, X):
+    """Predict a single row or a batch as (rows, outputs) without Keras' predict() overhead.
+    
+    Inputs are read as contiguous float32 (copied only if they aren't already) and are
+    never modified. Models without Keras layers (the ridge engine) use their own predict.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    if not hasattr(model, 'layers'):
+        return np.asarray(model.predict(X, verbose=0)).reshape(len(X), -1)
+    return np.asarray(inference_function(model, X.shape[1:])(X)).reshape(len(X), -1)
+
+@span('predict')
+def make_prediction(model, X, scaler, last_date, data, sentiment_score=0.0, ticker=None):
+    """Make prediction for the next day with sentiment analysis"""
+    # The latest row (or window) already carries that day's archived news sentiment;
+    # an ensemble's members are averaged
+    predicted_price = predict_rows(model, X[-1:]).mean()
     
     # Inverse transform to get actual price
     temp_array = np.zeros((1, scaler.n_features_in_))
-    temp_array[0, -1] = predicted_price[0, 0]
+    temp_array[0, -1] = predicted_price
     predicted_price_actual = scaler.inverse_transform(temp_array)[0, -1]
     
-    next_date = last_date + pd.DateOffset(days=1)
+    next_date = trading_dates(last_date, [1], ticker)[0]
     
     return predicted_price_actual, next_date
 
-def create_visualization(data, predicted_price, next_date, ticker):
-    """Create and save visualization"""
-    plt.figure(figsize=(14, 8))
-    plt.style.use('default')
+@span('predict')
+def make_horizon_predictions(model, X, scaler, last_date, horizons, ticker=None):
+    """Forecast every horizon with one forward pass over the latest feature row.
+    
+    For an ensemble the price is the members' mean and each forecast also carries
+    'spread', the standard deviation of the members' prices.
+    """
+    members = predict_rows(model, X[-1:]).reshape(-1, len(horizons))
+    
+    # Inverse transform the target columns, which come last in the scaler
+    temp_array = np.zeros((1, scaler.n_features_in_))
+    temp_array[0, -len(horizons):] = members.mean(axis=0)
+    prices = scaler.inverse_transform(temp_array)[0, -len(horizons):]
+    
+    forecasts = [
+        {'days': horizon, 'date': date, 'price': float(price)}
+        for horizon, date, price in zip(horizons, trading_dates(last_date, horizons, ticker), prices)
+    ]
+    if len(members) > 1:
+        # MinMaxScaler is affine per column, so a spread converts with the column's scale alone
+        spreads = members.std(axis=0) / scaler.scale_[-len(horizons):]
+        for forecast, spread in zip(forecasts, spreads):
+            forecast['spread'] = float(spread)
+            forecast['members'] = len(members)
+    return forecasts
+
+def build_chart_series(data, predicted_price, next_date, ticker, horizons=None):
+    """Collect the chart data (recent closes plus the predicted points) and its content hash"""
+    recent_data = data.tail(CHART_HISTORY_DAYS)
+    series = {
+        'ticker': ticker,
+        'dates': [date.strftime('%Y-%m-%d') for date in recent_data.index],
+        'closes': [round(float(close), 4) for close in recent_data['Close']],
+        'prediction': {
+            'date': next_date.strftime('%Y-%m-%d'),
+            'price': round(float(predicted_price), 4)
+        }
+    }
+    if horizons:
+        series['horizons'] = [
+            {'days': forecast['days'], 'date': forecast['date'].strftime('%Y-%m-%d'),
+             'price': round(forecast['price'], 4)}
+            for forecast in horizons
+        ]
+    series['prediction_id'] = hashlib.sha1(json.dumps(series, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return series
+
+@span('render_chart')
+def create_visualization(series, fmt='png', dpi=CHART_DPI):
+    """Render a prediction chart to PNG or SVG bytes"""
+    from matplotlib.figure import Figure
+    plt.style  # Make sure matplotlib is loaded with the off-screen backend
+    
+    # Figure objects (not pyplot) so concurrent renders don't share global state
+    fig = Figure(figsize=(10, 5.5))
+    ax = fig.add_subplot()
+    ticker = series['ticker']
+    dates = pd.to_datetime(series['dates'])
+    next_date = pd.Timestamp(series['prediction']['date'])
     
     # Plot last 100 days
-    recent_data = data.tail(100)
-    plt.plot(recent_data.index, recent_data['Close'], 
-             label=f'{ticker} Actual Prices (Last 100 days)', 
-             linewidth=2, color='#2196F3')
-    
-    # Plot prediction
-    plt.plot([data.index[-1], next_date], 
-             [data['Close'].iloc[-1], predicted_price], 
-             color='red', marker='o', linestyle='--', 
-             linewidth=3, markersize=8, 
-             label=f'Predicted Price ({next_date.strftime("%Y-%m-%d")})')
-    
-    plt.title(f'{ticker} Price Prediction - Actual vs Predicted', 
-              fontsize=16, fontweight='bold', pad=20)
-    plt.xlabel('Date', fontsize=12)
-    plt.ylabel('Price ($)', fontsize=12)
-    plt.legend(fontsize=12)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    # Save to base64
+    ax.plot(dates, series['closes'], 
+            label=f'{ticker} Actual Prices (Last {len(dates)} days)', 
+            linewidth=2, color='#2196F3')
+    
+    if series.get('horizons'):
+        # Plot the forecast path through every horizon
+        horizons = series['horizons']
+        ax.plot([dates[-1]] + [pd.Timestamp(forecast['date']) for forecast in horizons],
+                [series['closes'][-1]] + [forecast['price'] for forecast in horizons],
+                color='red', marker='o', linestyle='--',
+                linewidth=3, markersize=8,
+                label=f'Predicted Prices ({", ".join(str(forecast["days"]) + "d" for forecast in horizons)})')
+        for i, forecast in enumerate(horizons):
+            # Alternate labels above and below so near horizons don't overlap
+            ax.annotate(f'+{forecast["days"]}d ${forecast["price"]:.2f}',
+                        (pd.Timestamp(forecast['date']), forecast['price']),
+                        textcoords='offset points', xytext=(0, 10 if i % 2 == 0 else -18),
+                        ha='center', fontsize=9)
+    else:
+        # Plot prediction
+        ax.plot([dates[-1], next_date], 
+                [series['closes'][-1], series['prediction']['price']], 
+                color='red', marker='o', linestyle='--', 
+                linewidth=3, markersize=8, 
+                label=f'Predicted Price ({series["prediction"]["date"]})')
+    
+    ax.set_title(f'{ticker} Price Prediction - Actual vs Predicted', 
+                 fontsize=16, fontweight='bold', pad=20)
+    ax.set_xlabel('Date', fontsize=12)
+    ax.set_ylabel('Price ($)', fontsize=12)
+    ax.legend(fontsize=12)
+    ax.grid(True, alpha=0.3)
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    
     buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    buffer.seek(0)
-    img_base64 = base64.b64encode(buffer.getvalue()).decode()
-    plt.close()
+    fig.savefig(buffer, format=fmt, dpi=dpi)
+    return buffer.getvalue()
+
+class ResultStore:
+    """Bounded, thread-safe store of prediction results and their rendered graphs.
+    
+    Entries are keyed by request (job) id and also indexed by ticker and prediction id.
+    The least recently used entries are evicted beyond a count or memory limit.
+    """
+    
+    def __init__(self, max_entries=RESULT_STORE_ENTRIES, max_bytes=RESULT_STORE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.by_ticker = {}
+        self.by_prediction = {}
+        self.total_bytes = 0
+        self.lock = threading.Lock()
     
-    return f"data:image/png;base64,{img_base64}"
+    def put(self, request_id, ticker, status, data=None, error=None, series=None):
+        """Store the outcome of a prediction request"""
+        entry = {
+            'id': request_id,
+            'ticker': ticker,
+            'status': status,
+            'data': data,
+            'error': error,
+            'series': series,
+            'timestamp': datetime.now().isoformat(),
+            'graphs': {},
+            'size': len(json.dumps({'data': data, 'error': error, 'series': series}, default=str))
+        }
+        with self.lock:
+            self._remove(request_id)
+            self.entries[request_id] = entry
+            self.total_bytes += entry['size']
+            self.by_ticker[ticker] = request_id
+            if series is not None:
+                self.by_prediction[series['prediction_id']] = request_id
+            self._evict()
+        return entry
+    
+    def get(self, request_id):
+        with self.lock:
+            entry = self.entries.get(request_id)
+            if entry is not None:
+                self.entries.move_to_end(request_id)
+            return entry
+    
+    def latest(self, ticker=None):
+        """Most recent entry for a ticker, or overall"""
+        with self.lock:
+            if ticker is not None:
+                request_id = self.by_ticker.get(ticker)
+            else:
+                request_id = max(self.entries, key=lambda key: self.entries[key]['timestamp'], default=None)
+            return self.entries.get(request_id) if request_id else None
+    
+    def for_prediction(self, prediction_id):
+        with self.lock:
+            request_id = self.by_prediction.get(prediction_id)
+            if request_id is None:
+                return None
+            self.entries.move_to_end(request_id)
+            return self.entries[request_id]
+    
+    def graph(self, prediction_id, fmt='png', dpi=CHART_DPI):
+        """Rendered chart bytes for a prediction, rendered and kept on first request"""
+        entry = self.for_prediction(prediction_id)
+        if entry is None:
+            return None
+        key = f'{fmt}@{dpi}'
+        with self.lock:
+            image = entry['graphs'].get(key)
+        if image is not None:
+            metrics.inc('cache_requests_total', cache='chart', result='hit')
+            return image
+        
+        metrics.inc('cache_requests_total', cache='chart', result='miss')
+        image = create_visualization(entry['series'], fmt, dpi)
+        with self.lock:
+            # Only account for it if the entry wasn't evicted while rendering
+            if self.entries.get(entry['id']) is entry and key not in entry['graphs']:
+                entry['graphs'][key] = image
+                entry['size'] += len(image)
+                self.total_bytes += len(image)
+                self._evict()
+        return image
+    
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes
+            }
+    
+    def _remove(self, request_id):
+        entry = self.entries.pop(request_id, None)
+        if entry is None:
+            return
+        self.total_bytes -= entry['size']
+        if self.by_ticker.get(entry['ticker']) == request_id:
+            del self.by_ticker[entry['ticker']]
+        if entry['series'] is not None and self.by_prediction.get(entry['series']['prediction_id']) == request_id:
+            del self.by_prediction[entry['series']['prediction_id']]
+    
+    def _evict(self):
+        # Always keep the newest entry, even if it alone exceeds the memory cap
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            self._remove(next(iter(self.entries)))
+    
+    @staticmethod
+    def summary(entry):
+        """Public view of an entry (without series or image bytes)"""
+        if entry is None:
+            return None
+        return {
+            'id': entry['id'],
+            'ticker': entry['ticker'],
+            'status': entry['status'],
+            'timestamp': entry['timestamp'],
+            'error': entry['error'],
+            'data': entry['data']
+        }
+
+result_store = ResultStore()
 
 @app.route('/')
 def home():
     """Serve the main dashboard"""
     return render_template_string(HTML_TEMPLATE)
 
+def news_response(snapshot):
+    """The /news payload for a snapshot (also the news event of a prediction stream)"""
+    return {
+        'status': 'success',
+        'ticker': snapshot['ticker'],
+        'company_name': snapshot['company_name'],
+        'sector': snapshot['sector'],
+        'overall_sentiment': snapshot['overall_sentiment'],
+        'news': snapshot['news'],
+        'news_fetched_at': datetime.fromtimestamp(snapshot['created']).isoformat()
+    }
+
 @app.route('/news', methods=['POST'])
 def get_news():
     """Get recent news with sentiment analysis"""
     try:
         data = request.get_json()
         ticker = data.get('ticker', 'AAPL').upper()
+        refresh = bool(data.get('refresh', False))
         
-        # Get company info
-        company_name, sector = get_company_info(ticker)
+        # Get company info, news and sentiment (shared with /predict)
+        snapshot = get_news_snapshot(ticker, refresh=refresh)
         
-        # Fetch news
-        news_list = fetch_yahoo_finance_news(ticker, company_name)
-        
-        # Analyze sentiment
-        overall_sentiment, news_with_sentiment = calculate_news_sentiment(news_list)
-        
-        return jsonify({
-            'status': 'success',
-            'ticker': ticker,
-            'company_name': company_name,
-            'sector': sector,
-            'overall_sentiment': overall_sentiment,
-            'news': news_with_sentiment
-        })
+        return jsonify(news_response(snapshot))
         
+    except ComponentNotReady as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
     except Exception as e:
         error_msg = str(e)
         print(f"News fetch error: {error_msg}")
         return jsonify({'error': error_msg}), 500
 
-@app.route('/predict', methods=['POST'])
-def predict():
-    """Run prediction with sentiment analysis (fixed: 2y data, 50 epochs)"""
-    global latest_results
+class JobCancelled(Exception):
+    """Raised inside a prediction pipeline when its job has been cancelled"""
+
+class PredictionJob:
+    """A queued /predict request and its progress"""
     
-    try:
-        data = request.get_json()
-        ticker = data.get('ticker', 'AAPL').upper()
-        
-        # Fixed parameters
-        period = '2y'
-        epochs = 50
-        
-        print(f"Starting prediction for {ticker} with sentiment analysis")
-        
-        # Get company info
-        company_name, sector = get_company_info(ticker)
-        
-        # Fetch news and calculate sentiment
-        news_list = fetch_yahoo_finance_news(ticker, company_name)
-        overall_sentiment, _ = calculate_news_sentiment(news_list)
-        sentiment_float = float(overall_sentiment)
-        
-        print(f"Overall news sentiment: {sentiment_float:.3f}")
-        
-        # Fetch and prepare data with sentiment
-        stock_data, X, y, scaler, last_date = fetch_and_prepare_data(ticker, period, sentiment_float)
-        
-        # Train model
-        model, history = create_and_train_model(X, y, epochs)
+    def __init__(self, ticker, params):
+        self.id = uuid.uuid4().hex
+        self.ticker = ticker
+        self.params = params
+        self.status = 'queued'
+        self.stage = 'queued'
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.timings = OrderedDict()
+        self.cancel_event = threading.Event()
+        self.events = []
+        self.events_changed = threading.Condition()
+        self.streams = 0  # Event streams currently attached
+    
+    def set_stage(self, stage):
+        """Record progress, stopping the pipeline if the job was cancelled"""
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job cancelled during {self.stage}")
+        self.stage = stage
+        print(f"[job {self.id[:8]}] {self.ticker}: {stage}")
+        self.emit('stage', {'stage': stage})
+    
+    def emit(self, event, data):
+        """Append a progress event for event stream listeners (ids start at 1)"""
+        with self.events_changed:
+            self.events.append((len(self.events) + 1, event, data))
+            self.events_changed.notify_all()
+    
+    def wait_events(self, after, timeout):
+        """Events with ids above `after`, waiting up to timeout seconds for one to arrive"""
+        with self.events_changed:
+            if len(self.events) <= after:
+                self.events_changed.wait(timeout)
+            return self.events[after:]
+    
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'ticker': self.ticker,
+            'status': self.status,
+            'stage': self.stage,
+            'result': self.result,
+            'error': self.error,
+            'created': datetime.fromtimestamp(self.created).isoformat(),
+            'started': datetime.fromtimestamp(self.started).isoformat() if self.started else None,
+            'finished': datetime.fromtimestamp(self.finished).isoformat() if self.finished else None,
+            'timings_ms': {name: round(seconds * 1000, 1) for name, seconds in list(self.timings.items())}
+        }
+
+def job_training_callback(job):
+    """Keras callback that reports each epoch to the job and stops training at the next batch once it is cancelled"""
+    # Defined on demand so TensorFlow is only imported when a Keras model is trained
+    class JobTrainingCallback(keras.callbacks.Callback):
+        @property
+        def cancelled(self):
+            return job.cancel_event.is_set()
         
-        # Make prediction with sentiment
-        predicted_price, next_date = make_prediction(model, X, scaler, last_date, stock_data, sentiment_float)
+        def on_train_batch_end(self, batch, logs=None):
+            if self.cancelled:
+                self.model.stop_training = True
         
-        # Calculate metrics
+        def on_epoch_end(self, epoch, logs=None):
+            loss = (logs or {}).get('loss')
+            job.emit('epoch', {
+                'epoch': epoch + 1,
+                'epochs': self.params.get('epochs'),
+                'loss': float(loss) if loss is not None and np.isfinite(loss) else None
+            })
+    
+    return JobTrainingCallback()
+
+def run_prediction_pipeline(ticker, refresh=False, job=None, engine=None, horizons=None, lookback=None, budget=None):
+    """Run the full news -> data -> training -> prediction -> chart pipeline for one ticker.
+    
+    With a budget (seconds), training is cut short or made cheaper so the run finishes in time.
+    """
+    started = time.monotonic()
+    def stage(name):
+        if job is not None:
+            job.set_stage(name)
+    
+    engine = engine or MODEL_ENGINE
+    # Defaults, or the configuration tune_tickers found for this ticker's keras-engine network
+    tuned = tuning_store.best(ticker) if engine == 'keras' else None
+    config = tuned or DEFAULT_TUNING_CONFIG
+    period, epochs = config['period'], config['epochs']
+    architecture = {'units': tuned['units'], 'learning_rate': tuned['learning_rate']} if tuned else None
+    
+    print(f"Starting prediction for {ticker} with sentiment analysis ({engine} engine)")
+    
+    if engine == 'sequence':
+        lookback = lookback or SEQUENCE_LOOKBACK
+    else:
+        lookback = None
+    
+    def news_and_sentiment():
+        # Company info, news and sentiment (reuses the snapshot built by /news)
+        stage('fetching news and sentiment')
+        snapshot = get_news_snapshot(ticker, refresh=refresh, wait_timeout=JOB_COMPONENT_WAIT_SECONDS)
+        if job is not None:
+            # Scored news goes to the dashboard while the prices are prepared and the model trains
+            job.emit('news', news_response(snapshot))
+        return snapshot
+    
+    def prepare(prices, snapshot):
+        # Prices are already in the local store, so this only reads and scales them
+        stage('preparing price data')
+        print(f"Overall news sentiment: {snapshot['overall_sentiment']:.3f}")
+        return fetch_and_prepare_data(ticker, period, snapshot['overall_sentiment'], horizons, lookback)
+    
+    # The price download runs while news is fetched and scored
+    results = run_stage_graph({
+        'prices': PipelineStage(lambda: price_store.get_history(ticker, period), io=True),
+        'snapshot': PipelineStage(news_and_sentiment),
+        'data': PipelineStage(prepare, after=('prices', 'snapshot'))
+    })
+    snapshot = results['snapshot']
+    company_name, sector = snapshot['company_name'], snapshot['sector']
+    sentiment_float = snapshot['overall_sentiment']
+    stock_data, X, y, scaler, last_date = results['data']
+    last_price = float(stock_data['Close'].iloc[-1])
+    if job is not None:
+        job.emit('data', {'data_points': len(stock_data), 'last_date': last_date.strftime('%Y-%m-%d'),
+                          'last_price': last_price})
+    
+    # Train model (or fine-tune the registered model for this ticker)
+    stage('training model')
+    callbacks = [job_training_callback(job)] if job is not None and engine != 'fast' else None
+    deadline = started + budget - TRAINING_RESERVE_SECONDS if budget else None
+    model, scaler, X, training = train_model_for_engine(engine, ticker, stock_data, X, y, scaler, epochs,
+                                                        callbacks=callbacks, horizons=horizons, deadline=deadline,
+                                                        architecture=architecture, period=period)
+    
+    # Make prediction with sentiment
+    stage('predicting')
+    forecasts = None
+    if horizons or engine == 'ensemble':
+        # Every horizon from one batched forward pass; the shortest fills the single-day fields.
+        # An ensemble's next-day forecast also carries the members' spread
+        forecasts = make_horizon_predictions(model, X, scaler, last_date, horizons or [1], ticker)
+        predicted_price, next_date = forecasts[0]['price'], forecasts[0]['date']
+    else:
+        predicted_price, next_date = make_prediction(model, X, scaler, last_date, stock_data, sentiment_float, ticker)
+    
+    # Calculate metrics
+    change = predicted_price - last_price
+    change_percent = (change / last_price) * 100
+    
+    # Keep the chart data; the image is rendered when /graph first asks for it
+    stage('storing chart data')
+    series = build_chart_series(stock_data, predicted_price, next_date, ticker, forecasts if horizons else None)
+    
+    result_data = {
+        'ticker': ticker,
+        'company_name': company_name,
+        'sector': sector,
+        'news_sentiment': sentiment_float,
+        'last_date': last_date.strftime('%Y-%m-%d'),
+        'last_price': last_price,
+        'predicted_date': next_date.strftime('%Y-%m-%d'),
+        'predicted_price': float(predicted_price),
+        'change': change,
+        'change_percent': change_percent,
+        'training_period': period,
+        'tuned_config': tuned,
+        'engine': engine,
+        'lookback': lookback,
+        'epochs_used': training['epochs'],
+        'max_epochs': training.get('max_epochs', training['epochs']),
+        'training_mode': training['mode'],
+        'training_plan': training.get('plan'),
+        'training_stopped': training.get('stopped'),
+        'training_seconds': training['seconds'],
+        'budget_seconds': budget,
+        'elapsed_seconds': time.monotonic() - started,
+        'data_points': len(stock_data),
+        'news_fetched_at': datetime.fromtimestamp(snapshot['created']).isoformat(),
+        'prediction_id': series['prediction_id'],
+        'graph_url': f"/graph/{quote(ticker, safe='')}/{series['prediction_id']}"
+    }
+    if forecasts and 'spread' in forecasts[0]:
+        result_data['ensemble_members'] = forecasts[0]['members']
+        result_data['prediction_spread'] = forecasts[0]['spread']
+    if horizons:
+        result_data['horizons'] = [
+            {
+                'days': forecast['days'],
+                'date': forecast['date'].strftime('%Y-%m-%d'),
+                'price': forecast['price'],
+                'change': forecast['price'] - last_price,
+                'change_percent': (forecast['price'] - last_price) / last_price * 100,
+                'spread': forecast.get('spread')
+            }
+            for forecast in forecasts
+        ]
+    
+    print(f"Prediction completed for {ticker}")
+    print(f"Company: {company_name} ({sector})")
+    print(f"News sentiment: {sentiment_float:.3f}")
+    print(f"Last price: ${last_price:.2f}")
+    print(f"Predicted price: ${predicted_price:.2f}")
+    print(f"Expected change: ${change:.2f} ({change_percent:+.2f}%)")
+    
+    return result_data, series
+
+class JobManager:
+    """Bounded worker pool running prediction jobs from a fixed-depth queue"""
+    
+    def __init__(self, workers=JOB_WORKERS, depth=JOB_QUEUE_DEPTH, history=JOB_HISTORY):
+        self.workers = workers
+        self.history = history
+        self.queue = queue.Queue(maxsize=depth)
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.threads = []
+    
+    def start(self):
+        """Start the worker threads (once)"""
+        with self.lock:
+            if self.threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'prediction-worker-{i}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+    
+    def submit(self, ticker, params=None):
+        """Queue a prediction; raises queue.Full when the queue is at capacity"""
+        self.start()
+        job = PredictionJob(ticker, params or {})
+        with self.lock:
+            self.queue.put_nowait(job)
+            self.jobs[job.id] = job
+            self._prune()
+        return job
+    
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+    
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns the job or None if unknown"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            # Under the lock so a worker can't start the job between the check and the transition
+            job.cancel_event.set()
+            if job.status == 'queued':
+                job.status = job.stage = 'cancelled'
+                job.finished = time.time()
+                job.emit('cancelled', {'stage': 'queued'})
+            elif job.status == 'running':
+                job.status = 'cancelling'
+        return job
+    
+    def stats(self):
+        with self.lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue.maxsize,
+            'queued': self.queue.qsize(),
+            'running': statuses.count('running') + statuses.count('cancelling')
+        }
+    
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the history limit"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished is not None]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+    
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            try:
+                with self.lock:
+                    # A job cancelled while queued already has its terminal event
+                    if job.cancel_event.is_set():
+                        continue
+                    job.status = 'running'
+                    job.started = time.time()
+                job.timings = start_span_timings()
+                result_data, series = run_prediction_pipeline(
+                    job.ticker, refresh=job.params.get('refresh', False), job=job,
+                    engine=job.params.get('engine'), horizons=job.params.get('horizons'),
+                    lookback=job.params.get('lookback'), budget=job.params.get('budget'))
+                
+                # Store results
+                result_store.put(job.id, job.ticker, 'completed', data=result_data, series=series)
+                job.emit('chart', {'prediction_id': series['prediction_id'], 'graph_url': result_data['graph_url']})
+                with self.lock:
+                    job.result = result_data
+                    job.status = job.stage = 'completed'
+                    job.emit('result', result_data)
+            except JobCancelled as e:
+                print(f"Prediction cancelled for {job.ticker}: {e}")
+                with self.lock:
+                    job.status = job.stage = 'cancelled'
+                    job.emit('cancelled', {'stage': str(e)})
+            except Exception as e:
+                error_msg = str(e)
+                print(f"Prediction error: {error_msg}")
+                result_store.put(job.id, job.ticker, 'error', error=error_msg)
+                with self.lock:
+                    job.status = 'failed'
+                    job.error = error_msg
+                    job.emit('error', {'error': error_msg})
+            finally:
+                stop_span_timings()
+                if job.finished is None:
+                    job.finished = time.time()
+                self.queue.task_done()
+
+job_manager = JobManager()
+
+def _batch_worker_init(tf_threads):
+    """Limit TensorFlow threading in each batch training process"""
+    tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(tf_threads)
+
+def _batch_predict_ticker(ticker, period, epochs, sentiment_score, engine='keras'):
+    """Prepare data, train and predict one ticker inside a batch process; never raises"""
+    started = time.time()
+    try:
+        lookback = SEQUENCE_LOOKBACK if engine == 'sequence' else None
+        stock_data, X, y, scaler, last_date = fetch_and_prepare_data(ticker, period, sentiment_score, lookback=lookback)
+        model, scaler, X, training = train_model_for_engine(engine, ticker, stock_data, X, y, scaler, epochs,
+                                                            period=period)
+        predicted_price, next_date = make_prediction(model, X, scaler, last_date, stock_data, sentiment_score, ticker)
         last_price = float(stock_data['Close'].iloc[-1])
-        change = predicted_price - last_price
-        change_percent = (change / last_price) * 100
-        
-        # Create visualization
-        graph_base64 = create_visualization(stock_data, predicted_price, next_date, ticker)
-        
-        result_data = {
+        change = float(predicted_price) - last_price
+        return {
             'ticker': ticker,
-            'company_name': company_name,
-            'sector': sector,
-            'news_sentiment': sentiment_float,
+            'status': 'success',
+            'news_sentiment': sentiment_score,
             'last_date': last_date.strftime('%Y-%m-%d'),
             'last_price': last_price,
             'predicted_date': next_date.strftime('%Y-%m-%d'),
             'predicted_price': float(predicted_price),
             'change': change,
-            'change_percent': change_percent,
-            'training_period': period,
-            'epochs_used': epochs,
-            'data_points': len(stock_data)
+            'change_percent': (change / last_price) * 100,
+            'engine': engine,
+            'training_mode': training['mode'],
+            'seconds': time.time() - started
         }
-        
-        # Store results
-        latest_results = {
-            'status': 'completed',
-            'data': result_data,
-            'timestamp': datetime.now().isoformat(),
-            'graph': graph_base64,
-            'error': None
-        }
-        
-        print(f"Prediction completed for {ticker}")
-        print(f"Company: {company_name} ({sector})")
-        print(f"News sentiment: {sentiment_float:.3f}")
-        print(f"Last price: ${last_price:.2f}")
-        print(f"Predicted price: ${predicted_price:.2f}")
-        print(f"Expected change: ${change:.2f} ({change_percent:+.2f}%)")
-        
-        return jsonify({
-            'status': 'success',
-            'data': result_data,
-            'timestamp': latest_results['timestamp']
-        })
-        
     except Exception as e:
-        error_msg = str(e)
-        print(f"Prediction error: {error_msg}")
-        
-        latest_results = {
-            'status': 'error',
-            'data': None,
-            'timestamp': datetime.now().isoformat(),
-            'error': error_msg
+        return {'ticker': ticker, 'status': 'error', 'error': str(e), 'seconds': time.time() - started}
+
+batch_pool = None
+batch_pool_lock = threading.Lock()
+
+def get_batch_pool(broken=None):
+    """Shared process pool for batch training; workers stay warm between batches.
+    
+    Pass a pool that raised BrokenProcessPool as `broken` to replace it. Another batch
+    may already have done so, in which case the current pool is returned as is.
+    """
+    global batch_pool
+    with batch_pool_lock:
+        if broken is not None and batch_pool is broken:
+            batch_pool.shutdown(wait=False, cancel_futures=True)
+            batch_pool = None
+        if batch_pool is None:
+            # Spawn rather than fork: forking a threaded process with TensorFlow loaded is unsafe
+            batch_pool = ProcessPoolExecutor(max_workers=BATCH_PROCESSES,
+                                             mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_batch_worker_init,
+                                             initargs=(BATCH_TF_THREADS,))
+        return batch_pool
+
+def prefetch_histories(tickers, period):
+    """Fetch every stale price history in one bulk download before fanning out"""
+    stale = [ticker for ticker in tickers if not price_store.is_current(ticker, period)]
+    if stale:
+        print(f"Bulk downloading {period} history for {len(stale)} ticker(s)...")
+        try:
+            for ticker, frame in bulk_download_history(stale, period).items():
+                price_store.store_history(ticker, frame, period)
+        except Exception as e:
+            # Callers fall back to per-ticker downloads
+            print(f"Bulk download failed: {e}")
+            metrics.inc('upstream_errors_total', source='bulk_prices')
+
+def run_batch_predictions(tickers, period='2y', epochs=50, use_sentiment=True, engine=None):
+    """Predict a watchlist, yielding each ticker's result as soon as it completes.
+    
+    When a worker process crashes, every ticker in flight in that pool fails with it
+    and there's no telling which one caused it. Those tickers are retried one at a time
+    with nothing else running, so only the one that crashes again gets an error.
+    """
+    prefetch_histories(tickers, period)
+    
+    engine = engine or MODEL_ENGINE
+    pool = get_batch_pool()
+    
+    def sentiment_for(ticker):
+        return get_news_snapshot(ticker)['overall_sentiment'] if use_sentiment else 0.0
+    
+    def train(ticker, sentiment_score):
+        nonlocal pool
+        try:
+            future = pool.submit(_batch_predict_ticker, ticker, period, epochs, sentiment_score, engine)
+        except BrokenProcessPool:
+            pool = get_batch_pool(broken=pool)
+            future = pool.submit(_batch_predict_ticker, ticker, period, epochs, sentiment_score, engine)
+        training[future] = (ticker, sentiment_score, pool)
+    
+    training = {}
+    ready = deque()     # (ticker, sentiment) with news scored, waiting for a training slot
+    suspects = deque()  # In flight when a worker crashed
+    isolated = None     # The suspect running alone
+    with ThreadPoolExecutor(max_workers=BATCH_NEWS_THREADS) as news_pool:
+        news = {news_pool.submit(sentiment_for, ticker): ticker for ticker in tickers}
+        # News and training are waited on together: each ticker starts training as soon as its
+        # sentiment is ready and is yielded as soon as it's trained, while other news is still loading
+        while news or training or ready or suspects:
+            if isolated is None and suspects:
+                # Let the pool drain, then run the suspects one by one
+                if not training:
+                    isolated = suspects[0][0]
+                    train(*suspects.popleft())
+            elif isolated is None:
+                # One ticker queued behind each running one bounds how many a crash takes down
+                while ready and len(training) < BATCH_PROCESSES * 2:
+                    train(*ready.popleft())
+            
+            done, _ = wait(list(news) + list(training), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in news:
+                    ticker = news.pop(future)
+                    try:
+                        sentiment_score = float(future.result())
+                    except Exception as e:
+                        print(f"Sentiment failed for {ticker}, using neutral: {e}")
+                        sentiment_score = 0.0
+                    ready.append((ticker, sentiment_score))
+                    continue
+                ticker, sentiment_score, used_pool = training.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    pool = get_batch_pool(broken=used_pool)
+                    if ticker != isolated:
+                        print(f"Worker crashed with {ticker} in flight, retrying it on its own")
+                        suspects.append((ticker, sentiment_score))
+                        continue
+                    result = {'ticker': ticker, 'status': 'error', 'error': f"Worker process crashed: {e}"}
+                except Exception as e:
+                    result = {'ticker': ticker, 'status': 'error', 'error': f"Worker failed: {e}"}
+                if ticker == isolated:
+                    isolated = None
+                yield result
+
+class TuningStore:
+    """Per-ticker hyperparameter search results: every scored trial plus the best configuration.
+    
+    Each ticker is one JSON file, rewritten after every trial so an interrupted search picks
+    up where it stopped. Trials are only reused while the bars they were scored on are unchanged.
+    """
+    
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+    
+    def _path(self, ticker):
+        return os.path.join(self.root, quote(ticker, safe='') + '.json')
+    
+    def load(self, ticker):
+        """The stored search record for a ticker, or None"""
+        try:
+            with open(self._path(ticker)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def save(self, ticker, record):
+        path = self._path(ticker)
+        with self.lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(path + '.tmp', 'w') as f:
+                json.dump(record, f, indent=2)
+            os.replace(path + '.tmp', path)
+    
+    def best(self, ticker, max_age_days=TUNING_MAX_AGE_DAYS):
+        """The tuned configuration /predict should use, or None if the ticker is untuned or its search is stale"""
+        record = self.load(ticker)
+        if not record or not record.get('best'):
+            return None
+        if time.time() - record['tuned_at'] > max_age_days * 86400:
+            return None
+        return record['best']['config']
+    
+    def stats(self):
+        try:
+            tickers = sum(1 for name in os.listdir(self.root) if name.endswith('.json'))
+        except OSError:
+            tickers = 0
+        return {'tickers': tickers}
+
+tuning_store = TuningStore(os.path.join(CACHE_DIR, 'tuning'))
+
+def tuning_key(config):
+    """Stable identifier of a configuration, used to find already scored trials"""
+    return json.dumps(config, sort_keys=True)
+
+def tuning_configs(trials=TUNING_TRIALS, grid=None, seed=TUNING_SEED):
+    """The configurations to score: the untuned default first, then a seeded sample of the grid (0: all of it)"""
+    grid = grid or TUNING_GRID
+    names = list(grid)
+    configs = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    configs = [config for config in configs if tuning_key(config) != tuning_key(DEFAULT_TUNING_CONFIG)]
+    if trials and trials - 1 < len(configs):
+        configs = random.Random(seed).sample(configs, max(trials - 1, 0))
+    return [dict(DEFAULT_TUNING_CONFIG)] + configs
+
+def tuning_data(ticker):
+    """Bar dates and unscaled FEATURE_COLUMNS rows for a ticker's search, read once from the price store"""
+    data = price_store.get_history(ticker, TUNING_HISTORY_PERIOD)
+    if data.empty:
+        raise ValueError(f"No data found for ticker {ticker}")
+    data['Sentiment'] = np.nan_to_num(news_archive.sentiment_feature(ticker, data.index), nan=0.0)
+    data['Tomorrow'] = data['Close'].shift(-1)
+    data.dropna(inplace=True)
+    index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+    return index.values, data[FEATURE_COLUMNS].values
+
+def _tuning_trial(dates, values, config, folds, fold_days, seed):
+    """Walk-forward score of one configuration inside a tuning process; never raises.
+    
+    The last folds * fold_days rows are validated in consecutive blocks. Each block's model
+    is trained on the `period` of bars before it, scaled on those bars only, and scored by the
+    RMSE of its next-day close in dollars; naive_score is the same for repeating today's close.
+    """
+    started = time.time()
+    try:
+        close = FEATURE_COLUMNS.index('Close')
+        fold_scores, naive_scores, epochs_run = [], [], []
+        for fold in range(folds):
+            val_start = len(values) - (folds - fold) * fold_days
+            start = period_start(config['period'], now=pd.Timestamp(dates[max(val_start, 0)]))
+            train_start = int(np.searchsorted(dates, start.to_datetime64())) if start is not None else 0
+            if val_start - train_start < 2 * fold_days:
+                raise ValueError(f"Not enough history to train {config['period']} before fold {fold + 1}")
+            scaler = MinMaxScaler()
+            train = scaler.fit_transform(values[train_start:val_start])
+            actual = values[val_start:val_start + fold_days]
+            validation = scaler.transform(actual)
+            
+            keras.utils.set_random_seed(seed)
+            schedule = TrainingSchedule()
+            model, _ = create_and_train_model(train[:, :-1], train[:, -1], config['epochs'], schedule=schedule,
+                                              units=config['units'], learning_rate=config['learning_rate'])
+            predicted = (predict_rows(model, validation[:, :-1])[:, 0] - scaler.min_[-1]) / scaler.scale_[-1]
+            fold_scores.append(float(np.sqrt(np.mean((predicted - actual[:, -1]) ** 2))))
+            naive_scores.append(float(np.sqrt(np.mean((actual[:, close] - actual[:, -1]) ** 2))))
+            epochs_run.append(len(schedule.epoch_seconds))
+            keras.backend.clear_session()
+        return {
+            'score': float(np.mean(fold_scores)),
+            'naive_score': float(np.mean(naive_scores)),
+            'fold_scores': fold_scores,
+            'epochs_run': epochs_run,
+            'seconds': time.time() - started
         }
-        
-        return jsonify({'error': error_msg}), 500
+    except Exception as e:
+        return {'error': str(e), 'seconds': time.time() - started}
+
+def finish_tuning(ticker, record, complete):
+    """Pick and save the best scored configuration of a search; returns the record or an error result"""
+    scored = [trial for trial in record['trials'].values() if 'score' in trial]
+    if not scored:
+        errors = [trial['error'] for trial in record['trials'].values() if 'error' in trial]
+        return {'ticker': ticker, 'status': 'error', 'error': errors[0] if errors else 'No trials finished in time'}
+    best = min(scored, key=lambda trial: trial['score'])
+    default = record['trials'].get(tuning_key(DEFAULT_TUNING_CONFIG), {})
+    record.update({
+        'status': 'success',
+        'best': best,
+        'default_score': default.get('score'),
+        'complete': complete,
+        'tuned_at': time.time()
+    })
+    tuning_store.save(ticker, record)
+    return record
+
+def tune_tickers(tickers, trials=TUNING_TRIALS, processes=TUNING_PROCESSES, hours=TUNING_HOURS):
+    """Search hyperparameters for a watchlist, yielding each ticker's search record as it finishes.
+    
+    Every ticker's bars are downloaded once and shipped with each of its trials to a spawned
+    process pool. Trials are submitted round-robin across tickers, so all of them get their
+    first configurations scored before any gets its last. Scored trials are saved as they
+    arrive and reused by the next run while the bars are unchanged; after `hours` no new
+    trials start and the partial searches are saved as they are.
+    """
+    deadline = time.monotonic() + hours * 3600 if hours else None
+    configs = tuning_configs(trials)
+    prefetch_histories(tickers, TUNING_HISTORY_PERIOD)
+    
+    searches = {}
+    for ticker in tickers:
+        try:
+            dates, values = tuning_data(ticker)
+        except Exception as e:
+            yield {'ticker': ticker, 'status': 'error', 'error': str(e)}
+            continue
+        fingerprint = {'last_date': str(pd.Timestamp(dates[-1]).date()), 'rows': len(values),
+                       'folds': TUNING_FOLDS, 'fold_days': TUNING_FOLD_DAYS}
+        record = tuning_store.load(ticker)
+        if not record or record.get('data') != fingerprint:
+            # New bars: score again, but /predict keeps the previous best until this search finishes
+            previous = {key: record[key] for key in ('best', 'default_score', 'tuned_at') if record and key in record}
+            record = {'ticker': ticker, 'data': fingerprint, 'trials': {}, **previous}
+        todo = [config for config in configs if tuning_key(config) not in record['trials']]
+        if todo:
+            searches[ticker] = {'dates': dates, 'values': values, 'record': record, 'todo': todo, 'left': len(todo)}
+        else:
+            print(f"All {len(configs)} trials for {ticker} already scored on these bars")
+            yield finish_tuning(ticker, record, True)
+    
+    order = [(ticker, search['todo'][i]) for i in range(len(configs))
+             for ticker, search in searches.items() if i < len(search['todo'])]
+    print(f"Tuning {len(searches)} ticker(s): {len(order)} trials in {processes} process(es)")
+    pending = {}
+    position = 0
+    # Spawn rather than fork: forking a threaded process with TensorFlow loaded is unsafe
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_batch_worker_init, initargs=(BATCH_TF_THREADS,)) as pool:
+        while True:
+            # One trial queued behind each running one; the rest are submitted as slots free up
+            while (position < len(order) and len(pending) < processes * 2 and
+                   (deadline is None or time.monotonic() < deadline)):
+                ticker, config = order[position]
+                position += 1
+                search = searches[ticker]
+                pending[pool.submit(_tuning_trial, search['dates'], search['values'], config,
+                                    TUNING_FOLDS, TUNING_FOLD_DAYS, TUNING_SEED)] = (ticker, config)
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                ticker, config = pending.pop(future)
+                try:
+                    trial = future.result()
+                except Exception as e:
+                    trial = {'error': f"Worker failed: {e}"}
+                    if isinstance(e, BrokenProcessPool):
+                        # Every queued trial fails with it; keep what was scored
+                        deadline = time.monotonic()
+                search = searches[ticker]
+                search['record']['trials'][tuning_key(config)] = {'config': config, **trial}
+                tuning_store.save(ticker, search['record'])
+                search['left'] -= 1
+                if 'score' in trial:
+                    print(f"{ticker} {tuning_key(config)}: RMSE ${trial['score']:.3f} ({trial['seconds']:.1f}s)")
+                else:
+                    print(f"{ticker} {tuning_key(config)} failed: {trial['error']}")
+                if search['left'] == 0:
+                    yield finish_tuning(ticker, searches.pop(ticker)['record'], True)
+    
+    if searches:
+        print(f"Tuning time is up, saving partial searches for {len(searches)} ticker(s)")
+    for ticker, search in searches.items():
+        yield finish_tuning(ticker, search['record'], False)
+
+def queue_prediction(data):
+    """Validate a prediction request and queue its job; returns (job, None) or (None, error response)"""
+    ticker = data.get('ticker', 'AAPL').upper()
+    engine = data.get('engine', MODEL_ENGINE)
+    
+    if engine not in MODEL_ENGINES:
+        return None, (jsonify({'error': f'Unknown engine "{engine}", expected one of {", ".join(MODEL_ENGINES)}'}), 400)
+    try:
+        horizons = parse_horizons(data.get('horizons'))
+        lookback = parse_lookback(data.get('lookback'))
+        budget = parse_budget(data.get('budget'))
+    except ValueError as e:
+        return None, (jsonify({'error': str(e)}), 400)
+    if engine != 'fast' and component_status['tensorflow']['status'] == 'error':
+        return None, (jsonify({'error': f"TensorFlow failed to load: {component_status['tensorflow']['error']}"}), 503)
+    
+    try:
+        job = job_manager.submit(ticker, {'refresh': bool(data.get('refresh', False)), 'engine': engine,
+                                          'horizons': horizons, 'lookback': lookback, 'budget': budget})
+    except queue.Full:
+        response = jsonify({'error': 'Prediction queue is full, please retry shortly'})
+        response.headers['Retry-After'] = '5'
+        return None, (response, 503)
+    return job, None
+
+def prediction_request_from_args(args):
+    """Turn /predict/stream query parameters into the JSON body /predict accepts"""
+    data = {key: args[key] for key in ('ticker', 'engine') if args.get(key)}
+    flag = lambda value: value.lower() in ('1', 'true', 'yes')
+    if args.get('refresh'):
+        data['refresh'] = flag(args['refresh'])
+    horizons = args.get('horizons')
+    if horizons:
+        try:
+            data['horizons'] = [int(h) for h in horizons.split(',')]
+        except ValueError:
+            data['horizons'] = flag(horizons) or None
+    for key, convert in (('lookback', int), ('budget', float)):
+        if args.get(key):
+            try:
+                data[key] = convert(args[key])
+            except ValueError:
+                data[key] = args[key]
+    return data
+
+def sse_event(event_id, event, data):
+    """One Server-Sent Events message"""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def cancel_if_abandoned(job):
+    """Cancel a job that is still running with no event stream attached"""
+    with job.events_changed:
+        abandoned = job.streams == 0 and job.finished is None
+    if abandoned:
+        print(f"No event stream reattached to job {job.id[:8]}, cancelling {job.ticker}")
+        job_manager.cancel(job.id)
+
+def stream_job_events(job, after=0, cancel_on_disconnect=False):
+    """Yield a job's events as SSE messages until it finishes.
+    
+    Keep-alive comments go out every SSE_HEARTBEAT_SECONDS, which is also how soon a
+    closed connection is noticed. With cancel_on_disconnect the job is then cancelled
+    unless a stream reattaches (GET /jobs/<id>/events) within SSE_DISCONNECT_GRACE_SECONDS.
+    """
+    finished = False
+    with job.events_changed:
+        job.streams += 1
+    try:
+        yield f"retry: {SSE_HEARTBEAT_SECONDS * 1000}\n\n"
+        while True:
+            events = job.wait_events(after, SSE_HEARTBEAT_SECONDS)
+            if not events:
+                yield ': keep-alive\n\n'
+                continue
+            for event_id, event, data in events:
+                after = event_id
+                yield sse_event(event_id, event, data)
+                if event in JOB_TERMINAL_EVENTS:
+                    finished = True
+                    return
+    finally:
+        with job.events_changed:
+            job.streams -= 1
+        if cancel_on_disconnect and not finished and job.finished is None:
+            print(f"Event stream for job {job.id[:8]} closed, cancelling {job.ticker} "
+                  f"unless it reconnects within {SSE_DISCONNECT_GRACE_SECONDS}s")
+            timer = threading.Timer(SSE_DISCONNECT_GRACE_SECONDS, cancel_if_abandoned, args=(job,))
+            timer.daemon = True
+            timer.start()
+
+def event_stream_response(events):
+    response = Response(stream_with_context(events), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Don't let a reverse proxy hold events back
+    return response
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    """Queue a prediction with sentiment analysis and return its job id.
+    
+    Body: ticker, engine (keras, fast, sequence or ensemble), horizons, lookback, budget
+    (seconds training has to fit in, cutting epochs or falling back to ridge regression) and
+    refresh. The keras engine uses the ticker's tuned settings from --tune when there are any,
+    otherwise 2y of data and up to 50 epochs.
+    """
+    job, error = queue_prediction(request.get_json() or {})
+    if error:
+        return error
+    
+    return jsonify({
+        'status': 'queued',
+        'job_id': job.id,
+        'status_url': f'/jobs/{job.id}',
+        'events_url': f'/jobs/{job.id}/events'
+    }), 202
+
+@app.route('/predict/stream')
+def predict_stream():
+    """Queue a prediction (same options as /predict, as query parameters) and stream its progress as SSE.
+    
+    Events: job, stage, news, data, epoch, chart, then result, error or cancelled.
+    Closing the stream cancels the prediction unless /jobs/<job_id>/events picks it
+    up within SSE_DISCONNECT_GRACE_SECONDS.
+    """
+    job, error = queue_prediction(prediction_request_from_args(request.args))
+    if error:
+        return error
+    
+    def events():
+        yield sse_event(0, 'job', {'job_id': job.id, 'ticker': job.ticker, 'status_url': f'/jobs/{job.id}'})
+        yield from stream_job_events(job, cancel_on_disconnect=True)
+    
+    return event_stream_response(events())
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Predict a list of tickers, streaming one JSON line per ticker as each completes"""
+    data = request.get_json() or {}
+    tickers = list(dict.fromkeys(str(t).strip().upper() for t in data.get('tickers', []) if str(t).strip()))
+    use_sentiment = bool(data.get('sentiment', True))
+    engine = data.get('engine', MODEL_ENGINE)
+    
+    if not tickers:
+        return jsonify({'error': 'Provide a non-empty "tickers" list'}), 400
+    if engine not in MODEL_ENGINES:
+        return jsonify({'error': f'Unknown engine "{engine}", expected one of {", ".join(MODEL_ENGINES)}'}), 400
+    if len(tickers) > BATCH_MAX_TICKERS:
+        return jsonify({'error': f'At most {BATCH_MAX_TICKERS} tickers per batch'}), 400
+    
+    def generate():
+        started = time.time()
+        completed = failed = 0
+        for result in run_batch_predictions(tickers, '2y', 50, use_sentiment, engine):
+            if result['status'] == 'success':
+                completed += 1
+            else:
+                failed += 1
+            yield json.dumps(result) + '\n'
+        yield json.dumps({
+            'status': 'done',
+            'tickers': len(tickers),
+            'completed': completed,
+            'failed': failed,
+            'seconds': time.time() - started
+        }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Get the stage and result of a prediction job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    response = jsonify(job.to_dict())
+    if SERVER_TIMING_HEADER and job.finished and job.started:
+        # Break down the job's own run rather than this polling request
+        response.headers['Server-Timing'] = server_timing_header(job.timings, job.finished - job.started)
+    return response
+
+@app.route('/jobs/<job_id>/events')
+def get_job_events(job_id):
+    """Stream a job's progress as SSE, resuming after Last-Event-ID (or ?after=); disconnecting does not cancel it"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    try:
+        # EventSource only sends Last-Event-ID on its own retries, so a new one passes ?after=
+        after = max(int(request.headers.get('Last-Event-ID') or request.args.get('after') or 0), 0)
+    except ValueError:
+        after = 0
+    return event_stream_response(stream_job_events(job, after))
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running prediction job"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.to_dict())
+
+def find_result_entry(args):
+    """Resolve ?id= (request/job id) or ?ticker= to a stored result, defaulting to the latest overall"""
+    if args.get('id'):
+        return result_store.get(args['id'])
+    if args.get('ticker'):
+        return result_store.latest(args['ticker'].upper())
+    return result_store.latest()
 
 @app.route('/graph')
 def get_graph():
-    """Get the latest prediction graph"""
-    if latest_results.get('graph'):
-        return jsonify({'image': latest_results['graph']})
-    else:
+    """Redirect to the chart of a stored prediction (?id= or ?ticker=, default: latest)"""
+    args = request.args.to_dict()
+    entry = find_result_entry(args)
+    if entry is None or entry['series'] is None:
         return jsonify({'error': 'No graph available'}), 404
+    args.pop('id', None)
+    args.pop('ticker', None)
+    url = entry['data']['graph_url']
+    if args:
+        url += '?' + urlencode(args)
+    return redirect(url)
+
+@app.route('/graph/<ticker>/<prediction_id>')
+def get_prediction_graph(ticker, prediction_id):
+    """Serve a prediction chart as PNG/SVG (?format=, ?dpi=) or as JSON data (?mode=series)"""
+    entry = result_store.for_prediction(prediction_id)
+    if entry is None or entry['ticker'] != ticker.upper():
+        return jsonify({'error': 'No graph available'}), 404
+    
+    if request.args.get('mode') == 'series':
+        return jsonify(entry['series'])
+    
+    fmt = request.args.get('format', 'png').lower()
+    if fmt not in CHART_FORMATS:
+        return jsonify({'error': f'Unsupported format "{fmt}", expected one of {", ".join(CHART_FORMATS)}'}), 400
+    try:
+        dpi = min(max(int(request.args.get('dpi', CHART_DPI)), 30), CHART_MAX_DPI)
+    except ValueError:
+        return jsonify({'error': 'dpi must be an integer'}), 400
+    
+    # The URL names the exact prediction, so the image never changes
+    etag = f'{prediction_id}-{dpi}-{fmt}'
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        image = result_store.graph(prediction_id, fmt, dpi)
+        if image is None:
+            return jsonify({'error': 'No graph available'}), 404
+        response = Response(image, mimetype=CHART_FORMATS[fmt])
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=86400, immutable'
+    return response
 
 @app.route('/status')
 def status():
-    """Get API status"""
-    return jsonify({
+    """Get API status, plus a stored prediction when ?id= or ?ticker= is given"""
+    latest = result_store.latest()
+    status_data = {
         'status': 'running',
         'dependencies_available': DEPENDENCIES_AVAILABLE,
-        'latest_prediction_status': latest_results['status'],
-        'latest_prediction_time': latest_results['timestamp']
-    })
+        'ready': all(component['status'] == 'ready' for component in component_status.values()),
+        'components': component_status,
+        'finbert_backend': finbert_backend,
+        'sentiment_cache': sentiment_cache.stats(),
+        'news_archive': news_archive.stats(),
+        'market_data': MARKET_DATA,
+        'tuning': tuning_store.stats(),
+        'jobs': job_manager.stats(),
+        'results': result_store.stats(),
+        'latest_prediction_status': latest['status'] if latest else 'ready',
+        'latest_prediction_time': latest['timestamp'] if latest else None
+    }
+    
+    if request.args.get('id') or request.args.get('ticker'):
+        entry = find_result_entry(request.args)
+        if entry is None:
+            return jsonify({'error': 'No prediction found'}), 404
+        status_data['prediction'] = ResultStore.summary(entry)
+    
+    return jsonify(status_data)
 
-def open_browser():
+@app.route('/tuning/<ticker>')
+def get_tuning(ticker):
+    """Hyperparameter search record for a ticker (run with --tune)"""
+    record = tuning_store.load(ticker.upper())
+    if record is None:
+        return jsonify({'error': f'{ticker.upper()} has not been tuned'}), 404
+    return jsonify(record)
+
+@metrics.collector
+def service_metrics():
+    jobs = job_manager.stats()
+    results = result_store.stats()
+    return [
+        ('jobs_queued', 'gauge', {}, jobs['queued']),
+        ('jobs_running', 'gauge', {}, jobs['running']),
+        ('result_store_entries', 'gauge', {}, results['entries']),
+        ('result_store_bytes', 'gauge', {}, results['bytes'])
+    ] + [
+        ('component_ready', 'gauge', {'component': name}, int(component['status'] == 'ready'))
+        for name, component in component_status.items()
+    ]
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus text-format metrics"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def open_browser(url):
     """Open browser after a delay"""
     time.sleep(2)
-    webbrowser.open('http://localhost:5000')
+    webbrowser.open(url)
+
+def run_tuning(args):
+    """Tune the --tune watchlist and print a summary line per ticker"""
+    if os.path.isfile(args.tune):
+        with open(args.tune) as f:
+            tickers = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    else:
+        tickers = args.tune.split(',')
+    tickers = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers if ticker.strip()))
+    
+    started = time.time()
+    print(f"🎛️ Tuning {len(tickers)} ticker(s), {args.tune_trials or 'all'} trials each, "
+          f"{args.tune_processes} process(es), {args.tune_hours:g}h limit")
+    for record in tune_tickers(tickers, args.tune_trials, max(1, args.tune_processes), args.tune_hours):
+        if record['status'] != 'success':
+            print(f"❌ {record['ticker']}: {record['error']}")
+            continue
+        best = record['best']
+        default = f", default ${record['default_score']:.3f}" if record.get('default_score') is not None else ''
+        partial = '' if record['complete'] else ' (partial)'
+        print(f"✅ {record['ticker']}: {tuning_key(best['config'])} RMSE ${best['score']:.3f}{default}, "
+              f"naive ${best['naive_score']:.3f}{partial}")
+    print(f"🏁 Tuning finished in {(time.time() - started) / 60:.1f} min; results in {tuning_store.root}")
 
 def main():
     """Main function to start the application"""
+    global FINBERT_BACKEND, FINBERT_THREADS, MARKET_DATA, MARKET_DATA_DIR, MARKET_DATA_LATENCY_MS, market_data
+    
+    parser = argparse.ArgumentParser(description="Stock Price Prediction Dashboard")
+    parser.add_argument('--host', default='0.0.0.0', help="Interface to bind (default: 0.0.0.0)")
+    parser.add_argument('--port', type=int, default=5000, help="Port to listen on (default: 5000)")
+    parser.add_argument('--no-browser', action='store_true', help="Don't open a browser window")
+    parser.add_argument('--finbert-backend', choices=FINBERT_BACKENDS, default=FINBERT_BACKEND,
+                        help=f"FinBERT inference backend (default: {FINBERT_BACKEND})")
+    parser.add_argument('--finbert-threads', type=int, default=FINBERT_THREADS,
+                        help="PyTorch threads for FinBERT (default: PyTorch's choice)")
+    parser.add_argument('--market-data', choices=MARKET_DATA_PROVIDERS, default=MARKET_DATA,
+                        help=f"Where prices, company info and news come from (default: {MARKET_DATA})")
+    parser.add_argument('--market-data-dir', default=MARKET_DATA_DIR,
+                        help=f"Recordings directory for --market-data replay/record (default: {MARKET_DATA_DIR})")
+    parser.add_argument('--market-data-latency-ms', type=float, default=MARKET_DATA_LATENCY_MS,
+                        help="Delay added to every replayed call (default: 0)")
+    parser.add_argument('--tune', metavar='TICKERS',
+                        help="Tune hyperparameters for comma-separated tickers (or a file with one per line) and exit")
+    parser.add_argument('--tune-trials', type=int, default=TUNING_TRIALS,
+                        help=f"Configurations scored per ticker, 0 for the whole grid (default: {TUNING_TRIALS})")
+    parser.add_argument('--tune-processes', type=int, default=TUNING_PROCESSES,
+                        help=f"Training processes (default: {TUNING_PROCESSES})")
+    parser.add_argument('--tune-hours', type=float, default=TUNING_HOURS,
+                        help=f"Stop starting trials after this many hours, 0 for no limit (default: {TUNING_HOURS:g})")
+    args = parser.parse_args()
+    FINBERT_BACKEND, FINBERT_THREADS = args.finbert_backend, args.finbert_threads
+    MARKET_DATA, MARKET_DATA_DIR = args.market_data, args.market_data_dir
+    MARKET_DATA_LATENCY_MS = args.market_data_latency_ms
+    # Batch worker processes build their own provider from the environment
+    os.environ.update({'MARKET_DATA': MARKET_DATA, 'MARKET_DATA_DIR': os.path.abspath(MARKET_DATA_DIR),
+                       'MARKET_DATA_LATENCY_MS': str(MARKET_DATA_LATENCY_MS)})
+    try:
+        market_data = create_market_data_provider()
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    
     print("🚀 Starting Enhanced Stock Price Prediction Dashboard...")
     print(f"✅ Dependencies available: {DEPENDENCIES_AVAILABLE}")
+    if MARKET_DATA != 'yfinance':
+        print(f"📼 Market data: {MARKET_DATA} ({os.path.abspath(MARKET_DATA_DIR)})")
     
-    # Initialize FinBERT
-    print("🧠 Initializing FinBERT for sentiment analysis...")
-    finbert_ready = initialize_finbert()
+    if args.tune:
+        run_tuning(args)
+        return
+    
+    # Load FinBERT and TensorFlow in the background so the server answers immediately
+    print("🧠 Loading FinBERT and TensorFlow in the background (see /status for readiness)...")
+    threading.Thread(target=warm_up_components, name='warm-up', daemon=True).start()
     
     print("\n📊 Enhanced Features:")
     print("  - Universal stock prediction (any Yahoo Finance ticker)")
     print("  - Real-time news sentiment analysis with FinBERT")
-    print("  - Fixed optimal parameters: 2 years data, 50 epochs")
+    print(f"  - 2 years of data, up to 50 epochs (or each ticker's --tune result) within a {PREDICTION_BUDGET_SECONDS:.0f}s budget")
     print("  - Yahoo Finance news integration")
     print("  - Company sector analysis")
     print("  - Sentiment-enhanced AI predictions")
     print("  - Single-file deployment")
     
-    if finbert_ready:
-        print("✅ FinBERT sentiment analysis ready")
-    else:
-        print("⚠️ FinBERT not available, using neutral sentiment")
-    
     print("\n🌐 Starting web server...")
-    print("📱 Opening browser in 2 seconds...")
     
     # Start browser in background
-    threading.Thread(target=open_browser, daemon=True).start()
+    if not args.no_browser:
+        print("📱 Opening browser in 2 seconds...")
+        threading.Thread(target=open_browser, args=(f'http://localhost:{args.port}',), daemon=True).start()
     
     # Start Flask app
     try:
-        app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+        app.run(host=args.host, port=args.port, debug=False, threaded=True)
     except KeyboardInterrupt:
         print("\n👋 Application stopped by user. Goodbye!")
     except Exception as e:
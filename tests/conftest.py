@@ -0,0 +1,60 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the price store, model registry and caches out of the user's cache directory
+CACHE_DIR = tempfile.mkdtemp(prefix='stock-predictor-test-')
+os.environ['STOCK_PREDICTOR_CACHE'] = CACHE_DIR
+
+import stock_predictor as sp  # noqa: E402
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+def bars(end='2026-10-16', rows=30, tz=None):
+    """Daily OHLCV bars at midnight, timezone-aware like Ticker.history() when tz is given"""
+    index = pd.bdate_range(end=end, periods=rows, name='Date')
+    if tz:
+        index = index.tz_localize(tz)
+    close = np.linspace(100, 130, rows)
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': 1e6}, index=index)
+
+class MixedTimezoneProvider(sp.MarketDataProvider):
+    """Single-ticker bars with the exchange timezone and bulk bars without, as yfinance returns them"""
+    name = 'mixed'
+
+    def __init__(self):
+        self.end = '2026-10-16'
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def history(self, ticker, period=None, start=None):
+        with self.lock:
+            self.calls.append(('history', ticker))
+        frame = bars(self.end, tz='America/New_York')
+        if start is not None:
+            frame = frame[frame.index >= pd.Timestamp(start).tz_localize('America/New_York')]
+        return frame
+
+    def bulk_history(self, tickers, period='2y', start=None):
+        with self.lock:
+            self.calls.append(('bulk_history', tuple(tickers)))
+        return {ticker: bars(self.end) for ticker in tickers}
+
+@pytest.fixture
+def provider(monkeypatch, tmp_path):
+    provider = MixedTimezoneProvider()
+    monkeypatch.setattr(sp, 'market_data', provider)
+    monkeypatch.setattr(sp, 'price_store', sp.PriceStore(str(tmp_path / 'prices')))
+    monkeypatch.setattr(sp.history_batcher, 'window', 0)
+    return provider
@@ -0,0 +1,70 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import stock_predictor as sp
+
+def test_results_stream_before_all_news_is_fetched(monkeypatch):
+    slow_news = threading.Event()
+
+    def news_snapshot(ticker):
+        if ticker == 'SLOW':
+            slow_news.wait(10)
+        return {'overall_sentiment': 0.0}
+
+    def predict_ticker(ticker, period, epochs, sentiment_score, engine='keras'):
+        return {'ticker': ticker, 'status': 'success'}
+
+    monkeypatch.setattr(sp, 'prefetch_histories', lambda tickers, period: None)
+    monkeypatch.setattr(sp, 'get_news_snapshot', news_snapshot)
+    monkeypatch.setattr(sp, '_batch_predict_ticker', predict_ticker)
+    monkeypatch.setattr(sp, 'get_batch_pool', lambda broken=None: pool)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = sp.run_batch_predictions(['FAST1', 'SLOW', 'FAST2'])
+        started = time.monotonic()
+        first = [next(results), next(results)]
+        # Both fast tickers arrive while the slow ticker's news is still being fetched
+        assert not slow_news.is_set()
+        assert time.monotonic() - started < 5
+        slow_news.set()
+        rest = list(results)
+
+    assert sorted(result['ticker'] for result in first) == ['FAST1', 'FAST2']
+    assert [result['ticker'] for result in rest] == ['SLOW']
+
+def crash_or_predict(ticker, period, epochs, sentiment_score, engine='keras'):
+    """Batch worker stand-in that kills its process for CRASH"""
+    if ticker == 'CRASH':
+        os._exit(1)
+    time.sleep(0.2)
+    return {'ticker': ticker, 'status': 'success'}
+
+def test_crashed_worker_only_fails_the_ticker_that_crashed_it(monkeypatch):
+    pools = []
+
+    def get_batch_pool(broken=None):
+        if not pools or pools[-1] is broken:
+            pools.append(ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn')))
+        return pools[-1]
+
+    monkeypatch.setattr(sp, 'prefetch_histories', lambda tickers, period: None)
+    monkeypatch.setattr(sp, '_batch_predict_ticker', crash_or_predict)
+    monkeypatch.setattr(sp, 'get_batch_pool', get_batch_pool)
+    monkeypatch.setattr(sp, 'BATCH_PROCESSES', 2)
+    tickers = ['AAA', 'BBB', 'CRASH', 'CCC', 'DDD', 'EEE', 'FFF']
+
+    try:
+        results = {result['ticker']: result for result in sp.run_batch_predictions(tickers, use_sentiment=False)}
+    finally:
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    assert sorted(results) == sorted(tickers)
+    assert results['CRASH']['status'] == 'error'
+    assert 'crashed' in results['CRASH']['error']
+    assert all(results[ticker]['status'] == 'success' for ticker in tickers if ticker != 'CRASH')
+    # The first pool broke, and so did the one CRASH was isolated in
+    assert len(pools) >= 2
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import stock_predictor as sp
+
+def test_targets_repeat_once_per_member_in_member_order():
+    y = np.array([[1, 10], [2, 20], [3, 30]], dtype=np.float64)
+    targets = sp.ensemble_targets(y, 3)
+
+    assert targets.dtype == np.float32
+    assert targets.shape == (3, 6)
+    np.testing.assert_array_equal(targets[1], [2, 20, 2, 20, 2, 20])
+    np.testing.assert_array_equal(sp.ensemble_targets(np.array([1.0, 2.0]), 2), [[1, 1], [2, 2]])
+
+@pytest.fixture(scope='module')
+def ensemble():
+    """A 3-member ensemble trained briefly on a noisy linear target"""
+    sp.keras.utils.set_random_seed(0)
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 1, (64, 6)).astype(np.float32)
+    y = X @ rng.uniform(0, 1, 6).astype(np.float32) / 6
+    model, history = sp.create_and_train_ensemble_model(X, y, members=3, epochs=3)
+    return model, history, X
+
+def test_members_are_trained_together_with_their_own_weights(ensemble):
+    model, history, X = ensemble
+    members = sp.predict_rows(model, X[:8])
+
+    assert members.shape == (8, 3)
+    assert len(history.epoch) == 3
+    # Independently initialized members disagree
+    assert members.std(axis=1).min() > 0
+
+def test_numpy_inference_matches_keras(ensemble):
+    model, _, X = ensemble
+    forward = sp.DenseInference.from_model(model)
+
+    assert forward is not None
+    np.testing.assert_allclose(forward(X[:5]), model(X[:5], training=False).numpy(), rtol=1e-4, atol=1e-5)
+
+def test_forecast_averages_the_members_and_reports_their_spread(ensemble):
+    model, _, X = ensemble
+    scaler = sp.MinMaxScaler().fit(np.column_stack([X, np.linspace(100, 200, len(X))]))
+    last_date = sp.pd.Timestamp('2026-10-16')
+
+    forecasts = sp.make_horizon_predictions(model, X, scaler, last_date, [1], 'AAPL')
+    members = sp.predict_rows(model, X[-1:])[0]
+
+    assert forecasts[0]['date'] == sp.pd.Timestamp('2026-10-19')
+    assert forecasts[0]['price'] == pytest.approx(100 + members.mean() * 100, rel=1e-5)
+    assert forecasts[0]['spread'] == pytest.approx(members.std() * 100, rel=1e-4)
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import stock_predictor as sp
+
+@pytest.fixture
+def gated(provider, monkeypatch):
+    """The provider's single-ticker download of GATE blocks until released, keeping a download in flight"""
+    release = threading.Event()
+    entered = threading.Event()
+    history = provider.history
+
+    def gated_history(ticker, period=None, start=None):
+        if ticker == 'GATE':
+            entered.set()
+            release.wait(5)
+        return history(ticker, period=period, start=start)
+
+    monkeypatch.setattr(provider, 'history', gated_history)
+    yield entered, release
+    release.set()
+
+def run_threads(target, args):
+    threads = [threading.Thread(target=target, args=(arg,)) for arg in args]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def test_requests_made_during_a_download_share_one_bulk_download(provider, gated, monkeypatch):
+    entered, release = gated
+    monkeypatch.setattr(sp.history_batcher, 'window', 5)
+    monkeypatch.setattr(sp.history_batcher, 'max_size', 2)
+    frames = {}
+
+    def fetch(ticker):
+        frames[ticker] = sp.download_history(ticker, period='2y')
+
+    # Nothing is in flight, so the first request goes out on its own straight away
+    first = run_threads(fetch, ['GATE'])
+    assert entered.wait(5)
+    # These two arrive while it downloads and are coalesced (the batch fills at max_size)
+    others = run_threads(fetch, ['AAA', 'BBB'])
+    for thread in others:
+        thread.join(5)
+    release.set()
+    for thread in first:
+        thread.join(5)
+    # Once everything has finished, a lone request is downloaded on its own again
+    single = sp.download_history('AAA', period='2y')
+
+    # GATE's call is only recorded once it is released, after the batch has gone out
+    assert provider.calls == [('bulk_history', ('AAA', 'BBB')), ('history', 'GATE'), ('history', 'AAA')]
+    expected = pd.bdate_range(end='2026-10-16', periods=30, name='Date')
+    for frame in (frames['GATE'], frames['AAA'], frames['BBB'], single):
+        assert frame.index.tz is None
+        pd.testing.assert_index_equal(frame.index, expected)
+
+def test_lone_request_does_not_wait_for_the_window(provider, monkeypatch):
+    monkeypatch.setattr(sp.history_batcher, 'window', 5)
+    started = time.monotonic()
+    frame = sp.download_history('AAA', period='2y')
+
+    assert time.monotonic() - started < 1
+    assert provider.calls == [('history', 'AAA')]
+    assert len(frame) == 30
+
+def test_incremental_requests_are_never_batched(provider, gated, monkeypatch):
+    entered, release = gated
+    monkeypatch.setattr(sp.history_batcher, 'window', 5)
+    first = run_threads(lambda ticker: sp.download_history(ticker, period='2y'), ['GATE'])
+    assert entered.wait(5)
+
+    started = time.monotonic()
+    frame = sp.download_history('AAA', start=pd.Timestamp('2026-10-12'))
+    assert time.monotonic() - started < 1
+    release.set()
+    for thread in first:
+        thread.join(5)
+
+    assert ('history', 'AAA') in provider.calls
+    assert list(frame.index) == list(pd.bdate_range('2026-10-12', '2026-10-16'))
+
+def test_unbatched_and_bulk_downloads_return_the_same_dates(provider):
+    single = sp.download_history('AAA', period='2y')
+    bulk = sp.bulk_download_history(['AAA'], '2y')['AAA']
+
+    assert single.index.tz is None and bulk.index.tz is None
+    pd.testing.assert_index_equal(single.index, bulk.index)
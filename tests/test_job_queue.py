@@ -0,0 +1,115 @@
+import threading
+
+import pytest
+
+import stock_predictor as sp
+
+class StubResultStore:
+    def __init__(self):
+        self.entries = []
+
+    def put(self, job_id, ticker, status, **kwargs):
+        self.entries.append((job_id, ticker, status))
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """A prediction pipeline that reports one stage and then waits until released"""
+    started = threading.Event()
+    release = threading.Event()
+
+    def run(ticker, job=None, **kwargs):
+        job.set_stage('training')
+        started.set()
+        release.wait(5)
+        job.set_stage('predicting')
+        return {'ticker': ticker, 'graph_url': '/chart'}, {'prediction_id': job.id}
+
+    monkeypatch.setattr(sp, 'run_prediction_pipeline', run)
+    monkeypatch.setattr(sp, 'result_store', StubResultStore())
+    yield started, release
+    release.set()
+
+def terminal_events(job):
+    return [event for _, event, _ in job.events if event in ('result', 'cancelled', 'error')]
+
+def wait_finished(job):
+    for _ in range(500):
+        if job.finished is not None:
+            return
+        job.wait_events(len(job.events), 0.01)
+    raise AssertionError(f'{job.ticker} did not finish')
+
+def test_full_queue_is_rejected_with_503(pipeline, monkeypatch):
+    started, release = pipeline
+    manager = sp.JobManager(workers=1, depth=1)
+    monkeypatch.setattr(sp, 'job_manager', manager)
+    running = manager.submit('AAA')
+    assert started.wait(5)
+    manager.submit('BBB')
+    with pytest.raises(sp.queue.Full):
+        manager.submit('CCC')
+
+    response = sp.app.test_client().post('/predict', json={'ticker': 'DDD', 'engine': 'fast'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    release.set()
+    wait_finished(running)
+
+def test_cancelling_a_queued_job_never_runs_it(pipeline):
+    started, release = pipeline
+    manager = sp.JobManager(workers=1, depth=2)
+    running = manager.submit('AAA')
+    assert started.wait(5)
+    queued = manager.submit('BBB')
+    assert manager.cancel(queued.id) is queued
+    release.set()
+    wait_finished(running)
+    manager.queue.join()
+
+    assert queued.status == 'cancelled' and queued.started is None
+    assert terminal_events(queued) == ['cancelled']
+    assert running.status == 'completed' and terminal_events(running) == ['result']
+
+def test_cancelling_a_running_job_stops_it_at_the_next_stage(pipeline):
+    started, release = pipeline
+    manager = sp.JobManager(workers=1, depth=1)
+    job = manager.submit('AAA')
+    assert started.wait(5)
+    manager.cancel(job.id)
+    assert job.status == 'cancelling'
+    release.set()
+    wait_finished(job)
+
+    assert job.status == 'cancelled'
+    assert terminal_events(job) == ['cancelled']
+    assert manager.cancel('unknown') is None
+
+class SlowCheckEvent(threading.Event):
+    """Cancel flag whose first check from a worker is slow, widening the check-then-start window"""
+
+    def __init__(self):
+        super().__init__()
+        self.checked = threading.Event()
+
+    def is_set(self):
+        value = super().is_set()
+        if threading.current_thread().name.startswith('prediction-worker') and not self.checked.is_set():
+            self.checked.set()
+            sp.time.sleep(0.2)
+        return value
+
+def test_cancel_while_the_worker_picks_up_the_job_emits_one_terminal_event(pipeline):
+    started, release = pipeline
+    manager = sp.JobManager(workers=1, depth=2)
+    first = manager.submit('AAA')
+    assert started.wait(5)
+    job = manager.submit('BBB')
+    job.cancel_event = SlowCheckEvent()
+    release.set()
+    assert job.cancel_event.checked.wait(5)
+    manager.cancel(job.id)
+    manager.queue.join()
+
+    # Depending on timing the job is stopped or finishes first, but it ends exactly once
+    assert first.status == 'completed'
+    assert (job.status, terminal_events(job)) in (('cancelled', ['cancelled']), ('completed', ['result']))
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+import stock_predictor as sp
+
+def test_counters_gauges_and_histograms_render_as_prometheus_text():
+    metrics = sp.Metrics(prefix='test', buckets=(0.1, 1))
+    metrics.describe('requests_total', 'counter', 'Requests served')
+    metrics.inc('requests_total', endpoint='/predict')
+    metrics.inc('requests_total', 2, endpoint='/predict')
+    metrics.add('in_flight', 1)
+    metrics.add('in_flight', -1)
+    metrics.observe('latency_seconds', 0.05, stage='news')
+    metrics.observe('latency_seconds', 0.5, stage='news')
+    metrics.collector(lambda: [('queued', 'gauge', {'queue': 'jobs'}, 3)])
+
+    lines = metrics.render().splitlines()
+
+    assert '# HELP test_requests_total Requests served' in lines
+    assert '# TYPE test_requests_total counter' in lines
+    assert 'test_requests_total{endpoint="/predict"} 3' in lines
+    assert 'test_in_flight 0' in lines
+    # Buckets are cumulative and end with +Inf
+    assert 'test_latency_seconds_bucket{stage="news",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{stage="news",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{stage="news",le="+Inf"} 2' in lines
+    assert 'test_latency_seconds_count{stage="news"} 2' in lines
+    assert 'test_queued{queue="jobs"} 3' in lines
+
+def test_label_values_are_escaped():
+    metrics = sp.Metrics(prefix='test')
+    metrics.inc('errors_total', reason='say "hi"\nback\\slash')
+
+    assert 'test_errors_total{reason="say \\"hi\\"\\nback\\\\slash"} 1' in metrics.render().splitlines()
+
+def test_failing_collector_does_not_break_the_scrape():
+    metrics = sp.Metrics(prefix='test')
+    metrics.inc('ok_total')
+    metrics.collector(lambda: 1 / 0)
+
+    assert 'test_ok_total 1' in metrics.render()
+
+def test_concurrent_increments_are_not_lost():
+    metrics = sp.Metrics(prefix='test')
+
+    def work():
+        for _ in range(1000):
+            metrics.inc('hits_total')
+            metrics.observe('seconds', 0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics.counters[('hits_total', ())] == 4000
+    assert metrics.histograms[('seconds', ())]['count'] == 4000
+
+def test_spans_record_thread_timings_and_errors(monkeypatch):
+    metrics = sp.Metrics(prefix='test')
+    monkeypatch.setattr(sp, 'metrics', metrics)
+
+    @sp.span('work')
+    def work(fail=False):
+        time.sleep(0.01)
+        if fail:
+            raise ValueError('boom')
+
+    timings = sp.start_span_timings()
+    work()
+    work()
+    with pytest.raises(ValueError):
+        work(fail=True)
+    assert sp.stop_span_timings() is timings
+
+    assert list(timings) == ['work'] and timings['work'] >= 0.03
+    assert metrics.histograms[('stage_seconds', (('stage', 'work'),))]['count'] == 3
+    assert metrics.counters[('stage_errors_total', (('stage', 'work'),))] == 1
+    # Without a record on this thread spans still feed the histogram
+    work()
+    assert sp.stop_span_timings() == {}
+
+def test_server_timing_header_lists_spans_in_milliseconds():
+    header = sp.server_timing_header({'news snapshot': 0.0123, 'train': 1.5}, total=2)
+
+    assert header == 'news_snapshot;dur=12.3, train;dur=1500.0, total;dur=2000.0'
+
+def test_requests_are_counted_and_timed():
+    client = sp.app.test_client()
+    response = client.get('/metrics')
+    assert response.headers['Server-Timing'].startswith('total;dur=')
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert response.mimetype == 'text/plain'
+    assert 'stock_predictor_http_requests_total{endpoint="/metrics",method="GET",status="200"}' in text
+    assert 'stock_predictor_http_request_seconds_count{endpoint="/metrics",method="GET"}' in text
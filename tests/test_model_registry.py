@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import stock_predictor as sp
+
+class StubModel:
+    """Stands in for a saved Keras model, recording the rows it is fine-tuned on"""
+
+    def __init__(self):
+        self.fitted_rows = 0
+
+    def fit(self, X, y, **kwargs):
+        self.fitted_rows += len(X)
+
+def training_data(rows, tz):
+    index = pd.bdate_range(end='2026-10-16', periods=rows, name='Date')
+    if tz:
+        index = index.tz_localize(tz)
+    rng = np.random.default_rng(0)
+    close = 100 + rng.normal(0, 1, rows).cumsum()
+    data = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': 1e6, 'Sentiment': rng.uniform(-1, 1, rows)}, index=index)
+    data['Tomorrow'] = data['Close'].shift(-1)
+    data = data.dropna()
+    scaler = sp.MinMaxScaler().fit(data[sp.FEATURE_COLUMNS].values)
+    scaled = scaler.transform(data[sp.FEATURE_COLUMNS].values)
+    return data, scaled[:, :-1], scaled[:, -1], scaler
+
+@pytest.mark.parametrize('saved_tz, current_tz', [
+    ('America/New_York', None),
+    (None, 'America/New_York'),
+    ('America/New_York', 'America/New_York'),
+    (None, None)
+])
+@pytest.mark.parametrize('new_bars', [0, 1])
+def test_warm_start_compares_dates_across_timezone_forms(monkeypatch, saved_tz, current_tz, new_bars):
+    data, X, y, scaler = training_data(60, current_tz)
+    saved_last_date = pd.Timestamp(data.index[-1 - new_bars].date())
+    if saved_tz:
+        saved_last_date = saved_last_date.tz_localize(saved_tz)
+    model = StubModel()
+    meta = {
+        'config': {'feature_columns': sp.FEATURE_COLUMNS, 'epochs': 50, 'sentiment': 'daily'},
+        'last_date': saved_last_date.isoformat(),
+        'trained_at': time.time()
+    }
+    monkeypatch.setattr(sp.model_registry, 'load', lambda ticker, variant: (model, scaler, dict(meta)))
+    monkeypatch.setattr(sp.model_registry, 'save', lambda *args: None)
+
+    _, _, _, training = sp.train_or_update_model('TZ', data, X, y, scaler)
+
+    assert training['mode'] == ('incremental' if new_bars else 'cached')
+    assert training['new_rows'] == new_bars
+    assert model.fitted_rows == new_bars
@@ -0,0 +1,44 @@
+import threading
+
+import stock_predictor as sp
+
+def stub_upstream(monkeypatch, news_calls, company_info=None):
+    monkeypatch.setattr(sp, 'get_company_info',
+                        company_info or (lambda ticker: (f'{ticker} Holdings Inc.', 'Technology')))
+    monkeypatch.setattr(sp, 'fetch_yahoo_finance_news',
+                        lambda ticker, company_name=None: news_calls.append((ticker, company_name)) or [])
+    monkeypatch.setattr(sp, 'calculate_news_sentiment', lambda news: (0.0, news))
+    monkeypatch.setattr(sp, 'wait_for_component', lambda name, timeout=None: None)
+    monkeypatch.setattr(sp, 'news_snapshots', {})
+    monkeypatch.setattr(sp, 'news_snapshot_locks', {})
+
+def test_news_is_fetched_while_company_info_is_still_loading(monkeypatch):
+    news_calls = []
+    info_released = threading.Event()
+
+    def slow_company_info(ticker):
+        # Only returns once the news fetch has started, which deadlocks if news waited for it
+        assert info_released.wait(5), 'news fetch did not start before company info finished'
+        return f'{ticker} Holdings Inc.', 'Technology'
+
+    stub_upstream(monkeypatch, news_calls, slow_company_info)
+    monkeypatch.setattr(sp, 'fetch_yahoo_finance_news',
+                        lambda ticker, company_name=None: news_calls.append((ticker, company_name))
+                        or info_released.set() or [])
+
+    snapshot = sp.get_news_snapshot('ACME')
+
+    assert news_calls == [('ACME', None)]
+    assert snapshot['company_name'] == 'ACME Holdings Inc.'
+
+def test_build_locks_are_dropped_with_expired_snapshots(monkeypatch):
+    stub_upstream(monkeypatch, [])
+    for ticker in ('AAA', 'BBB'):
+        sp.get_news_snapshot(ticker)
+    assert set(sp.news_snapshot_locks) == {'AAA', 'BBB'}
+
+    monkeypatch.setattr(sp, 'NEWS_SNAPSHOT_TTL', 0)
+    sp.get_news_snapshot('CCC')
+
+    assert set(sp.news_snapshots) == {'CCC'}
+    assert set(sp.news_snapshot_locks) == {'CCC'}
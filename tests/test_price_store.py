@@ -0,0 +1,61 @@
+import os
+import time
+
+import pandas as pd
+
+import stock_predictor as sp
+from conftest import bars
+
+def test_bulk_and_single_ticker_writes_store_the_same_dates(provider):
+    expected = pd.bdate_range(end='2026-10-16', periods=30)
+
+    # Bulk download (yf.download, no timezone)
+    sp.prefetch_histories(['AAA'], '2y')
+    bulk = sp.price_store.get_history('AAA', '2y')
+
+    # A longer window isn't covered, so the single-ticker path rewrites it (Ticker.history, with timezone)
+    single = sp.price_store.get_history('AAA', '5y')
+
+    # And the bulk path rewrites it again
+    sp.price_store.store_history('AAA', sp.bulk_download_history(['AAA'], '5y')['AAA'], '5y')
+    bulk_again = sp.price_store.get_history('AAA', '5y')
+
+    for frame in (bulk, single, bulk_again):
+        assert frame.index.tz is None
+        assert list(frame.index) == list(expected)
+    assert bulk.index[-1] == single.index[-1] == bulk_again.index[-1]
+
+def test_single_ticker_refresh_appends_to_bulk_written_bars(provider):
+    sp.prefetch_histories(['BBB'], '2y')
+    provider.end = '2026-10-20'
+    meta = sp.price_store._read_meta('BBB')
+    meta['checked_at'] = time.time() - sp.PRICE_STORE_REFRESH_SECONDS
+    sp.price_store._write_meta('BBB', meta)
+
+    frame = sp.price_store.get_history('BBB', '2y')
+
+    assert frame.index.tz is None
+    assert frame.index.is_unique and frame.index.is_monotonic_increasing
+    assert frame.index[-1] == pd.Timestamp('2026-10-20')
+
+def test_large_volumes_are_stored_exactly(provider):
+    frame = bars()
+    frame['Volume'] = 123_456_789.0 + frame['Close'].round()
+    sp.price_store.store_history('BIG', frame, '2y')
+
+    stored = sp.price_store.get_history('BIG', '2y')
+
+    assert (stored['Volume'].values == frame['Volume'].values).all()
+    assert (stored['Close'].values == frame['Close'].values).all()
+
+def test_float32_store_is_downloaded_again(provider):
+    sp.prefetch_histories(['OLD'], '2y')
+    bars_path, dates_path, _ = sp.price_store._paths('OLD')
+    legacy_path = bars_path[:-len('.f64')] + '.f32'
+    os.replace(bars_path, legacy_path)
+
+    frame = sp.price_store.get_history('OLD', '2y')
+
+    assert len(frame) == 30
+    assert provider.calls[-1] == ('history', 'OLD')
+    assert not os.path.exists(legacy_path)
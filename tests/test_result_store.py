@@ -0,0 +1,68 @@
+import threading
+
+import stock_predictor as sp
+
+def series(prediction_id):
+    return {'prediction_id': prediction_id, 'dates': [], 'prices': []}
+
+def test_latest_result_is_kept_per_ticker():
+    store = sp.ResultStore()
+    store.put('job1', 'AAA', 'completed', data={'price': 1})
+    store.put('job2', 'BBB', 'completed', data={'price': 2})
+    store.put('job3', 'AAA', 'error', error='upstream down')
+
+    assert store.latest('AAA')['id'] == 'job3'
+    assert store.latest('BBB')['data'] == {'price': 2}
+    assert store.latest('CCC') is None
+    assert store.get('job1')['status'] == 'completed'
+
+def test_least_recently_used_entries_are_evicted_beyond_the_limit():
+    store = sp.ResultStore(max_entries=2)
+    store.put('job1', 'AAA', 'completed', series=series('p1'))
+    store.put('job2', 'BBB', 'completed')
+    store.get('job1')
+    store.put('job3', 'CCC', 'completed')
+
+    assert store.get('job2') is None and store.latest('BBB') is None
+    assert store.get('job1') is not None and store.for_prediction('p1')['id'] == 'job1'
+    assert store.stats()['entries'] == 2
+
+def test_memory_cap_always_keeps_the_newest_entry():
+    store = sp.ResultStore(max_bytes=100)
+    store.put('job1', 'AAA', 'completed', data={'text': 'x' * 80})
+    store.put('job2', 'BBB', 'completed', data={'text': 'y' * 500})
+
+    assert store.get('job1') is None
+    assert store.get('job2') is not None
+    assert store.stats()['bytes'] == store.get('job2')['size']
+
+def test_graph_is_rendered_once_and_counted_in_the_size(monkeypatch):
+    renders = []
+    monkeypatch.setattr(sp, 'create_visualization', lambda series, fmt, dpi: renders.append(fmt) or b'chart')
+    store = sp.ResultStore()
+    entry = store.put('job1', 'AAA', 'completed', series=series('p1'))
+    size = entry['size']
+
+    assert store.graph('p1') == b'chart'
+    assert store.graph('p1') == b'chart'
+    assert store.graph('missing') is None
+    assert renders == ['png']
+    assert store.stats()['bytes'] == size + len(b'chart')
+
+def test_concurrent_puts_keep_the_indexes_consistent():
+    store = sp.ResultStore(max_entries=50)
+
+    def put(worker):
+        for i in range(200):
+            store.put(f'{worker}-{i}', f'T{i % 7}', 'completed', series=series(f'{worker}-{i}'))
+
+    threads = [threading.Thread(target=put, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(store.entries) == 50
+    assert set(store.by_prediction.values()) <= set(store.entries)
+    assert set(store.by_ticker.values()) <= set(store.entries)
+    assert store.total_bytes == sum(entry['size'] for entry in store.entries.values())
@@ -0,0 +1,43 @@
+import os
+
+import stock_predictor as sp
+
+def test_disk_tier_is_created_on_first_use(tmp_path):
+    path = tmp_path / 'cache' / 'sentiment.sqlite3'
+    cache = sp.SentimentCache(str(path))
+    assert not path.parent.exists()
+
+    cache.put_many({'a': 0.5})
+
+    assert path.exists()
+    assert cache.stats()['disk_entries'] == 1
+
+def test_scores_survive_a_new_instance(tmp_path):
+    path = str(tmp_path / 'sentiment.sqlite3')
+    sp.SentimentCache(path).put_many({'a': 0.5, 'b': -0.25})
+
+    cache = sp.SentimentCache(path)
+
+    assert cache.get_many(['a', 'b', 'c']) == {'a': 0.5, 'b': -0.25}
+    assert cache.counters['disk_hits'] == 2
+    assert cache.counters['misses'] == 1
+
+def test_hits_and_misses_count_distinct_keys(tmp_path):
+    cache = sp.SentimentCache(str(tmp_path / 'sentiment.sqlite3'))
+    cache.put_many({'hit': 0.1})
+
+    found = cache.get_many(['hit', 'hit', 'miss', 'miss'])
+
+    assert found == {'hit': 0.1}
+    stats = cache.stats()
+    assert (stats['memory_hits'], stats['disk_hits'], stats['misses']) == (1, 0, 1)
+    assert stats['hit_rate'] == 0.5
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    cache = sp.SentimentCache(str(tmp_path / 'sentiment.sqlite3'), memory_entries=2)
+    cache.put_many({'a': 1.0, 'b': 2.0})
+    cache.get_many(['a'])
+    cache.put_many({'c': 3.0})
+
+    assert list(cache.memory) == ['a', 'c']
+    assert os.path.exists(cache.path)
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+import stock_predictor as sp
+
+@pytest.fixture
+def empty_archive(monkeypatch):
+    """An archive with no news for any day, including the latest"""
+    monkeypatch.setattr(sp.news_archive, 'sentiment_feature', lambda ticker, index: np.full(len(index), np.nan))
+
+def test_current_score_fills_the_row_the_prediction_uses(provider, empty_archive):
+    data, X, y, scaler, last_date = sp.fetch_and_prepare_data('AAA', '2y', sentiment_score=0.42)
+
+    assert data['Sentiment'].iloc[-1] == pytest.approx(0.42)
+    assert (data['Sentiment'].iloc[:-1] == 0).all()
+    # Sentiment is the last feature column; the only non-zero value scales to 1
+    assert X[-1, -1] == pytest.approx(1.0)
+    assert last_date == data.index[-1]
+
+def test_current_score_fills_the_latest_bar_with_horizons(provider, empty_archive):
+    data, X, y, scaler, last_date = sp.fetch_and_prepare_data('AAA', '2y', sentiment_score=-0.3, horizons=[1, 5])
+
+    assert data['Sentiment'].iloc[-1] == pytest.approx(-0.3)
+    assert (data['Sentiment'].iloc[:-1] == 0).all()
+    assert last_date == data.index[-1]
+
+def test_archived_sentiment_is_kept(provider, monkeypatch):
+    monkeypatch.setattr(sp.news_archive, 'sentiment_feature', lambda ticker, index: np.full(len(index), 0.1))
+    data, X, y, scaler, last_date = sp.fetch_and_prepare_data('AAA', '2y', sentiment_score=0.9)
+
+    assert np.allclose(data['Sentiment'], 0.1)
@@ -0,0 +1,99 @@
+import json
+import time
+
+import pytest
+
+import stock_predictor as sp
+
+@pytest.fixture
+def manager(monkeypatch):
+    """A job manager whose jobs are registered by hand and never run"""
+    manager = sp.JobManager(workers=0)
+    monkeypatch.setattr(sp, 'job_manager', manager)
+    monkeypatch.setattr(sp, 'SSE_HEARTBEAT_SECONDS', 0.05)
+    return manager
+
+def add_job(manager, ticker='AAA'):
+    job = sp.PredictionJob(ticker, {})
+    job.status = 'running'
+    manager.jobs[job.id] = job
+    return job
+
+def parse(messages):
+    """(id, event, data) for every SSE message in the stream text, skipping comments and retry"""
+    events = []
+    for block in ''.join(messages).split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith((':', 'retry')))
+        if fields:
+            events.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return events
+
+def finish(job, event='result', data=None):
+    job.emit(event, data or {'ticker': job.ticker})
+    job.status = 'completed'
+    job.finished = time.time()
+
+def test_events_arrive_in_order_and_the_stream_ends_on_the_result(manager):
+    job = add_job(manager)
+    job.emit('stage', {'stage': 'fetching_data'})
+    job.emit('epoch', {'epoch': 1, 'epochs': 50, 'loss': 0.1})
+    finish(job)
+
+    messages = list(sp.stream_job_events(job))
+
+    assert messages[0].startswith('retry: ')
+    assert parse(messages) == [(1, 'stage', {'stage': 'fetching_data'}),
+                               (2, 'epoch', {'epoch': 1, 'epochs': 50, 'loss': 0.1}),
+                               (3, 'result', {'ticker': 'AAA'})]
+
+def test_job_events_resume_after_the_given_id(manager):
+    job = add_job(manager)
+    for stage in ('queued', 'fetching_data', 'training'):
+        job.emit('stage', {'stage': stage})
+    finish(job)
+    client = sp.app.test_client()
+
+    resumed = parse([client.get(f'/jobs/{job.id}/events?after=2').get_data(as_text=True)])
+    from_header = parse([client.get(f'/jobs/{job.id}/events', headers={'Last-Event-ID': '3'}).get_data(as_text=True)])
+
+    assert [event_id for event_id, _, _ in resumed] == [3, 4]
+    assert from_header == [(4, 'result', {'ticker': 'AAA'})]
+    assert client.get('/jobs/unknown/events').status_code == 404
+
+def test_disconnected_stream_cancels_the_job_after_the_grace_period(manager, monkeypatch):
+    monkeypatch.setattr(sp, 'SSE_DISCONNECT_GRACE_SECONDS', 0.1)
+    job = add_job(manager)
+    stream = sp.stream_job_events(job, cancel_on_disconnect=True)
+    next(stream)
+    stream.close()
+
+    # Still running within the grace period
+    assert job.status == 'running'
+    time.sleep(0.3)
+    assert job.status == 'cancelling' and job.cancel_event.is_set()
+
+def test_reattached_stream_keeps_the_job_running(manager, monkeypatch):
+    monkeypatch.setattr(sp, 'SSE_DISCONNECT_GRACE_SECONDS', 0.1)
+    job = add_job(manager)
+    job.emit('stage', {'stage': 'training'})
+    stream = sp.stream_job_events(job, cancel_on_disconnect=True)
+    next(stream)
+    stream.close()
+
+    # The dashboard reconnects to /jobs/<id>/events where the first stream left off
+    resumed = sp.stream_job_events(job, after=1)
+    next(resumed)
+    time.sleep(0.3)
+    assert job.status == 'running' and not job.cancel_event.is_set()
+
+    finish(job)
+    assert parse(list(resumed)) == [(2, 'result', {'ticker': 'AAA'})]
+
+def test_finished_stream_does_not_cancel(manager, monkeypatch):
+    monkeypatch.setattr(sp, 'SSE_DISCONNECT_GRACE_SECONDS', 0)
+    job = add_job(manager)
+    finish(job)
+    list(sp.stream_job_events(job, cancel_on_disconnect=True))
+    time.sleep(0.1)
+
+    assert job.status == 'completed' and not job.cancel_event.is_set()
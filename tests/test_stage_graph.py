@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+import stock_predictor as sp
+
+def test_independent_io_stages_overlap():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet(name):
+        # Both stages have to be running at once to get past the barrier
+        barrier.wait()
+        return name
+
+    started = time.monotonic()
+    results = sp.run_stage_graph({
+        'info': sp.PipelineStage(lambda: meet('info'), io=True),
+        'news': sp.PipelineStage(lambda: meet('news'), io=True),
+        'sentiment': sp.PipelineStage(lambda news: f'scored {news}', after=('news',)),
+        'combined': sp.PipelineStage(lambda info, sentiment: (info, sentiment), after=('info', 'sentiment'))
+    })
+
+    assert results['combined'] == ('info', 'scored news')
+    assert time.monotonic() - started < 5
+
+def test_dependencies_receive_results_in_order():
+    order = []
+    results = sp.run_stage_graph({
+        'a': sp.PipelineStage(lambda: order.append('a') or 1, io=True),
+        'b': sp.PipelineStage(lambda: order.append('b') or 2),
+        'c': sp.PipelineStage(lambda b, a: order.append('c') or (b, a), after=('b', 'a'))
+    })
+
+    assert results['c'] == (2, 1)
+    assert order[-1] == 'c'
+
+def test_timed_out_stage_uses_its_fallback():
+    release = threading.Event()
+    started = time.monotonic()
+    results = sp.run_stage_graph({
+        'slow': sp.PipelineStage(lambda: release.wait(5) and 'late', io=True, timeout=0.1, fallback='fallback'),
+        'fast': sp.PipelineStage(lambda: 'fast', io=True, timeout=0.1),
+        'after': sp.PipelineStage(lambda slow: slow.upper(), after=('slow',))
+    })
+    release.set()
+
+    assert results == {'slow': 'fallback', 'fast': 'fast', 'after': 'FALLBACK'}
+    assert time.monotonic() - started < 2
+
+def test_timed_out_stage_without_fallback_raises():
+    release = threading.Event()
+    with pytest.raises(sp.UpstreamTimeout):
+        sp.run_stage_graph({'slow': sp.PipelineStage(lambda: release.wait(5), io=True, timeout=0.1)})
+    release.set()
+
+def test_failing_stage_propagates():
+    def fail():
+        raise RuntimeError('upstream down')
+
+    with pytest.raises(RuntimeError, match='upstream down'):
+        sp.run_stage_graph({'info': sp.PipelineStage(fail, io=True),
+                            'next': sp.PipelineStage(lambda info: info, after=('info',))})
+
+def test_missing_dependency_is_reported():
+    with pytest.raises(ValueError, match='missing'):
+        sp.run_stage_graph({'orphan': sp.PipelineStage(lambda x: x, after=('nowhere',))})
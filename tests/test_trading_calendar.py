@@ -0,0 +1,26 @@
+import pandas as pd
+
+import stock_predictor as sp
+
+def test_us_listings_skip_nyse_holidays():
+    last = pd.Timestamp('2026-07-02')
+    assert sp.trading_dates(last, [1], 'AAPL') == [pd.Timestamp('2026-07-06')]
+    assert sp.trading_dates(last, [1], '^GSPC') == [pd.Timestamp('2026-07-06')]
+    assert sp.trading_dates(last, [1]) == [pd.Timestamp('2026-07-06')]
+
+def test_other_exchanges_step_over_weekends_only():
+    last = pd.Timestamp('2026-07-02')
+    assert sp.trading_dates(last, [1], '^NSEI') == [pd.Timestamp('2026-07-03')]
+    assert sp.trading_dates(last, [1, 2], 'RELIANCE.NS') == [pd.Timestamp('2026-07-03'), pd.Timestamp('2026-07-06')]
+
+def test_multi_horizon_dates_follow_the_ticker_calendar():
+    last = pd.Timestamp('2026-11-25')
+    # Thanksgiving (Nov 26) is a NYSE holiday
+    assert sp.trading_dates(last, [1, 5], 'MSFT') == [pd.Timestamp('2026-11-27'), pd.Timestamp('2026-12-03')]
+    assert sp.trading_dates(last, [1, 5], 'SAP.DE') == [pd.Timestamp('2026-11-26'), pd.Timestamp('2026-12-02')]
+
+def test_us_listing_detection():
+    assert sp.is_us_listing('BRK-B')
+    assert sp.is_us_listing('^ixic')
+    assert not sp.is_us_listing('^FTSE')
+    assert not sp.is_us_listing('7203.T')
@@ -0,0 +1,73 @@
+import time
+
+import numpy as np
+import pytest
+
+import stock_predictor as sp
+from test_model_registry import training_data
+
+@pytest.fixture
+def speeds(monkeypatch):
+    """An empty record of measured training speeds"""
+    monkeypatch.setattr(sp, 'training_speed', {})
+    return sp.training_speed
+
+def test_without_a_budget_or_measurements_the_standard_plan_runs(speeds):
+    assert sp.plan_training('mlp', 500, 50, None)['plan'] == 'standard'
+    assert sp.plan_training('mlp', 500, 50, 1)['plan'] == 'standard'
+    assert sp.plan_training('mlp', 500, 50, 0)['plan'] == 'ridge'
+
+def test_plan_degrades_to_bigger_batches_then_ridge(speeds):
+    # 1 ms per row per epoch: 500 rows * MIN_TRAINING_EPOCHS epochs take 2.5s at batch size 32
+    sp.record_training_speed('mlp', 32, 500, [5.0, 0.5, 0.5])
+    assert speeds[('mlp', 32)] == pytest.approx(0.001)
+
+    assert sp.plan_training('mlp', 500, 50, 3) == {'plan': 'standard', 'batch_size': 32, 'epochs': 50}
+    # Until measured, batches of 128 are assumed 4x cheaper
+    assert sp.plan_training('mlp', 500, 50, 1) == {'plan': 'reduced', 'batch_size': sp.REDUCED_BATCH_SIZE,
+                                                   'epochs': 50}
+    assert sp.plan_training('mlp', 500, 50, 0.5)['plan'] == 'ridge'
+    # Other variants keep their own measurements
+    assert sp.plan_training('sequence', 500, 50, 0.5)['plan'] == 'standard'
+
+def test_measured_speeds_are_smoothed(speeds):
+    sp.record_training_speed('mlp', 32, 100, [1.0, 0.1])
+    sp.record_training_speed('mlp', 32, 100, [1.0, 0.2])
+
+    assert speeds[('mlp', 32)] == pytest.approx(0.7 * 0.001 + 0.3 * 0.002)
+
+def test_budget_is_validated():
+    assert sp.parse_budget(None) == sp.PREDICTION_BUDGET_SECONDS
+    assert sp.parse_budget(20) == 20.0
+    for value in (0, -1, True, '20', sp.MAX_PREDICTION_BUDGET_SECONDS + 1):
+        with pytest.raises(ValueError):
+            sp.parse_budget(value)
+
+def test_expired_deadline_falls_back_to_ridge_without_saving(monkeypatch, speeds):
+    saved = []
+    monkeypatch.setattr(sp.model_registry, 'load', lambda ticker, variant: None)
+    monkeypatch.setattr(sp.model_registry, 'save', lambda *args: saved.append(args))
+    data, X, y, scaler = training_data(60, None)
+
+    model, _, X_used, training = sp.train_or_update_model('BUDGET', data, X, y, scaler,
+                                                          deadline=time.monotonic() - 1)
+
+    assert training['plan'] == 'ridge' and training['stopped'] == 'deadline'
+    assert training['reason'] == 'no saved model, training budget exhausted'
+    assert isinstance(model, sp.RidgeModel)
+    assert sp.predict_rows(model, X_used[-1:]).shape == (1, 1)
+    assert saved == []
+
+def test_deadline_stops_a_fit_between_epochs():
+    schedule = sp.TrainingSchedule(deadline=time.monotonic() + 0.5)
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 1, (200, 6)).astype(np.float32)
+    y = X.sum(axis=1) / 6
+    started = time.monotonic()
+
+    model, history = sp.create_and_train_model(X, y, epochs=10_000, schedule=schedule)
+
+    assert schedule.stopped == 'deadline'
+    assert len(history.epoch) < 10_000
+    assert time.monotonic() - started < 10
+    assert len(schedule.epoch_seconds) == len(history.epoch)
@@ -0,0 +1,93 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import stock_predictor as sp
+from test_model_registry import StubModel, training_data
+
+GRID = {'period': ['1y', '2y'], 'epochs': [5, 10], 'units': [[16, 8]], 'learning_rate': [1e-3]}
+DEFAULT = {'period': '2y', 'epochs': 10, 'units': [16, 8], 'learning_rate': 1e-3}
+
+@pytest.fixture
+def saved_model(monkeypatch):
+    """A registered model trained on 2y of bars up to the latest one"""
+    data, X, y, scaler = training_data(60, None)
+    meta = {
+        'config': {'feature_columns': sp.FEATURE_COLUMNS, 'epochs': 50, 'sentiment': 'daily', 'period': '2y'},
+        'last_date': data.index[-1].isoformat(),
+        'trained_at': time.time()
+    }
+    monkeypatch.setattr(sp.model_registry, 'load', lambda ticker, variant: (StubModel(), scaler, dict(meta)))
+    monkeypatch.setattr(sp.model_registry, 'save', lambda *args: None)
+    return data, X, y, scaler
+
+def test_saved_model_is_reused_for_the_same_period(saved_model):
+    _, _, _, training = sp.train_model_for_engine('keras', 'TUNE', *saved_model, period='2y')
+
+    assert training['mode'] == 'cached'
+
+def test_changed_period_retrains(saved_model):
+    # An expired deadline makes the retrain a ridge fit, so no network is trained here
+    _, _, _, training = sp.train_model_for_engine('keras', 'TUNE', *saved_model, period='1y',
+                                                  deadline=time.monotonic() - 1)
+
+    assert training['plan'] == 'ridge'
+    assert training['reason'].startswith('configuration changed')
+
+class InlinePool(ThreadPoolExecutor):
+    """Thread pool standing in for the spawned tuning processes"""
+
+    def __init__(self, max_workers, mp_context=None, initializer=None, initargs=()):
+        super().__init__(max_workers)
+
+@pytest.fixture
+def tuning(monkeypatch, tmp_path):
+    """Tuning with a small grid, fixed bars and trials scored by their epochs, recording what is submitted"""
+    submitted = []
+    dates = pd.bdate_range(end='2026-10-16', periods=100).values
+    values = np.ones((100, len(sp.FEATURE_COLUMNS)))
+
+    def trial(dates, values, config, folds, fold_days, seed):
+        submitted.append(sp.tuning_key(config))
+        return {'score': config['epochs'] / 10 + (config['period'] == '1y'), 'naive_score': 2.0, 'seconds': 0.0}
+
+    monkeypatch.setattr(sp, 'TUNING_GRID', GRID)
+    monkeypatch.setattr(sp, 'DEFAULT_TUNING_CONFIG', DEFAULT)
+    monkeypatch.setattr(sp, 'tuning_store', sp.TuningStore(str(tmp_path / 'tuning')))
+    monkeypatch.setattr(sp, 'ProcessPoolExecutor', InlinePool)
+    monkeypatch.setattr(sp, '_tuning_trial', trial)
+    monkeypatch.setattr(sp, 'tuning_data', lambda ticker: (dates, values))
+    monkeypatch.setattr(sp, 'prefetch_histories', lambda tickers, period: None)
+    return submitted
+
+def test_interrupted_search_resumes_with_the_unscored_trials(tuning):
+    configs = sp.tuning_configs(0)
+    first = list(sp.tune_tickers(['AAA'], trials=0, processes=1, hours=0))[0]
+    assert sorted(tuning) == sorted(sp.tuning_key(config) for config in configs)
+    assert first['best']['config'] == {'period': '2y', 'epochs': 5, 'units': [16, 8], 'learning_rate': 1e-3}
+
+    # Drop two trials as if the run had stopped before they were scored
+    record = sp.tuning_store.load('AAA')
+    missing = [sp.tuning_key(config) for config in configs[-2:]]
+    for key in missing:
+        del record['trials'][key]
+    sp.tuning_store.save('AAA', record)
+    tuning.clear()
+
+    resumed = list(sp.tune_tickers(['AAA'], trials=0, processes=1, hours=0))[0]
+
+    assert sorted(tuning) == sorted(missing)
+    assert resumed['complete'] and len(resumed['trials']) == len(configs)
+    assert sp.tuning_store.best('AAA') == first['best']['config']
+
+def test_finished_search_is_not_scored_again(tuning):
+    list(sp.tune_tickers(['AAA'], trials=0, processes=1, hours=0))
+    tuning.clear()
+
+    record = list(sp.tune_tickers(['AAA'], trials=0, processes=1, hours=0))[0]
+
+    assert tuning == []
+    assert record['status'] == 'success'
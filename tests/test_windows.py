@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+import stock_predictor as sp
+
+def test_windows_are_a_read_only_view_of_one_float32_copy():
+    features = np.arange(40, dtype=np.float64).reshape(10, 4)
+    windows = sp.make_windows(features, 3)
+
+    assert windows.shape == (8, 3, 4)
+    assert windows.dtype == np.float32
+    assert not windows.flags.writeable
+    np.testing.assert_array_equal(windows[0], features[0:3])
+    np.testing.assert_array_equal(windows[-1], features[7:10])
+    # Consecutive windows overlap in one buffer: the next window starts one row further on
+    assert np.shares_memory(windows[0], windows[1])
+    assert windows.strides[0] == 4 * 4
+
+def test_float32_contiguous_input_is_not_copied():
+    features = np.ones((20, 2), dtype=np.float32)
+
+    assert np.shares_memory(sp.make_windows(features, 5), features)
+
+def test_lookback_windows_are_labelled_with_their_last_rows_target(provider):
+    flat = sp.fetch_and_prepare_data('AAA', '2y')
+    windowed = sp.fetch_and_prepare_data('AAA', '2y', lookback=5)
+    _, X_flat, y_flat = flat[:3]
+    _, X, y = windowed[:3]
+
+    assert X.shape == (len(X_flat) - 4, 5, X_flat.shape[1])
+    np.testing.assert_allclose(X[:, -1, :], X_flat[4:], rtol=1e-6)
+    np.testing.assert_allclose(y, y_flat[4:], rtol=1e-6)
+    assert y.dtype == np.float32
+
+def test_lookback_longer_than_the_history_is_rejected(provider):
+    with pytest.raises(ValueError, match='lookback'):
+        sp.fetch_and_prepare_data('AAA', '2y', lookback=100)